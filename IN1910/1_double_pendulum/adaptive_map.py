@@ -0,0 +1,256 @@
+"""
+Adaptive maps of a scalar outcome of the double pendulum over a plane of
+initial values, for instance the time to flip over (theta_1, theta_2).
+
+Instead of solving every pixel of a uniform grid, the plane is split into
+coarse cells, and only the cells whose corner values disagree are split
+into four, like a quadtree, until the finest level is reached. The
+structure of these maps lives on thin boundaries, so most of the plane is
+left coarse. All the new corners of a level are solved together, as one
+batch or one batch per worker of a pool of processes, and the result is
+resampled onto a uniform raster for display.
+
+The outcome is any picklable function taking two arrays of initial values
+and returning an array of scalars, see FlipTimeOutcome and SweepOutcome.
+FlipTimeOutcome integrates a whole batch as one vectorised ensemble, so
+its cost per point falls the larger the batches are.
+"""
+
+import multiprocessing as mp
+import numpy as np
+import matplotlib.pyplot as plt
+
+import flip_map
+import sweep
+
+
+class AdaptiveMap():
+    """
+    A quadtree sampler of outcome(x, y) over the rectangle x_lim by y_lim.
+
+    The finest lattice has start*2**depth cells along each axis. The
+    corners of the cells are integer points on this lattice, so values are
+    shared between neighbouring cells and never solved twice.
+    """
+
+    def __init__(self, outcome, x_lim = (-np.pi, np.pi),
+                 y_lim = (-np.pi, np.pi), start = 8, depth = 5, tol = None):
+        """
+        outcome: function outcome(x, y) of two arrays, returning an array
+        x_lim, y_lim: tuples (min, max) of the plane to sample
+        start: number of coarse cells along each axis
+        depth: number of times a cell may be split
+        tol: a cell is split when its corner values differ by more than tol,
+             or when some of them are nan and some are not. Defaults to 5%
+             of the range of the coarse values.
+        """
+        self.outcome = outcome
+        self.x_lim = x_lim
+        self.y_lim = y_lim
+        self.start = start
+        self.depth = depth
+        self.tol = tol
+        self.N = start * 2**depth
+        self.x = np.linspace(x_lim[0], x_lim[1], self.N + 1)
+        self.y = np.linspace(y_lim[0], y_lim[1], self.N + 1)
+
+    def compute(self, batch = None, processes = None):
+        """
+        Samples the outcome adaptively, and stores the result.
+
+        batch: number of points in each task sent to the workers, defaults
+               to splitting each level evenly over the processes, so every
+               level is solved as one batch per process
+        processes: number of worker processes, defaults to the number of
+                   cores, 1 solves every batch in this process.
+
+        Stores
+        self.values: dictionary from lattice points (i, j) to the outcome
+        self.cells: the leaf cells (i, j, size) in lattice units
+        self.image: the raster, see raster
+        self.n_solves: number of points the outcome was solved for
+        """
+        pool = None if processes == 1 else mp.Pool(processes = processes)
+        self._tasks = 1 if pool is None else (processes or mp.cpu_count())
+        try:
+            self.values = {}
+            s = 2**self.depth
+            cells = [(i, j, s) for i in range(0, self.N, s)
+                     for j in range(0, self.N, s)]
+            self._evaluate(cells, batch, pool)
+
+            tol = self.tol
+            if tol is None:
+                coarse = np.array(list(self.values.values()))
+                if np.all(np.isnan(coarse)):
+                    tol = 0.0
+                else:
+                    tol = 0.05 * (np.nanmax(coarse) - np.nanmin(coarse))
+
+            leaves = []
+            while cells:
+                split = []
+                for cell in cells:
+                    if cell[2] > 1 and self._disagree(cell, tol):
+                        split.append(cell)
+                    else:
+                        leaves.append(cell)
+                cells = [child for cell in split
+                         for child in _children(cell)]
+                self._evaluate(cells, batch, pool)
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+
+        self.cells = leaves
+        self.n_solves = len(self.values)
+        self.image = self.raster()
+
+    def _evaluate(self, cells, batch, pool):
+        """
+        Solves the outcome for every corner of cells which is not known yet.
+        """
+        points = sorted({corner for cell in cells
+                         for corner in _corners(cell)
+                         if corner not in self.values})
+        if not points:
+            return
+
+        index = np.array(points)
+        x, y = self.x[index[:, 0]], self.y[index[:, 1]]
+        if batch is None:
+            batch = -(-len(points) // self._tasks)
+        tasks = [(self.outcome, x[k:k+batch], y[k:k+batch])
+                 for k in range(0, len(points), batch)]
+
+        if pool is None:
+            results = [_run_batch(task) for task in tasks]
+        else:
+            results = pool.map(_run_batch, tasks)
+
+        for point, value in zip(points, np.concatenate(results)):
+            self.values[point] = value
+
+    def _disagree(self, cell, tol):
+        """
+        Returns True if the corner values of cell differ by more than tol,
+        or if some of them are nan and some are not.
+        """
+        v = np.array([self.values[c] for c in _corners(cell)])
+        nan = np.isnan(v)
+        if np.any(nan):
+            return not np.all(nan)
+        return np.max(v) - np.min(v) > tol
+
+    def raster(self):
+        """
+        Returns the outcome resampled on the finest lattice, as an array of
+        shape (N+1, N+1) where row j holds y[j] and column i holds x[i].
+        Each leaf cell is filled by bilinear interpolation of its corners.
+        """
+        image = np.empty((self.N + 1, self.N + 1))
+        for i, j, s in self.cells:
+            v00, v10, v01, v11 = [self.values[c] for c in _corners((i, j, s))]
+            a = np.linspace(0, 1, s + 1)
+            wx, wy = a[None, :], a[:, None]
+            image[j:j+s+1, i:i+s+1] = ((1-wy) * ((1-wx)*v00 + wx*v10)
+                                       + wy * ((1-wx)*v01 + wx*v11))
+        # A nan corner spreads over the whole cell, put back the known values
+        for (i, j), v in self.values.items():
+            image[j, i] = v
+        return image
+
+    def plot(self, cells = False, cmap = "magma_r"):
+        """
+        Plots the raster, and the leaf cells if cells is True.
+        """
+        plt.figure(figsize=(8,7))
+        lim = (self.x_lim[0], self.x_lim[1], self.y_lim[0], self.y_lim[1])
+        plt.imshow(self.image, origin="lower", extent=lim, cmap=cmap)
+        plt.colorbar()
+        if cells:
+            hx, hy = self.x[1] - self.x[0], self.y[1] - self.y[0]
+            for i, j, s in self.cells:
+                plt.gca().add_patch(plt.Rectangle(
+                    (self.x[i], self.y[j]), s*hx, s*hy,
+                    fill=False, lw=0.2, color="k"))
+        plt.tight_layout()
+
+
+def _corners(cell):
+    "The four corners (i, j) of cell, in the order 00, 10, 01, 11"
+    i, j, s = cell
+    return (i, j), (i+s, j), (i, j+s), (i+s, j+s)
+
+
+def _children(cell):
+    "The four cells cell is split into"
+    i, j, s = cell
+    h = s // 2
+    return (i, j, h), (i+h, j, h), (i, j+h, h), (i+h, j+h, h)
+
+
+def _run_batch(task):
+    """
+    Solves the outcome for one batch of points, task = (outcome, x, y).
+    Module level so it can be sent to the worker processes.
+    """
+    outcome, x, y = task
+    return np.asarray(outcome(x, y), dtype=np.float64)
+
+
+class FlipTimeOutcome():
+    """
+    Time before either arm flips, for the double pendulum started at rest
+    from (theta_1, theta_2), nan if it does not flip within T. The whole
+    batch is integrated together by flip_map.flip_times_paired.
+    """
+
+    def __init__(self, T = 10, dt = 0.01, M1 = 1, M2 = 1, L1 = 1, L2 = 1,
+                 g = 9.81):
+        self.n_steps = int(T/dt)
+        self.h = T/self.n_steps
+        self.params = np.array([M1, M2, L1, L2, g], dtype=np.float64)
+
+    def __call__(self, theta_1, theta_2):
+        return flip_map.flip_times_paired(theta_1, theta_2, self.params,
+                                          self.h, self.n_steps)
+
+
+class SweepOutcome():
+    """
+    One of the summary values in sweep.SUMMARIES, for a DoublePendulum
+    solved with the two initial values x and y named by axes, the rest
+    taken from sweep.DEFAULTS or the keyword arguments.
+    """
+
+    def __init__(self, name = "energy_drift", T = 10, dt = 0.01,
+                 method = "RK4", axes = ("theta_1", "theta_2"), **params):
+        if name not in sweep.SUMMARIES:
+            raise ValueError("Unknown summary %s." %(name))
+        for a in list(axes) + list(params):
+            if a not in sweep.PARAMETERS:
+                raise ValueError("Unknown parameter %s." %(a))
+        self.index = sweep.SUMMARIES.index(name)
+        self.T, self.dt, self.method = T, dt, method
+        self.axes = axes
+        self.row = dict(sweep.DEFAULTS, **params)
+
+    def __call__(self, x, y):
+        out = np.empty(len(x))
+        for k in range(len(x)):
+            row = dict(self.row)
+            row[self.axes[0]], row[self.axes[1]] = x[k], y[k]
+            out[k] = sweep.run_one(row, self.T, self.dt,
+                                   self.method)[self.index]
+        return out
+
+
+if __name__ == "__main__":
+
+    AM = AdaptiveMap(FlipTimeOutcome(T = 20), start = 16, depth = 5)
+    AM.compute()
+    print("Solved %d of %d points" %(AM.n_solves, (AM.N + 1)**2))
+    AM.plot(cells = True)
+    plt.show()
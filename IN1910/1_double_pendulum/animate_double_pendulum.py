@@ -2,22 +2,31 @@ import scipy.integrate as spi
 import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib import animation
+from matplotlib.collections import LineCollection
 from double_pendulum import DoublePendulum
+from chain_pendulum import ChainPendulum
+from live_playback import LivePlayback
+import parallel_render
+import traces
 
 
-class AnimateDoublePendulum(DoublePendulum):
+class PendulumAnimation():
     """
-    Inherits all functionality from the DoublePendulum class.
-
-    This class is made to animate the solutions to the initial value problems
-    we solve with the DoublePendulum class.
+    The animation methods shared by AnimateDoublePendulum and
+    AnimateChainPendulum, mixed in with the model they animate.
+
+    The model gives the positions of its pendulums for given states
+    through _positions, which of them leave a trace through _traced, and
+    how far from the origin they can reach through _reach. The arms are drawn as one
+    line from the origin through every pendulum, and the pendulums as the
+    markers of one line, so the number of artists does not grow with the
+    number of pendulums.
     """
 
-    def __init__(self, M1 = 1, M2 = 1, L1 = 1, L2 = 1, g = 9.81,
-                 method = "Radau", axis = "off", axis_scale = "equal",
-                 axis_lim = (-2,2,-2.5,0.5),
-                 auto_lim = True, fps = 60, inc_trace = False):
-
+    def _init_animation(self, axis = "off", axis_scale = "equal",
+                        axis_lim = (-2,2,-2.5,0.5), auto_lim = True,
+                        fps = 60, inc_trace = False, trace_length = None,
+                        trace_fade = False):
         """
         axis: string to set whether axes should be drawn
         axis_scale: string to set whether the axis should be scaled
@@ -26,24 +35,52 @@ class AnimateDoublePendulum(DoublePendulum):
                   the axis limits.
         auto_lim: bool, if True it tries to automatically calculate
                   appropriate axis limits based on the highest/lowest
-                  x and y coordinates the second pendulum reached.
+                  x and y coordinates the last pendulum reached.
         fps: sets the frames per second for the save_animation method,
              and the real_time_animation method.
         inc_trace: bool, sets whether the animation should include a
                    trace of the pendulums as they move.
+        trace_length: number of stored values the trace reaches back, None
+                      traces the whole path. The whole path is drawn in
+                      chunks onto a cached image, and a limited trace is
+                      kept in a ring buffer, so the cost of drawing a frame
+                      does not grow as the animation goes on. See traces.py.
+        trace_fade: bool, if True a trace of limited length fades out
+                    towards its oldest end.
         """
-
-        DoublePendulum.__init__(self, M1, M2, L1, L2, g, method)
         self.axis = axis
         self.axis_scale = axis_scale
         self.axis_lim = axis_lim
         self.auto_lim = auto_lim
         self.fps = fps
         self.inc_trace = inc_trace
+        self.trace_length = trace_length
+        self.trace_fade = trace_fade
+
+    def _settings(self):
+        """
+        Returns a dictionary of the animation settings given to __init__,
+        used to rebuild the animation in other processes.
+        """
+        return {"axis": self.axis, "axis_scale": self.axis_scale,
+                "axis_lim": self.axis_lim, "auto_lim": self.auto_lim,
+                "fps": self.fps, "inc_trace": self.inc_trace,
+                "trace_length": self.trace_length,
+                "trace_fade": self.trace_fade}
+
+    def _bobs(self):
+        """
+        Returns the x and y positions of the pendulums in the stored
+        solution, as arrays of shape (number of pendulums, len(t)).
+        """
+        return self._positions(self._state())
 
-    def init_frame(self):
+    def init_frame(self, live = False):
         """
         Initialises the frame of the animation.
+
+        live: bool, if True the solution is not known in advance, and
+              auto_lim makes room for the pendulums wherever they can reach.
         """
         fig = plt.figure(1, figsize=(7,7))
         plt.axis(self.axis_scale)
@@ -52,12 +89,19 @@ class AnimateDoublePendulum(DoublePendulum):
             plt.axis(self.axis_lim)
             self.timer_x = self.axis_lim[0]*1.25
             self.timer_y = self.axis_lim[2]*1.25
+        elif live == True:
+            lim = self._reach()*1.1
+            self.timer_x = -lim
+            self.timer_y = lim*1.05
+            self.axis_lim = (-lim, lim, -lim, lim)
+            plt.axis(self.axis_lim)
         else:
-            x_max = np.max((np.abs(np.min(self.x_2)), np.abs(np.max(self.x_2))))
+            x_end, y_end = self._bob_x[-1], self._bob_y[-1]
+            x_max = np.max((np.abs(np.min(x_end)), np.abs(np.max(x_end))))
             self.timer_x = -x_max*1.25
-            y_min = np.min(self.y_2)
-            if np.max(self.y_2) >= 0:
-                y_max = np.max(self.y_2)
+            y_min = np.min(y_end)
+            if np.max(y_end) >= 0:
+                y_max = np.max(y_end)
                 self.timer_y = y_max * 1.275
             else:
                 y_max = 0
@@ -73,13 +117,11 @@ class AnimateDoublePendulum(DoublePendulum):
         returns the next frame for the animation.
         Sets the data/text of the properties to the i'th value.
         """
-        self.pendulum_1.set_data(self.x_1[i], self.y_1[i])
-        self.pendulum_2.set_data(self.x_2[i], self.y_2[i])
-        self.line_1.set_data([0,self.x_1[i]], [0,self.y_1[i]])
-        self.line_2.set_data([self.x_1[i],self.x_2[i]],[self.y_1[i],self.y_2[i]])
-        self.txt.set_text("t = %.2f"%(self.t[i]))
-        return (self.pendulum_1, self.pendulum_2, self.line_1, self.line_2,
-                self.txt, )
+        x, y = self._bob_x[:, i], self._bob_y[:, i]
+        self.bobs.set_data(x, y)
+        self.arms.set_data(np.concatenate(([0], x)), np.concatenate(([0], y)))
+        self.txt.set_text("t = %.2f"%(self._frame_t[i]))
+        return (self.bobs, self.arms, self.txt, )
 
     def _next_frame_trace(self, i):
         """
@@ -87,19 +129,79 @@ class AnimateDoublePendulum(DoublePendulum):
         Sets the data/text of the properties to the i'th value.
 
         This method also includes a trace, and sets the trace lines data
-        from 0 to the i'th value.
+        up to the i'th value, see _set_trace.
+        """
+        artists = self._next_frame(i)
+        for trace, buffer, k in zip(self.traces, self._buffers,
+                                    self._traced()):
+            self._set_trace(trace, buffer, self._bob_x[k], self._bob_y[k], i)
+        return artists[:-1] + tuple(self.traces) + artists[-1:]
+
+    def _init_traces(self):
+        """
+        Adds a trace line to the current axes for each traced pendulum. The
+        whole path is traced with a BakedTrace, a limited trace with a line
+        or, when it fades, a LineCollection, each fed by a TraceBuffer.
+        """
+        ax = plt.gca()
+        self.traces, self._buffers = [], []
+        for _ in self._traced():
+            if self.trace_length is None:
+                trace = ax.add_line(traces.BakedTrace([], [], c = "b",
+                                                      ls = "--", lw = 0.5))
+                buffer = None
+            else:
+                if self.trace_fade == True:
+                    trace = ax.add_collection(LineCollection([], colors = "b",
+                                                             lw = 0.5))
+                else:
+                    trace, = plt.plot([], [], c = "b", ls = "--", lw = 0.5)
+                buffer = traces.TraceBuffer(self.trace_length)
+            self.traces.append(trace)
+            self._buffers.append(buffer)
+
+    def _set_trace(self, trace, buffer, x, y, i):
+        """
+        Sets the data of one trace to end at the i'th value.
+        """
+        if buffer is None:
+            trace.set_data(x[0:i+1], y[0:i+1])
+            return
+
+        buffer.update(x, y, i)
+        x_tail, y_tail = buffer.ordered()
+        if self.trace_fade == True:
+            segments, alphas = traces.fading_segments(x_tail, y_tail)
+            trace.set_segments(segments)
+            trace.set_alpha(alphas if len(alphas) > 0 else None)
+        else:
+            trace.set_data(x_tail, y_tail)
+
+    def _frame_indices(self, duration = None):
+        """
+        Returns the indices of the stored values shown in each frame.
+
+        With duration None every stored value is a frame. Otherwise the
+        animation gets round(duration*fps)+1 frames evenly spread over the
+        solution, each showing the closest stored value. If the solution
+        holds fewer values than that, every value is used once, solve with
+        a smaller dt or use real_time_animation to get more.
         """
-        self.pendulum_1.set_data(self.x_1[i], self.y_1[i])
-        self.pendulum_2.set_data(self.x_2[i], self.y_2[i])
-        self.line_1.set_data([0,self.x_1[i]], [0,self.y_1[i]])
-        self.line_2.set_data([self.x_1[i],self.x_2[i]],[self.y_1[i],self.y_2[i]])
-        self.trace_1.set_data(self.x_1[0:i], self.y_1[0:i])
-        self.trace_2.set_data(self.x_2[0:i], self.y_2[0:i])
-        self.txt.set_text("t = %.2f"%(self.t[i]))
-        return (self.pendulum_1, self.pendulum_2, self.line_1, self.line_2,
-                self.trace_1, self.trace_2, self.txt, )
+        n = len(self.t)
+        if duration is None:
+            return np.arange(n)
+
+        n_frames = int(round(duration*self.fps)) + 1
+        if n_frames >= n:
+            return np.arange(n)
 
-    def create_animation(self, blit = True):
+        t = self.t
+        times = np.linspace(t[0], t[-1], n_frames)
+        i = np.clip(np.searchsorted(t, times), 1, n - 1)
+        i -= (times - t[i-1]) < (t[i] - times)
+        return np.unique(i)
+
+    def create_animation(self, blit = True, frames = None, duration = None):
         """
         Creates an animation based on the current local stored solution, if
         the solver has not been run yet it raises an exception through
@@ -108,69 +210,171 @@ class AnimateDoublePendulum(DoublePendulum):
 
         Uses self.inc_trace to decide whether to use _next_frame or
         _next_frame_trace to draw the next frame.
+
+        frames: optional range of the frames to animate, defaults to all
+        duration: optional length of the animation in seconds. The
+                  animation then has duration*fps frames, each showing the
+                  stored value closest to its time, so a small timestep
+                  used for accuracy does not add frames. See frame_indices.
         """
 
         self.check_run()
 
         self.anim = None
+        self._bob_x, self._bob_y = self._bobs()
+        self._frame_t = self.t
 
-        dt = self.t[2] - self.t[1]
-        frames = len(self.x_1)
-
-        self.fig = self.init_frame()
-        self.pendulum_1, = plt.plot([], [], c="r", marker="o", markersize=10)
-        self.pendulum_2, = plt.plot([], [], c="r", marker="o", markersize=10)
-        self.line_1, = plt.plot([], [], c = "k", ls = "-", lw = 0.5)
-        self.line_2, = plt.plot([], [], c = "k", ls = "-", lw = 0.5)
-        self.txt = plt.text(self.timer_x,self.timer_y,"t = 0")
+        self.frame_indices = self._frame_indices(duration)
+        if frames is not None:
+            self.frame_indices = self.frame_indices[frames.start:frames.stop]
 
-        if self.inc_trace == True:
-            self.trace_1, = plt.plot([], [], c = "b", ls = "--", lw = 0.5)
-            self.trace_2, = plt.plot([], [], c = "b", ls = "--", lw = 0.5)
-            anim_func = self._next_frame_trace
+        if duration is None:
+            interval = 1000*(self.t[2] - self.t[1])
         else:
-            anim_func = self._next_frame
+            interval = 1000/self.fps
 
+        self.fig = self.init_frame()
+        anim_func = self._init_artists()
 
         anim = animation.FuncAnimation(self.fig,
                                        func = anim_func,
-                                       frames = frames,
+                                       frames = self.frame_indices,
                                        repeat = None,
-                                       interval = 1000*dt,
+                                       interval = interval,
                                        blit = blit)
 
         self.anim = anim
 
 
-    def show_animation(self):
+    def _init_artists(self):
+        """
+        Adds the pendulums, arms, timer and traces to the frame, and returns
+        the method drawing the i'th frame.
+        """
+        self.bobs, = plt.plot([], [], c="r", ls="", marker="o", markersize=10)
+        self.arms, = plt.plot([], [], c = "k", ls = "-", lw = 0.5)
+        self.txt = plt.text(self.timer_x,self.timer_y,"t = 0")
+
+        if self.inc_trace == True:
+            self._init_traces()
+            return self._next_frame_trace
+        return self._next_frame
+
+    def show_animation(self, duration = None, blit = False):
         """
         Calls the create_animation method and shows the animation using
         pyplot.show()
+
+        duration: optional length of the animation in seconds, see
+                  create_animation
+        blit: bool, if True only the artists which change are redrawn
         """
-        self.create_animation(blit = False)
+        self.create_animation(blit = blit, duration = duration)
         plt.show()
         plt.close(self.fig)
 
-    def save_animation(self, filename = "Double_Pendulum", dpi = 400):
+    def save_animation(self, filename = "Double_Pendulum", dpi = 400,
+                       processes = 1, n_segments = None, duration = None):
         """
         Calls the create_animation method and saves the animations as an mp4
         file.
 
         filename: Specifies the name of the saved animation, "filename.mp4"
         dpi: specifies the dots-per-inch to be drawn in the savefile.
+        processes: number of processes drawing the frames, None uses every
+                   core. With more than one, the frames are drawn in
+                   segments by worker processes and encoded in order
+                   afterwards, giving the same video. See parallel_render.py.
+        n_segments: number of segments the frames are split into, when
+                    processes is not 1.
+        duration: optional length of the video in seconds, see
+                  create_animation. Only duration*fps frames are then
+                  drawn, whatever timestep the solution was found with.
         """
-        self.create_animation()
+        if processes != 1:
+            parallel_render.save_animation(self, filename, dpi, processes,
+                                           n_segments, duration)
+            return
+
+        self.create_animation(duration = duration)
         self.anim.save("%s.mp4" %(filename),
                        writer = "ffmpeg", fps = self.fps,
                        dpi = dpi)
         plt.close(self.fig)
 
+    def create_live_animation(self, y0, T, angles = "rad", vid_speed = 1,
+                              window = None, queue_size = None):
+        """
+        Creates an animation which is drawn while the problem is solved,
+        and starts solving in a background thread. See live_playback.py.
+
+        The playback runs at fps frames per second, showing vid_speed
+        seconds of simulated time per second, and starts as soon as the
+        first window is solved. Frames the solver delivers too late are
+        dropped, so the playback keeps up with the wall clock. The playback
+        is found in self.playback, and nothing is stored in the instance
+        as a solution.
+
+        y0, T, angles: the initial value problem, see solve
+        vid_speed: simulated time shown per second of playback
+        window, queue_size: see LivePlayback
+        """
+        self.anim = None
+        self.playback = LivePlayback(self, y0, T, angles, vid_speed, window,
+                                     queue_size)
+        self._bob_x, self._bob_y = self.playback.x, self.playback.y
+        self._frame_t = self.playback.t
+
+        self.fig = self.init_frame(live = True)
+        self._live_func = self._init_artists()
+        self._artists = ()
+
+        self.anim = animation.FuncAnimation(self.fig,
+                                            func = self._next_live_frame,
+                                            repeat = False,
+                                            interval = 1000/self.fps,
+                                            cache_frame_data = False,
+                                            blit = False)
+        self.playback.start()
+
+    def _next_live_frame(self, _):
+        """
+        Draws the frame the playback says is due, or leaves the drawing as
+        it is if no new frame is ready. Stops the animation after the last
+        frame.
+        """
+        i = self.playback.next_index()
+        if i is not None:
+            self._artists = self._live_func(i)
+        if self.playback.finished and self.anim is not None:
+            self.anim.event_source.stop()
+        return self._artists
+
+    def live_animation(self, y0, T, angles = "rad", vid_speed = 1,
+                       window = None, queue_size = None):
+        """
+        Shows an animation which is drawn while the problem is solved,
+        using pyplot.show(). See create_live_animation.
+        """
+        self.create_live_animation(y0, T, angles, vid_speed, window,
+                                   queue_size)
+        try:
+            plt.show()
+        finally:
+            self.playback.stop()
+            plt.close(self.fig)
+
     def real_time_animation(self, y0, T, angles = "rad", vid_speed = 1):
         """
         Extra method, included to run the solver with a dt that ensures the
         simulation is rendered in real time, in relation to the fps it will be
         saved with.
 
+        If the instance already holds a solution for the same y0 and T, it
+        is not solved again, the stored solution is just resampled at the
+        new frame times using its dense output. Changing fps or vid_speed
+        is then only a cheap interpolation.
+
         y0: our initial values, use form: [theta_0, omega_0, theta_1, omega_1]
         T: total time to solve for
         dt: timestep to use when solving
@@ -178,9 +382,222 @@ class AnimateDoublePendulum(DoublePendulum):
                 are given in radians or degrees
         """
         dt = (vid_speed/self.fps)
-        self.solve(y0, T, dt, angles)
+
+        if self.solved_for(y0, T, angles):
+            self.resample(np.linspace(0, T, int(T/dt)+1))
+        else:
+            self.solve(y0, T, dt, angles)
 
 
+class AnimateDoublePendulum(PendulumAnimation, DoublePendulum):
+    """
+    Inherits all functionality from the DoublePendulum class.
+
+    This class is made to animate the solutions to the initial value problems
+    we solve with the DoublePendulum class.
+    """
+
+    def __init__(self, M1 = 1, M2 = 1, L1 = 1, L2 = 1, g = 9.81,
+                 method = "Radau", axis = "off", axis_scale = "equal",
+                 axis_lim = (-2,2,-2.5,0.5),
+                 auto_lim = True, fps = 60, inc_trace = False,
+                 trace_length = None, trace_fade = False):
+        """
+        See DoublePendulum __init__ for the model, and
+        PendulumAnimation _init_animation for the animation settings.
+        """
+
+        DoublePendulum.__init__(self, M1, M2, L1, L2, g, method)
+        self._init_animation(axis, axis_scale, axis_lim, auto_lim, fps,
+                             inc_trace, trace_length, trace_fade)
+
+    def _positions(self, u):
+        """
+        Returns the x and y positions of the two pendulums in the states u,
+        of shape (4,) or (4, n), as arrays of shape (2,) or (2, n).
+        """
+        x_1 = self.L1*np.sin(u[0])
+        y_1 = -self.L1*np.cos(u[0])
+        return (np.array([x_1, x_1 + self.L2*np.sin(u[2])]),
+                np.array([y_1, y_1 - self.L2*np.cos(u[2])]))
+
+    def _reach(self):
+        "Returns the longest distance from the origin a pendulum can reach"
+        return self.L1 + self.L2
+
+    def _traced(self):
+        "Both pendulums leave a trace"
+        return (0, 1)
+
+    # The names the artists had before both pendulums were drawn by one
+    # line each, kept so existing code using them still works
+
+    @property
+    def pendulum_1(self):
+        "The artist drawing the first pendulum, the same as bobs"
+        return self.bobs
+
+    @property
+    def pendulum_2(self):
+        "The artist drawing the second pendulum, the same as bobs"
+        return self.bobs
+
+    @property
+    def line_1(self):
+        "The artist drawing the first arm, the same as arms"
+        return self.arms
+
+    @property
+    def line_2(self):
+        "The artist drawing the second arm, the same as arms"
+        return self.arms
+
+    @property
+    def trace_1(self):
+        "The trace of the first pendulum, traces[0]"
+        return self.traces[0]
+
+    @property
+    def trace_2(self):
+        "The trace of the second pendulum, traces[1]"
+        return self.traces[1]
+
+
+class AnimateChainPendulum(PendulumAnimation, ChainPendulum):
+    """
+    Inherits all functionality from the ChainPendulum class, and animates
+    its solutions the same way as AnimateDoublePendulum.
+    """
+
+    def __init__(self, N = 3, M = 1, L = 1, g = 9.81, method = "DOP853",
+                 axis = "off", axis_scale = "equal",
+                 axis_lim = (-2,2,-2.5,0.5),
+                 auto_lim = True, fps = 60, inc_trace = False,
+                 trace_length = None, trace_fade = False):
+        """
+        See ChainPendulum __init__ for the model, and
+        PendulumAnimation _init_animation for the animation settings.
+        """
+
+        ChainPendulum.__init__(self, N, M, L, g, method)
+        self._init_animation(axis, axis_scale, axis_lim, auto_lim, fps,
+                             inc_trace, trace_length, trace_fade)
+
+    def _positions(self, u):
+        """
+        Returns the x and y positions of the pendulums in the states u, of
+        shape (2N,) or (2N, n), as arrays of shape (N,) or (N, n).
+        """
+        L = self.L.reshape((self.N,) + (1,)*(np.ndim(u) - 1))
+        theta = u[:self.N]
+        return (np.cumsum(L*np.sin(theta), axis=0),
+                np.cumsum(-L*np.cos(theta), axis=0))
+
+    def _reach(self):
+        "Returns the longest distance from the origin a pendulum can reach"
+        return np.sum(self.L)
+
+    def _traced(self):
+        "Only the last pendulum, at the free end of the chain, is traced"
+        return (self.N - 1,)
+
+
+class AnimateEnsemble(AnimateDoublePendulum):
+    """
+    Inherits all functionality from the AnimateDoublePendulum class, and
+    animates an ensemble of double pendulums solved with solve_ensemble,
+    such as thousands of pendulums started close together drifting apart.
+
+    The arms of every pendulum are drawn by one LineCollection. Its paths
+    are views into one vertex buffer of shape (N, 3, 2), which is filled
+    in place from the positions of the frame, so drawing a frame costs a
+    few array copies and the rasterisation, whatever the size of the
+    ensemble.
+    """
+
+    def __init__(self, M1 = 1, M2 = 1, L1 = 1, L2 = 1, g = 9.81,
+                 method = "RK4", axis = "off", axis_scale = "equal",
+                 axis_lim = (-2,2,-2.5,0.5),
+                 auto_lim = True, fps = 60, color_by_index = True,
+                 cmap = "viridis", color = "k", lw = 0.5):
+        """
+        See DoublePendulum __init__ for the model, and
+        PendulumAnimation _init_animation for the animation settings.
+        The ensemble is drawn without traces.
+
+        color_by_index: bool, if True pendulum k gets the colour at
+                        k/(N-1) of cmap, so neighbouring initial values
+                        get similar colours. Otherwise all arms are color.
+        cmap: name of the matplotlib colormap used with color_by_index
+        color: colour of the arms without color_by_index
+        lw: line width of the arms
+        """
+
+        DoublePendulum.__init__(self, M1, M2, L1, L2, g, method)
+        self._init_animation(axis, axis_scale, axis_lim, auto_lim, fps)
+        self.color_by_index = color_by_index
+        self.cmap = cmap
+        self.color = color
+        self.lw = lw
+
+    def _settings(self):
+        """
+        Returns a dictionary of the animation settings given to __init__,
+        used to rebuild the animation in other processes.
+        """
+        settings = AnimateDoublePendulum._settings(self)
+        for name in ("inc_trace", "trace_length", "trace_fade"):
+            del settings[name]
+        settings.update({"color_by_index": self.color_by_index,
+                         "cmap": self.cmap, "color": self.color,
+                         "lw": self.lw})
+        return settings
+
+    def _traced(self):
+        "The pendulums of an ensemble leave no trace"
+        return ()
+
+    def _bobs(self):
+        """
+        Returns the x and y positions of the two pendulums of every member
+        of the ensemble, as arrays of shape (2, len(t), N). Each frame is
+        then contiguous in memory. A solution of solve is an ensemble of
+        one.
+        """
+        x, y = AnimateDoublePendulum._bobs(self)
+        n = len(self.t)
+        return (np.ascontiguousarray(x.reshape(2, -1, n).transpose(0, 2, 1)),
+                np.ascontiguousarray(y.reshape(2, -1, n).transpose(0, 2, 1)))
+
+    def _init_artists(self):
+        """
+        Adds the arms of the ensemble as one LineCollection, drawing the
+        vertex buffer self._segments, and the timer to the frame. Returns
+        the method drawing the i'th frame.
+        """
+        N = self._bob_x.shape[2]
+        self._segments = np.zeros((N, 3, 2))
+        if self.color_by_index == True:
+            colors = plt.get_cmap(self.cmap)(np.linspace(0, 1, N))
+        else:
+            colors = self.color
+        self.arms = plt.gca().add_collection(
+            LineCollection(self._segments, colors = colors, lw = self.lw))
+        self.txt = plt.text(self.timer_x,self.timer_y,"t = 0")
+        return self._next_frame
+
+    def _next_frame(self, i):
+        """
+        returns the next frame for the animation.
+        Fills the vertex buffer with the positions of the i'th value.
+        """
+        self._segments[:, 1, 0] = self._bob_x[0, i]
+        self._segments[:, 1, 1] = self._bob_y[0, i]
+        self._segments[:, 2, 0] = self._bob_x[1, i]
+        self._segments[:, 2, 1] = self._bob_y[1, i]
+        self.arms.stale = True
+        self.txt.set_text("t = %.2f"%(self._frame_t[i]))
+        return (self.arms, self.txt, )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,212 @@
+"""
+Benchmarks the solve methods of Pendulum, DampenedPendulum,
+DoublePendulum and ChainPendulum, measuring both what a solve costs and
+how accurate it is, so a change to the models or the integrators can be
+checked for making solves slower or less accurate.
+
+Every method in METHODS a model supports is run on every case in CASES,
+regular and chaotic initial values. For each run the benchmark records
+
+wall_time: the best of repeat timed solves, in seconds
+integration_time, post_processing_time: how the wall time of that solve
+                                        was split, see solver_stats.py
+nfev, njev, nlu, steps: the right hand side and jacobian evaluations, LU
+                        decompositions and steps of the solver, from the
+                        stats of the solve
+peak_memory: the largest amount of memory allocated during a solve, in
+             bytes, measured with tracemalloc in a separate solve since
+             tracing slows the solve down
+energy_drift: the largest |E(t) - E(0)|, None for the dampened pendulum
+max_error, final_error: the largest and the last difference from a
+                        reference solved with DOP853 at REFERENCE
+                        tolerances. In the chaotic cases the error
+                        grows quickly for every method, so it is mostly
+                        useful for comparing runs with each other.
+
+The results are written as JSON by write, and two result files can be
+compared run by run with compare. The compiled kernels are warmed up
+before timing, so compilation is not counted.
+"""
+
+import json
+import platform
+import time
+import tracemalloc
+import numpy as np
+import scipy
+import scipy.integrate as spi
+import pendulum_kernels as pk
+from pendulum import Pendulum, DampenedPendulum
+from double_pendulum import DoublePendulum
+from chain_pendulum import ChainPendulum
+
+
+METHODS = ("RK45", "DOP853", "Radau", "BDF", "LSODA",
+           "RK4", "Verlet", "GL4", "Elliptic")
+
+CASES = {"pendulum_regular": (Pendulum, (0.3, 0)),
+         "pendulum_large": (Pendulum, (3.0, 0)),
+         "dampened": (DampenedPendulum, (np.pi/2, 0)),
+         "double_regular": (DoublePendulum, (0.1, 0, 0.1, 0)),
+         "double_chaotic": (DoublePendulum, (np.pi/2, 0, np.pi, 0)),
+         "chain_chaotic": (ChainPendulum, (np.pi/2, np.pi/2, np.pi/2,
+                                           0, 0, 0))}
+
+REFERENCE = {"method": "DOP853", "rtol": 1e-12, "atol": 1e-12}
+
+
+def supported(cls, method):
+    """
+    Returns True if models of class cls can be solved with method.
+    """
+    if method == "Verlet":
+        return cls is Pendulum
+    if method == "Elliptic":
+        return issubclass(cls, Pendulum) and cls is not DampenedPendulum
+    return True
+
+
+def _solve(model, y0, T, dt):
+    """
+    Solves with the solve method of model, and returns the solution and
+    the solver statistics.
+    """
+    model.solve(y0, T, dt)
+    return model._state(), model.stats
+
+
+def reference(model, y0, t_vals):
+    """
+    Returns the solution at t_vals with the REFERENCE settings.
+    """
+    fun, _ = model._functions()
+    sol = spi.solve_ivp(fun, (t_vals[0], t_vals[-1]), y0,
+                        t_eval=t_vals, **REFERENCE)
+    return sol.y
+
+
+def run_one(cls, method, y0, T, dt, y_ref, repeat = 3):
+    """
+    Benchmarks one method on one case, and returns the values described
+    at the top as a dictionary.
+    """
+    model = cls(method = method)
+    y0 = np.asarray(y0, dtype=np.float64)
+
+    # Compiles the kernels, and warms up the caches
+    _solve(model, y0, 2*dt, dt)
+
+    wall_time = np.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        y, solve_stats = _solve(model, y0, T, dt)
+        elapsed = time.perf_counter() - start
+        if elapsed < wall_time:
+            wall_time, stats = elapsed, solve_stats
+
+    tracemalloc.start()
+    try:
+        _solve(model, y0, T, dt)
+        peak_memory = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    if cls is DampenedPendulum:
+        energy_drift = None
+    else:
+        E = model._energy(y)
+        energy_drift = float(np.max(np.abs(E - E[0])))
+
+    error = np.max(np.abs(y - y_ref), axis=0)
+    result = {"wall_time": wall_time, "peak_memory": peak_memory,
+              "energy_drift": energy_drift,
+              "max_error": float(np.max(error)),
+              "final_error": float(error[-1])}
+    for name in ("integration_time", "post_processing_time",
+                 "nfev", "njev", "nlu", "steps"):
+        result[name] = stats[name]
+    return result
+
+
+def run_benchmark(T = 20, dt = 0.01, methods = METHODS, cases = None,
+                  repeat = 3):
+    """
+    Benchmarks every method in methods on every case named in cases,
+    defaulting to all of CASES.
+
+    Returns a dictionary holding the settings, the versions of the
+    packages used, and the list of results, one dictionary per run with
+    the case, model and method added to the values of run_one.
+    """
+    cases = list(CASES) if cases is None else cases
+    t_vals = np.linspace(0, T, int(T/dt)+1)
+
+    results = []
+    for case in cases:
+        cls, y0 = CASES[case]
+        y_ref = reference(cls(), np.asarray(y0, dtype=np.float64), t_vals)
+        for method in methods:
+            if not supported(cls, method):
+                continue
+            result = {"case": case, "model": cls.__name__,
+                      "method": method}
+            result.update(run_one(cls, method, y0, T, dt, y_ref, repeat))
+            results.append(result)
+
+    return {"T": T, "dt": dt, "repeat": repeat,
+            "reference": REFERENCE,
+            "versions": {"python": platform.python_version(),
+                         "numpy": np.__version__,
+                         "scipy": scipy.__version__,
+                         "numba": pk.NUMBA_AVAILABLE},
+            "results": results}
+
+
+def write(benchmark, filename):
+    """
+    Writes the dictionary from run_benchmark as JSON to filename.
+    """
+    with open(filename, "w") as f:
+        json.dump(benchmark, f, indent=2)
+
+
+def compare(old, new):
+    """
+    Compares two benchmarks, dictionaries from run_benchmark or the names
+    of the JSON files they were written to.
+
+    Returns a dictionary from (case, method) to the ratios new/old of the
+    wall time, peak memory and max error, for the runs found in both.
+    """
+    if isinstance(old, str):
+        with open(old) as f:
+            old = json.load(f)
+    if isinstance(new, str):
+        with open(new) as f:
+            new = json.load(f)
+
+    runs = {(r["case"], r["method"]): r for r in old["results"]}
+    ratios = {}
+    for r in new["results"]:
+        key = (r["case"], r["method"])
+        if key not in runs:
+            continue
+        ratios[key] = {name: r[name] / runs[key][name] if runs[key][name]
+                       else np.nan
+                       for name in ("wall_time", "peak_memory", "max_error")}
+    return ratios
+
+
+if __name__ == "__main__":
+
+    benchmark = run_benchmark()
+    write(benchmark, "benchmark.json")
+
+    print("%-18s %-9s %10s %8s %10s %12s %12s" %("case", "method", "time (s)",
+          "nfev", "memory", "E drift", "max error"))
+    for r in benchmark["results"]:
+        drift = r["energy_drift"]
+        print("%-18s %-9s %10.4f %8s %10d %12s %12.3e" %(r["case"],
+              r["method"], r["wall_time"],
+              "-" if r["nfev"] is None else r["nfev"], r["peak_memory"],
+              "-" if drift is None else "%.3e" %(drift), r["max_error"]))
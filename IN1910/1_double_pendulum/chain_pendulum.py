@@ -0,0 +1,266 @@
+import numpy as np
+import matplotlib.pyplot as plt
+import pendulum_kernels as pk
+import pendulum_events as pe
+from pendulum_model import PendulumModel
+
+
+class ChainPendulum(PendulumModel):
+    """
+    A class to represent a chain of N pendulums, with completely rigid
+    massless rods. The first pendulum is connected to the origin of our
+    coordinate system, and each of the others to the one before it. For
+    N = 2 this is the same system as DoublePendulum.
+
+    The pendulums hang freely under gravity, air resistance and hinge
+    friction is ignored. Thus the sum of Potential and Kinetic energy should
+    remain constant.
+
+    The equations of motion are written as A(theta) domega = b(theta, omega),
+    where the mass matrix A is N x N, and are solved as a linear system at
+    every evaluation of the right hand side, see
+    pendulum_kernels.chain_pendulum_rhs.
+
+    The state is ordered as (theta_1, ..., theta_N, omega_1, ..., omega_N),
+    and the theta and omega properties are arrays of shape (N, len(t)).
+
+    Contains a method to solve an initial value problem for this system,
+    see pendulum_model.py.
+    """
+
+    def __init__(self, N = 3, M = 1, L = 1, g = 9.81, method = "DOP853"):
+        """
+        N: number of pendulums in the chain
+        M: mass of each pendulum, a single value or a list of N values
+        L: length of each rod, a single value or a list of N values
+        g: gravitational constant
+        method: which method SciPy's solve_ivp should utilise
+                to solve the ivp, or one of the fixed step methods
+                "RK4" or "GL4" from integrators.py. The implicit methods
+                estimate the jacobian with finite differences.
+
+        self.Solver_Run is a boolean which the check_run method
+        uses to check whether the class instance has run the
+        solve method.
+        """
+        PendulumModel.__init__(self, method)
+        self.N = N
+        self.M = np.broadcast_to(np.asarray(M, dtype=np.float64), (N,)).copy()
+        self.L = np.broadcast_to(np.asarray(L, dtype=np.float64), (N,)).copy()
+        self.g = g
+        self.EVENTS = pe.chain_pendulum_events(N)
+
+    def _params(self):
+        """
+        Returns the parameter array of the chain kernels in
+        pendulum_kernels, (g, mu_1, ..., mu_N, L_1, ..., L_N), where mu_k
+        is the sum of the masses from pendulum k to the end of the chain.
+        """
+        mu = np.cumsum(self.M[::-1])[::-1]
+        return np.concatenate(([self.g], mu, self.L))
+
+    def __call__(self, t, u):
+        """
+        Takes in u = (theta_1, ..., theta_N, omega_1, ..., omega_N), or an
+        array of shape (2N, n) holding n states.
+        Returns u_d = (d_theta_1, ..., d_theta_N, d_omega_1, ..., d_omega_N)
+        in the same shape.
+
+        The mass matrices and forcing terms of all the states are built as
+        arrays, and solved together.
+        """
+        N = self.N
+        u = np.asarray(u, dtype=np.float64)
+        theta, omega = u[:N], u[N:]
+        mu = np.cumsum(self.M[::-1])[::-1]
+        c = mu[np.maximum.outer(np.arange(N), np.arange(N))] * np.outer(self.L,
+                                                                      self.L)
+        if u.ndim > 1:
+            c = c[:, :, None]
+
+        diff = theta[:, None] - theta[None, :]
+        A = c * np.cos(diff)
+        b = (- np.einsum("ij...,j...->i...", c * np.sin(diff), omega**2)
+             - (self.g * mu * self.L * np.sin(theta).T).T)
+
+        if u.ndim > 1:
+            # One N x N system per state, solved as a stack
+            d_omega = np.linalg.solve(np.moveaxis(A, -1, 0),
+                                      b.T[:, :, None])[:, :, 0].T
+        else:
+            d_omega = np.linalg.solve(A, b)
+        return np.concatenate((omega, d_omega))
+
+    def _kernels(self):
+        """
+        Returns the compiled right hand side from pendulum_kernels, with the
+        parameters of this instance bound, and None for the jacobian.
+
+        Returns None if Numba is not installed, or if a subclass has
+        overridden __call__, then the Python method is used instead.
+        """
+        if (not pk.NUMBA_AVAILABLE
+            or type(self).__call__ is not ChainPendulum.__call__):
+            return None
+        return pk.bind(pk.chain_pendulum_rhs, *self._params()), None
+
+    def _functions(self):
+        """
+        Returns the right hand side and jacobian solve_ivp should use. There
+        is no closed form jacobian, so it is always None.
+        """
+        kernels = self._kernels()
+        if kernels is None:
+            return self.__call__, None
+        return kernels
+
+    def _canonical(self):
+        """
+        Returns the compiled right hand side of Hamilton's equations, and
+        the transforms between the state and the canonical coordinates
+        GL4 integrates, see DoublePendulum _canonical.
+        """
+        p = self._params()
+        return (pk.bind(pk.chain_pendulum_canonical_rhs, *p),
+                lambda y: pk.chain_to_canonical(y, p),
+                lambda y: pk.chain_from_canonical(y, p))
+
+    def _energy(self, u):
+        """
+        Returns the total energy of the states u, used by energy_monitor to
+        check the drift while solving.
+        """
+        N = self.N
+        u = np.asarray(u, dtype=np.float64)
+        theta, omega = u[:N], u[N:]
+        vx = np.cumsum((self.L * (np.cos(theta) * omega).T).T, axis=0)
+        vy = np.cumsum((self.L * (np.sin(theta) * omega).T).T, axis=0)
+        heights = np.cumsum((self.L * (1 - np.cos(theta)).T).T, axis=0)
+        return np.sum((self.M * (self.g * heights
+                                 + 0.5 * (vx**2 + vy**2)).T).T, axis=0)
+
+    def _state(self, i = slice(None)):
+        """
+        Returns the stored solution at the indices i as one array,
+        [theta_1, ..., theta_N, omega_1, ..., omega_N].
+        """
+        self.check_run()
+        return np.concatenate((self._theta[:, i], self._omega[:, i]))
+
+    def _store_state(self, y):
+        """
+        Stores the angles from y[:N] and the angular velocities from
+        y[N:2N], see PendulumModel _store
+        """
+        self._theta = y[:self.N]
+        self._omega = y[self.N:2*self.N]
+
+    def _parameters(self):
+        """
+        Returns a dictionary of the parameters deciding the solution, used
+        in the keys of solution_cache.
+        """
+        return {"N": self.N, "M": self.M.tolist(), "L": self.L.tolist(),
+                "g": self.g, "method": self.method}
+
+    def _check_angles(self, y0, angles):
+        """
+        See PendulumModel _check_angles, raises ValueError if y0 does not
+        hold 2N values.
+        """
+        if np.shape(y0) != (2*self.N,):
+            raise ValueError("y0 has to hold %d values, the angles and "
+                             "angular velocities." %(2*self.N))
+        return PendulumModel._check_angles(self, y0, angles)
+
+    @property
+    def theta(self):
+        "Angular displacement of each pendulum, shape (N, len(t))"
+        self.check_run()
+        return self._theta
+
+    @property
+    def omega(self):
+        "Angular velocity of each pendulum, shape (N, len(t))"
+        self.check_run()
+        return self._omega
+
+    @property
+    def _sin(self):
+        "sin(theta), shared by the positions and velocities"
+        return self._derived("sin", lambda: np.sin(self._theta))
+
+    @property
+    def _cos(self):
+        "cos(theta), shared by the positions and velocities"
+        return self._derived("cos", lambda: np.cos(self._theta))
+
+    @property
+    def x(self):
+        "x-position of each pendulum over time, shape (N, len(t))"
+        return self._derived("x", lambda: np.cumsum(self.L[:, None]
+                                                    * self._sin, axis=0))
+
+    @property
+    def y(self):
+        "y-position of each pendulum over time, shape (N, len(t))"
+        return self._derived("y", lambda: - np.cumsum(self.L[:, None]
+                                                      * self._cos, axis=0))
+
+    @property
+    def vx(self):
+        "Linear velocity of each pendulum in x-direction"
+        return self._derived("vx", lambda: np.cumsum(
+            self.L[:, None] * self._cos * self._omega, axis=0))
+
+    @property
+    def vy(self):
+        "Linear velocity of each pendulum in y-direction"
+        return self._derived("vy", lambda: np.cumsum(
+            self.L[:, None] * self._sin * self._omega, axis=0))
+
+    @property
+    def potential(self):
+        "Potential energy of each pendulum, zero when hanging straight down"
+        return self._derived("potential", lambda: self.M[:, None] * self.g
+                             * (self.y + np.cumsum(self.L)[:, None]))
+
+    @property
+    def kinetic(self):
+        "Kinetic energy of each pendulum"
+        return self._derived("kinetic", lambda: 0.5 * self.M[:, None]
+                             * (self.vx**2 + self.vy**2))
+
+    @property
+    def Potential(self):
+        "Potential energy of system"
+        return self._derived("Potential",
+                             lambda: np.sum(self.potential, axis=0))
+
+    @property
+    def Kinetic(self):
+        "Kinetic energy of system"
+        return self._derived("Kinetic", lambda: np.sum(self.kinetic, axis=0))
+
+
+
+if __name__ == "__main__":
+
+    P_chain = ChainPendulum(N = 5)
+    u0 = np.concatenate((np.full(5, np.pi/2), np.zeros(5)))
+    T = 10
+    dt = 1e-2
+
+    P_chain.solve(u0, T, dt)
+
+    plt.figure(1, figsize=(9,7))
+    plt.plot(P_chain.x[-1], P_chain.y[-1])
+    plt.axis("equal")
+    plt.show()
+
+    plt.figure(2, figsize=(9,7))
+    plt.plot(P_chain.t, P_chain.Kinetic)
+    plt.plot(P_chain.t, P_chain.Potential)
+    plt.plot(P_chain.t, P_chain.Kinetic + P_chain.Potential)
+
+    plt.show()
@@ -1,8 +1,16 @@
+import time
 import scipy.integrate as spi
+import scipy.sparse as sps
 import numpy as np
 import matplotlib.pyplot as plt
-
-class DoublePendulum():
+import pendulum_kernels as pk
+import integrators
+import pendulum_events as pe
+import lyapunov
+import solver_stats
+from pendulum_model import PendulumModel
+
+class DoublePendulum(PendulumModel):
     """
     A class to represent a pair of interconnected pendulums, with completely
     rigid rods. The first pendulum is connected to the origin of our coordinate
@@ -15,28 +23,33 @@ class DoublePendulum():
     The total energy may drop over time, this is because the
     integration methods used in SciPy's solve_ivp are not
     perfect. Try a different integration method for solve_ivp
-    if you experience significant total energy loss.
+    if you experience significant total energy loss, or the
+    symplectic fixed step method "GL4", which keeps the energy
+    error bounded.
 
-    Contains a method to solve an initial value problem for this system.
+    Contains a method to solve an initial value problem for this system,
+    see pendulum_model.py.
     """
 
+    EVENTS = pe.DOUBLE_PENDULUM_EVENTS
+
     def __init__(self, M1 = 1, M2 = 1, L1 = 1, L2 = 1, g = 9.81, method = "Radau"):
         """
         M1, M2: Mass of the first pendulum, mass of the second pendulum
         L1, L2: Length of the first pendulum, length of the second pendulum
         g: gravitational constant
         method: which method SciPy's solve_ivp should utilise
-                to solve the ivp.
+                to solve the ivp, or one of the fixed step methods
+                "RK4" or "GL4" from integrators.py.
 
         self.Solver_Run is a boolean which the check_run method
         uses to check whether the class instance has run the
         solve method.
         """
+        PendulumModel.__init__(self, method)
         self.M1, self.M2 = M1, M2
         self.L1, self.L2 = L1, L2
         self.g = g
-        self.method = method
-        self._Solver_Run = False
 
     def __call__(self, t, u):
         """
@@ -70,54 +83,269 @@ class DoublePendulum():
 
         return (d_theta_1, d_omega_1, d_theta_2, d_omega_2)
 
-    def solve(self, y0, T, dt, angles = "rad"):
+    def jacobian(self, t, u):
+        """
+        Closed form jacobian of the __call__ method, passed on to the
+        implicit solvers so they do not have to estimate it with finite
+        differences.
+
+        Takes in tuple u = (theta_1, omega_1, theta_2, omega_2)
+        Returns array J of shape (4, 4), where J[i, j] is the derivative of
+        the i'th value returned by __call__ with respect to u[j].
+        If the values of u are arrays, J has the shape (4, 4, len(u[0])).
+        """
+
+        com_M = self.M1 + self.M2
+        del_theta = u[2] - u[0]
+        sin_d, cos_d = np.sin(del_theta), np.cos(del_theta)
+        sin_cos = sin_d * cos_d
+        cos_2d = cos_d**2 - sin_d**2
+        sin_1, cos_1 = np.sin(u[0]), np.cos(u[0])
+        sin_2, cos_2 = np.sin(u[2]), np.cos(u[2])
+        w1_sq, w2_sq = u[1]**2, u[3]**2
+
+        num1 = (self.M2 * self.L1 * w1_sq * sin_cos
+                + self.M2 * self.g * sin_2 * cos_d
+                + self.M2 * self.L2 * w2_sq * sin_d
+                - com_M * self.g * sin_1)
+        num2 = (- self.M2 * self.L2 * w2_sq * sin_cos
+                + com_M * self.g * sin_1 * cos_d
+                - com_M * self.L1 * w1_sq * sin_d
+                - com_M * self.g * sin_2)
+        den = com_M - self.M2 * cos_d**2
+        den1 = self.L1 * den
+        den2 = self.L2 * den
+
+        # Derivatives of the numerators with respect to del_theta, and of
+        # log(den) which is shared by both denominators.
+        d_num1 = (self.M2 * self.L1 * w1_sq * cos_2d
+                  - self.M2 * self.g * sin_2 * sin_d
+                  + self.M2 * self.L2 * w2_sq * cos_d)
+        d_num2 = (- self.M2 * self.L2 * w2_sq * cos_2d
+                  - com_M * self.g * sin_1 * sin_d
+                  - com_M * self.L1 * w1_sq * cos_d)
+        d_log_den = 2 * self.M2 * sin_cos / den
+
+        d_omega_1 = num1 / den1
+        d_omega_2 = num2 / den2
+
+        # Using d(num/den) = d(num)/den - (num/den) * d(log(den))
+        dw1_dth1 = ((- d_num1 - com_M * self.g * cos_1) / den1
+                    + d_omega_1 * d_log_den)
+        dw1_dth2 = ((d_num1 + self.M2 * self.g * cos_2 * cos_d) / den1
+                    - d_omega_1 * d_log_den)
+        dw1_dw1 = 2 * self.M2 * self.L1 * u[1] * sin_cos / den1
+        dw1_dw2 = 2 * self.M2 * self.L2 * u[3] * sin_d / den1
+
+        dw2_dth1 = ((- d_num2 + com_M * self.g * cos_1 * cos_d) / den2
+                    + d_omega_2 * d_log_den)
+        dw2_dth2 = ((d_num2 - com_M * self.g * cos_2) / den2
+                    - d_omega_2 * d_log_den)
+        dw2_dw1 = - 2 * com_M * self.L1 * u[1] * sin_d / den2
+        dw2_dw2 = - 2 * self.M2 * self.L2 * u[3] * sin_cos / den2
+
+        zero = np.zeros_like(del_theta)
+        one = np.ones_like(del_theta)
+
+        return np.array([[zero, one, zero, zero],
+                         [dw1_dth1, dw1_dw1, dw1_dth2, dw1_dw2],
+                         [zero, zero, zero, one],
+                         [dw2_dth1, dw2_dw1, dw2_dth2, dw2_dw2]])
+
+    def _kernels(self):
+        """
+        Returns the compiled right hand side and jacobian kernels from
+        pendulum_kernels, with the parameters of this instance bound.
+
+        Returns None if Numba is not installed, or if a subclass has
+        overridden __call__, then the Python methods are used instead.
+        """
+        if (not pk.NUMBA_AVAILABLE
+            or type(self).__call__ is not DoublePendulum.__call__):
+            return None
+        params = (self.M1, self.M2, self.L1, self.L2, self.g)
+        return (pk.bind(pk.double_pendulum_rhs, *params),
+                pk.bind(pk.double_pendulum_jac, *params))
+
+    def _functions(self, ensemble = False):
+        """
+        Returns the right hand side and jacobian solve_ivp should use.
+
+        ensemble: bool, if True the functions take the flattened state of
+                  a whole ensemble, see _ensemble_call, and the jacobian
+                  is returned as a sparse matrix.
+        """
+        kernels = self._kernels()
+        if kernels is not None:
+            rhs, jac_blocks = kernels
+        elif ensemble:
+            rhs = self._ensemble_call
+            jac_blocks = lambda t, u: self.jacobian(t, u.reshape(4, -1))
+        else:
+            return self.__call__, self.jacobian
+
+        if ensemble:
+            return rhs, lambda t, u: self._ensemble_jacobian(jac_blocks(t, u))
+        return rhs, lambda t, u: jac_blocks(t, u)[:, :, 0]
+
+    def _solver_options(self, jac, ensemble = False):
+        """
+        Returns the extra keyword arguments for solve_ivp, the implicit
+        methods are given the analytic jacobian.
+
+        LSODA only takes dense jacobians, which would be of size (4N, 4N)
+        for an ensemble, so it is left to estimate it on its own there.
+        """
+        if self.method in ("Radau", "BDF"):
+            return {"jac": jac}
+        if self.method == "LSODA" and not ensemble:
+            return {"jac": jac}
+        return {}
+
+    def _canonical(self):
+        """
+        Returns the compiled right hand side of Hamilton's equations, and
+        the transforms between the state and the canonical coordinates
+        (theta_1, p_1, theta_2, p_2) GL4 integrates, see pendulum_kernels.
+        """
+        params = (self.M1, self.M2, self.L1, self.L2, self.g)
+        fun = pk.bind(pk.double_pendulum_canonical_rhs, *params)
+        return (fun, lambda y: pk.to_canonical(y, fun.params),
+                lambda y: pk.from_canonical(y, fun.params))
+
+    def _energy(self, u):
+        """
+        Returns the total energy of the states
+        u = (theta_1, omega_1, theta_2, omega_2), used by energy_monitor to
+        check the drift while solving.
+        """
+        cos_1, cos_2 = np.cos(u[0]), np.cos(u[2])
+        vx_2 = self.L1 * cos_1 * u[1] + self.L2 * cos_2 * u[3]
+        vy_2 = self.L1 * np.sin(u[0]) * u[1] + self.L2 * np.sin(u[2]) * u[3]
+        potential = (self.M1 * self.g * self.L1 * (1 - cos_1)
+                     + self.M2 * self.g * (self.L1 * (1 - cos_1)
+                                           + self.L2 * (1 - cos_2)))
+        kinetic = (0.5 * self.M1 * (self.L1 * u[1])**2
+                   + 0.5 * self.M2 * (vx_2**2 + vy_2**2))
+        return potential + kinetic
+
+    def _ensemble_call(self, t, u):
         """
-        Solves an initial value problem for our system of pendulums.
+        Vectorised version of __call__ used by solve_ensemble.
+
+        Takes in the flattened state of the whole ensemble, the values are
+        ordered as u.reshape(4, N) = (theta_1, omega_1, theta_2, omega_2),
+        where each row holds the values of all N pendulums.
+        Returns the flattened derivatives in the same order.
+        """
+        u = u.reshape(4, -1)
+        return np.concatenate(self.__call__(t, u))
+
+    def _ensemble_jacobian(self, J):
+        """
+        Assembles the sparse jacobian of a whole ensemble. Each pendulum only
+        depends on its own four values, so the jacobian is block diagonal.
+
+        J: array of shape (4, 4, N) holding the jacobian of each pendulum.
+        """
+        N = J.shape[2]
+        i, j, k = np.indices((4, 4, N))
+        return sps.csc_matrix((J.ravel(), ((i*N + k).ravel(),
+                                           (j*N + k).ravel())),
+                              shape=(4*N, 4*N))
+
+    def solve_ensemble(self, y0, T, dt, angles = "rad", dtype = np.float64):
+        """
+        Solves an initial value problem for an ensemble of N double pendulums,
+        which all share the masses and lengths of this instance.
+
+        Instead of calling solve N times, all the pendulums are integrated
+        together as one vectorised system, so the overhead of solve_ivp is
+        only paid once. Note that the step size is then shared by the whole
+        ensemble.
 
         input
-        y0: our initial values, use form: [theta_0, omega_0, theta_1, omega_1]
+        y0: array of shape (N, 4) with one set of initial values per row,
+            use form: [theta_1, omega_1, theta_2, omega_2]
         T: total time to solve for
         dt: timestep to use when solving
         angles: string to denote whether the inital values
                 are given in radians or degrees
+        dtype: datatype used to store the results, np.float32 halves the
+               memory used. The integration is always done in float64.
 
         output
-        none, the method does not output any values, but
-        stores the results as local variables of the instance.
+        none, the method does not output any values, but stores the results
+        as local variables of the instance. The theta_1, omega_1, theta_2
+        and omega_2 properties are then arrays of shape (N, len(t)).
         """
+        start = time.perf_counter()
+        y0 = np.asarray(self._check_angles(y0, angles), dtype=np.float64)
+        if y0.ndim != 2 or y0.shape[1] != 4:
+            raise ValueError("y0 has to be an array of shape (N, 4).")
+        N = y0.shape[0]
 
-        if angles == "deg":
-            y0 = np.deg2rad(y0)
-        elif angles == "rad":
-            pass
-        else:
-            raise Exception("Angles have to be in rad or deg.")
+        fun, jac = self._functions(ensemble = True)
 
+        stats = solver_stats.new(self.method)
         t_vals = np.linspace(0, T, int(T/dt)+1)
-        sol = spi.solve_ivp(self.__call__, (0, T), y0, method=self.method,
-                                 t_eval=t_vals)
+        if self.method == "RK4":
+            t, y = integrators.integrate(self.method, fun, y0.T.ravel(), t_vals,
+                                         stats = stats)
+        elif self.method in integrators.FIXED_STEP_METHODS:
+            raise ValueError("Only RK4 of the fixed step methods can be "
+                             "used for ensembles.")
+        else:
+            options = self._solver_options(jac, ensemble = True)
+            sol = spi.solve_ivp(fun, (0, T), y0.T.ravel(),
+                                method=self.method, t_eval=t_vals, **options)
+            solver_stats.add_solution(stats, sol, self.method)
+            t, y = sol.t, sol.y
+        integrated = time.perf_counter()
+
+        y = y.reshape(4, N, -1).astype(dtype, copy=False)
 
-        self._Solver_Run = True
-        self._t = sol.t
-        self._theta_1 = sol.y[0]
-        self._omega_1 = sol.y[1]
-        self._theta_2 = sol.y[2]
-        self._omega_2 = sol.y[3]
+        self._store(t, y)
+        solver_stats.finish(self, stats, start, integrated)
 
-    def check_run(self):
+    def lyapunov(self, y0, T, dt, renorm = 1.0, transient = 0.0,
+                 angles = "rad"):
         """
-        Checks whether the solve method has been run,
-        used by the properties to make sure they raise
-        an exception if the solve method has not been run.
+        Estimates the largest Lyapunov exponent for each row of initial
+        values in y0, by integrating the tangent linear equations with RK4
+        and renormalising every renorm units of time. Nothing is stored in
+        the instance. See lyapunov.py.
+
+        Returns an array of exponents, or a float for a single y0.
         """
-        if self._Solver_Run == False:
-            raise AttributeError("Solver not run")
+        return lyapunov.lyapunov(self, y0, T, dt, renorm, transient, angles)
 
-    @property
-    def t(self):
-        "Time array"
+    def _state(self, i = slice(None)):
+        """
+        Returns the stored solution at the indices i as one array,
+        [theta_1, omega_1, theta_2, omega_2].
+        """
         self.check_run()
-        return self._t
+        return np.array([self._theta_1[i], self._omega_1[i],
+                         self._theta_2[i], self._omega_2[i]])
+
+    def _store_state(self, y):
+        """
+        Stores theta_1, omega_1, theta_2 and omega_2 from y[0:4], see
+        PendulumModel _store
+        """
+        self._theta_1 = y[0]
+        self._omega_1 = y[1]
+        self._theta_2 = y[2]
+        self._omega_2 = y[3]
+
+    def _parameters(self):
+        """
+        Returns a dictionary of the parameters deciding the solution, used
+        in the keys of solution_cache.
+        """
+        return {"M1": self.M1, "M2": self.M2, "L1": self.L1, "L2": self.L2,
+                "g": self.g, "method": self.method}
 
     @property
     def theta_1(self):
@@ -143,77 +371,105 @@ class DoublePendulum():
         self.check_run()
         return self._omega_2
 
+    @property
+    def _sin_1(self):
+        "sin(theta_1), shared by the positions and velocities"
+        return self._derived("sin_1", lambda: np.sin(self._theta_1))
+
+    @property
+    def _cos_1(self):
+        "cos(theta_1), shared by the positions and velocities"
+        return self._derived("cos_1", lambda: np.cos(self._theta_1))
+
+    @property
+    def _sin_2(self):
+        "sin(theta_2), shared by the positions and velocities"
+        return self._derived("sin_2", lambda: np.sin(self._theta_2))
+
+    @property
+    def _cos_2(self):
+        "cos(theta_2), shared by the positions and velocities"
+        return self._derived("cos_2", lambda: np.cos(self._theta_2))
+
     @property
     def x_1(self):
         "First pendulum x-position over time"
-        return self.L1 * np.sin(self._theta_1)
+        return self._derived("x_1", lambda: self.L1 * self._sin_1)
 
     @property
     def y_1(self):
         "First pendulum y-position over time"
-        return - self.L1 * np.cos(self._theta_1)
+        return self._derived("y_1", lambda: - self.L1 * self._cos_1)
 
     @property
     def x_2(self):
         "Second pendulum x-position over time"
-        return self.x_1 + self.L2 * np.sin(self._theta_2)
+        return self._derived("x_2", lambda: self.x_1 + self.L2 * self._sin_2)
 
     @property
     def y_2(self):
         "Second pendulum y-position over time"
-        return self.y_1 - self.L2 * np.cos(self._theta_2)
+        return self._derived("y_2", lambda: self.y_1 - self.L2 * self._cos_2)
 
     @property
     def vx_1(self):
         "First pendulum linear velocity in x-direction"
-        return np.gradient(self.x_1, self._t)
+        return self._derived("vx_1",
+                             lambda: self.L1 * self._cos_1 * self._omega_1)
 
     @property
     def vy_1(self):
         "First pendulum linear velocity in y-direction"
-        return np.gradient(self.y_1, self._t)
+        return self._derived("vy_1",
+                             lambda: self.L1 * self._sin_1 * self._omega_1)
 
     @property
     def vx_2(self):
         "Second pendulum linear velocity in x-direction"
-        return np.gradient(self.x_2, self._t)
+        return self._derived("vx_2", lambda: self.vx_1
+                             + self.L2 * self._cos_2 * self._omega_2)
 
     @property
     def vy_2(self):
         "Second pendulum linear velocity in y-direction"
-        return np.gradient(self.y_2, self._t)
+        return self._derived("vy_2", lambda: self.vy_1
+                             + self.L2 * self._sin_2 * self._omega_2)
 
     @property
     def Potential_1(self):
         "Potential energy of first pendulum"
-        return self.M1 * self.g * (self.y_1 + self.L1)
+        return self._derived("Potential_1",
+                             lambda: self.M1 * self.g * (self.y_1 + self.L1))
 
     @property
     def Potential_2(self):
         "Potential energy of second pendulum"
-        return self.M2 * self.g * (self.y_2 + self.L1 + self.L2)
+        return self._derived("Potential_2", lambda: self.M2 * self.g
+                             * (self.y_2 + self.L1 + self.L2))
 
     @property
     def Potential(self):
         "Potential energy of system"
-        return self.Potential_1 + self.Potential_2
+        return self._derived("Potential",
+                             lambda: self.Potential_1 + self.Potential_2)
 
     @property
     def Kinetic_1(self):
         "Kinetic energy of first pendulum"
-        v1_sq = self.vx_1**2 + self.vy_1**2
-        return 0.5 * self.M1 * v1_sq
+        return self._derived("Kinetic_1", lambda: 0.5 * self.M1
+                             * (self.L1 * self._omega_1)**2)
 
     @property
     def Kinetic_2(self):
         "Kinetic energy of second pendulum"
-        v2_sq = self.vx_2**2 + self.vy_2**2
-        return 0.5 * self.M2 * v2_sq
+        return self._derived("Kinetic_2", lambda: 0.5 * self.M2
+                             * (self.vx_2**2 + self.vy_2**2))
 
     @property
     def Kinetic(self):
         "Kinetic energy of system"
-        return self.Kinetic_1 + self.Kinetic_2
+        return self._derived("Kinetic",
+                             lambda: self.Kinetic_1 + self.Kinetic_2)
 
 
 
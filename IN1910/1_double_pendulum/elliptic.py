@@ -0,0 +1,89 @@
+"""
+The exact solution of the undampened pendulum, used by Pendulum when its
+method is "Elliptic".
+
+With omega_0 = sqrt(g/L), a pendulum which swings back and forth has the
+solution
+
+    sin(theta/2) = k sn(omega_0 (t + t_0), k**2)
+    omega = 2 k omega_0 cn(omega_0 (t + t_0), k**2)
+
+where sn and cn are Jacobi elliptic functions, and the modulus k is fixed
+by the energy, k**2 = sin(theta/2)**2 + (omega/(2 omega_0))**2. The period
+is 4 K(k**2) / omega_0, K being the complete elliptic integral of the first
+kind. Every value is computed directly from t, so the cost does not depend
+on how long the pendulum is followed, and any number of amplitudes and
+times can be evaluated as one array operation.
+
+The formulas hold for angles in [-pi, pi], other initial angles are wrapped
+into that range and the whole turns added back onto theta(t).
+
+The formulas only hold for k < 1. A pendulum with k >= 1 goes over the top
+instead, and has to be integrated numerically.
+"""
+
+import numpy as np
+import scipy.special as sps
+
+
+def modulus(theta, omega, g, L):
+    """
+    Returns the elliptic modulus k of a pendulum with angle theta and
+    angular velocity omega, k < 1 if it swings back and forth.
+    """
+    omega_0 = np.sqrt(g/L)
+    return np.sqrt(np.sin(theta/2)**2 + (omega/(2*omega_0))**2)
+
+
+def librating(theta, omega, g, L):
+    """
+    Returns True where the pendulum swings back and forth rather than going
+    over the top, that is where the exact solution can be used.
+    """
+    return modulus(theta, omega, g, L) < 1
+
+
+def solution(theta, omega, t, g, L):
+    """
+    Returns the exact (theta(t), omega(t)) of pendulums starting from theta
+    and omega at t = 0.
+
+    theta and omega may be arrays of N initial values, the results then
+    have shape (N,) + np.shape(t). Raises ValueError if any of the
+    pendulums goes over the top.
+    """
+    theta, omega = np.asarray(theta, float), np.asarray(omega, float)
+    t = np.asarray(t, float)
+    if not np.all(librating(theta, omega, g, L)):
+        raise ValueError("The exact solution only holds for a pendulum "
+                         "swinging back and forth.")
+
+    # sin(theta/2) has period 4 pi, so the angle is wrapped into
+    # [-pi, pi] first, and the whole turns are added back at the end
+    turns = 2*np.pi * np.round(theta / (2*np.pi))
+    theta = theta - turns
+
+    omega_0 = np.sqrt(g/L)
+    k = modulus(theta, omega, g, L)
+    # The pendulum at rest, k = 0, is kept finite and stays at rest
+    k_safe = np.where(k > 0, k, 1.0)
+    phi = np.arctan2(np.sin(theta/2) / k_safe, omega / (2*omega_0*k_safe))
+    u_0 = sps.ellipkinc(phi, k**2)
+
+    # Broadcast the initial values over the time axes
+    shape = np.shape(theta) + (1,)*t.ndim
+    k, u_0 = k.reshape(shape), u_0.reshape(shape)
+    turns = turns.reshape(shape)
+
+    sn, cn, _, _ = sps.ellipj(omega_0*t + u_0, k**2)
+    return turns + 2*np.arcsin(k*sn), 2*k*omega_0*cn
+
+
+def period(theta, omega, g, L):
+    """
+    Returns the exact period of pendulums starting from theta and omega,
+    nan for those going over the top.
+    """
+    k = modulus(np.asarray(theta, float), np.asarray(omega, float), g, L)
+    m = np.where(k < 1, k**2, np.nan)
+    return 4 * sps.ellipk(m) / np.sqrt(g/L)
@@ -0,0 +1,180 @@
+"""
+Checks the drift of the total energy while Pendulum and DoublePendulum
+solve, used by their solve methods when they are given an energy_tol.
+
+Without dampening the total energy stays at its starting value, so the
+largest |E(t) - E(0)| measures how much the solver has gone wrong. For the
+solve_ivp methods the drift is watched by a terminal event, which is zero
+where the drift reaches the tolerance, so the integration stops at the
+step where it happens instead of finishing a run which will be thrown
+away. The fixed step methods are integrated in windows of WINDOW steps,
+and stop after the first window where the drift is too large.
+
+A run which drifts too far either raises EnergyDriftError, or is solved
+again from the start with the next settings of ESCALATION, the explicit
+eighth order method DOP853 with tighter and tighter tolerances.
+
+A solution loaded from a SolutionCache is checked as a whole with check.
+Only solutions from the method of the model are cached, never escalated
+ones, so the cache key always names the method which made the solution.
+"""
+
+import numpy as np
+import scipy.integrate as spi
+import integrators
+import solver_stats
+
+
+ESCALATION = ({"method": "DOP853", "rtol": 1e-8, "atol": 1e-10},
+              {"method": "DOP853", "rtol": 1e-11, "atol": 1e-13})
+
+WINDOW = 1000
+
+
+class EnergyDriftError(ValueError):
+    """
+    Raised when the total energy drifts further than the tolerance.
+
+    method: the method, with its rtol and atol if they were set
+    t: the time the drift first went past the tolerance
+    drift: |E(t) - E(0)| at that time
+    tol: the tolerance
+    """
+
+    def __init__(self, method, t, drift, tol):
+        self.method = method
+        self.t = t
+        self.drift = drift
+        self.tol = tol
+        ValueError.__init__(self, "Total energy drifted by %.3g at t = %.4g "
+                            "with %s, more than the tolerance %.3g."
+                            %(drift, t, method, tol))
+
+
+def _drift_event(energy, E0, tol):
+    "Terminal event where the drift |energy(u) - E0| grows past tol"
+    def event(t, u):
+        return tol - abs(energy(u) - E0)
+    event.terminal = True
+    event.direction = -1
+    return event
+
+
+def check(model, t, y, E0, tol, method):
+    """
+    Raises EnergyDriftError if the total energy of the states y at the times
+    t drifts further than tol from E0, naming method as the cause.
+    """
+    drift = np.abs(model._energy(y) - E0)
+    if np.any(drift > tol):
+        i = np.argmax(drift > tol)
+        raise EnergyDriftError(method, t[i], drift[i], tol)
+
+
+def integrate(model, y0, t_vals, tol, method = None, rtol = None,
+              atol = None, stats = None):
+    """
+    Integrates like the _integrate method of model, but raises
+    EnergyDriftError as soon as the total energy has drifted further than
+    tol from its starting value.
+
+    method: the method to use, defaults to the method of the model
+    rtol, atol: tolerances for the solve_ivp methods, the solve_ivp
+                defaults are used if they are None
+    stats: optional dictionary of solve statistics the counts of the
+           solver are added to, see solver_stats.py
+
+    Returns the time array, the solution at t_vals and the dense output,
+    as _integrate.
+    """
+    method = method or model.method
+    y0 = np.asarray(y0, dtype=np.float64)
+    E0 = model._energy(y0)
+
+    if method == "Elliptic":
+        if model._exact_possible(*y0):
+            if stats is not None:
+                solver_stats.add_exact(stats)
+            return model._exact(y0, t_vals)
+        method = "RK45"
+
+    if method in integrators.FIXED_STEP_METHODS:
+        return _integrate_windows(model, y0, t_vals, E0, tol, stats)
+
+    if len(t_vals) == 1:
+        # Only the initial values, see PendulumModel _solve_ivp
+        return t_vals, y0[:, None], None
+
+    fun, jac = model._functions()
+    options = model._solver_options(jac) if method == model.method else {}
+    name = method
+    if rtol is not None:
+        options["rtol"] = rtol
+        name += " rtol=%g" %(rtol)
+    if atol is not None:
+        options["atol"] = atol
+        name += " atol=%g" %(atol)
+
+    sol = spi.solve_ivp(fun, (t_vals[0], t_vals[-1]), y0, method=method,
+                        t_eval=t_vals, dense_output=True,
+                        events=_drift_event(model._energy, E0, tol),
+                        **options)
+    if stats is None and not sol.success:
+        raise ValueError(sol.message)
+    if stats is not None:
+        solver_stats.add_solution(stats, sol, method)
+    if sol.status == 1:
+        drift = abs(model._energy(sol.y_events[0][0]) - E0)
+        raise EnergyDriftError(name, sol.t_events[0][0], drift, tol)
+    return sol.t, sol.y, sol.sol
+
+
+def _integrate_windows(model, y0, t_vals, E0, tol, stats):
+    """
+    Integrates with a fixed step method WINDOW steps at a time, checking the
+    drift at every stored value of a window before going on.
+    """
+    t_parts, y_parts = [t_vals[:1]], [y0[:, None]]
+    for start in range(0, len(t_vals) - 1, WINDOW):
+        t_window = t_vals[start:start + WINDOW + 1]
+        t, y, _ = model._integrate(y_parts[-1][:, -1], t_window, stats)
+        check(model, t, y, E0, tol, model.method)
+        t_parts.append(t[1:])
+        y_parts.append(y[:, 1:])
+        if len(t) < len(t_window):
+            # GL4 failed within the window, see integrators.integrate
+            break
+    return np.concatenate(t_parts), np.concatenate(y_parts, axis=1), None
+
+
+def solve(model, y0, t_vals, tol, on_drift = "raise", stats = None,
+          errors = None):
+    """
+    Integrates with integrate, and when the drift grows past tol either
+    raises EnergyDriftError, or with on_drift "escalate" tries the
+    settings of ESCALATION in turn until one keeps within tol. The counts
+    of every attempt are added to stats.
+
+    errors: optional list of EnergyDriftError the method of model has
+            already given, for a solution from the cache which drifted.
+            The method is then not tried again, only the settings of
+            ESCALATION are.
+
+    Returns the result of the first integration keeping within tol, and a
+    list of the EnergyDriftError of every attempt before it. Raises the
+    last EnergyDriftError if none of them do.
+    """
+    if on_drift not in ("raise", "escalate"):
+        raise ValueError("on_drift has to be raise or escalate.")
+
+    errors = list(errors or [])
+    attempts = ESCALATION if errors else ({},) + ESCALATION
+    for options in attempts:
+        try:
+            return (integrate(model, y0, t_vals, tol, stats = stats,
+                              **options), errors)
+        except EnergyDriftError as error:
+            if on_drift == "raise":
+                raise
+            errors.append(error)
+    raise errors[-1]
@@ -1,18 +1,22 @@
 import scipy.integrate as spi
 import numpy as np
 import matplotlib.pyplot as plt
+import pendulum_kernels as pk
 
 
 class ExponentialDecay():
     """
     A simple class to model exponential decay.
+
+    The decay factor may also be an array of many factors, the values then
+    decay together as one vectorised system.
     """
 
     def __init__(self,a):
         """
-        a is the factor by which the value decays
+        a is the factor by which the value decays, or an array of factors
         """
-        self.a = a
+        self.a = np.asarray(a, dtype=np.float64)
 
     def __call__(self, t, u):
         """
@@ -23,24 +27,48 @@ class ExponentialDecay():
         """
         return (-self.a * u)
 
-    def solve(self, u0, T, dt):
+    def solve(self, u0, T, dt, mode = "numeric"):
         """
         Solves an exponential decay problem with initial
         values u0, over time T, with timestep dt.
 
-        u0: singular start value
+        u0: singular start value, or an array of start values, one for
+            each decay factor in a
         T: total time to run
         dt: timestep
+        mode: "numeric" to integrate with SciPy's solve_ivp, all the
+              values together as one system, or "analytic" to evaluate
+              u0*exp(-a*t) directly
 
         returns
-        sol.t: an array of time values from 0 to T, with step dt
-        sol.y[0]: the solved system values
+        t: an array of time values from 0 to T, with step dt
+        u: the solved system values, an array of shape (N, len(t)) when
+           a or u0 holds N values, or of shape (len(t),) for a single one
         """
+        a = np.atleast_1d(self.a)
+        u0 = np.ravel(np.asarray(u0, dtype=np.float64))
+        single = np.ndim(self.a) == 0 and len(u0) == 1
+        a, u0 = np.broadcast_arrays(a, u0)
+
         t_vals = np.linspace(0,T,int(T/dt)+1)
-        sol = spi.solve_ivp(self.__call__, [0,T], u0, method='RK45',
+
+        if mode == "analytic":
+            u = u0[:, None] * np.exp(-a[:, None] * t_vals)
+            return t_vals, u[0] if single else u
+        elif mode != "numeric":
+            raise ValueError("mode has to be numeric or analytic.")
+
+        if (pk.NUMBA_AVAILABLE
+            and type(self).__call__ is ExponentialDecay.__call__):
+            fun = pk.bind(pk.exp_decay_rhs, *a)
+        else:
+            fun = self.__call__
+
+        # The step size is shared, so it is set by the largest factor
+        sol = spi.solve_ivp(fun, [0,T], u0, method='RK45',
                             t_eval=t_vals)
 
-        return sol.t, sol.y[0]
+        return sol.t, sol.y[0] if single else sol.y
 
 
 
@@ -59,9 +87,9 @@ if __name__ == "__main__":
     plt.xlabel("Time")
     plt.ylabel("Value")
 
+    ED = ExponentialDecay(a_vals)
+    t, u = ED.solve(u0,T,dt)
     for i in range(len(a_vals)):
-        ED = ExponentialDecay(a_vals[i])
-        t, u = ED.solve(u0,T,dt)
-        plt.plot(t, u, lw=0.5, c = col[i], ls="--")
+        plt.plot(t, u[i], lw=0.5, c = col[i], ls="--")
 
     plt.show()
@@ -0,0 +1,143 @@
+import numpy as np
+import matplotlib.pyplot as plt
+import multiprocessing as mp
+import integrators
+from double_pendulum import DoublePendulum
+
+
+class FlipMap():
+    """
+    A class to draw the "time to flip" map of the double pendulum.
+
+    Every pixel is a pair of initial angles (theta_1, theta_2), starting at
+    rest, coloured by how long it takes before either arm flips over the
+    top, |theta| > pi. The whole grid is integrated together with fixed
+    step RK4, instead of one DoublePendulum.solve per pixel, and a pixel is
+    retired as soon as it flips, so the work only grows with the pixels
+    that keep from flipping.
+
+    The grid is split into tiles of rows which are spread over a pool of
+    processes. The pixels of a tile are stepped together as one ensemble,
+    with the compiled right hand side kernel if Numba is installed,
+    otherwise with vectorised NumPy code.
+    """
+
+    def __init__(self, M1 = 1, M2 = 1, L1 = 1, L2 = 1, g = 9.81,
+                 n = 500, theta_lim = (-np.pi, np.pi)):
+        """
+        M1, M2, L1, L2, g: see DoublePendulum
+        n: number of pixels along each axis
+        theta_lim: tuple (min, max) of the initial angles along both axes
+        """
+        self.params = np.array([M1, M2, L1, L2, g], dtype=np.float64)
+        self.n = n
+        self.theta_lim = theta_lim
+        self.theta = np.linspace(theta_lim[0], theta_lim[1], n)
+
+    def compute(self, T = 10, dt = 0.01, tile = 16, processes = None):
+        """
+        Integrates every pixel for up to time T, and stores the flip times
+        as the (n, n) array self.image. Row i holds theta_2 = theta[i] and
+        column j holds theta_1 = theta[j]. Pixels which do not flip within
+        T are nan.
+
+        T: the longest time to integrate each pixel for
+        dt: timestep of the RK4 method
+        tile: number of rows in each tile
+        processes: number of worker processes, defaults to the number of
+                   cores, 1 runs every tile in this process.
+        """
+        n_steps = int(T/dt)
+        h = T/n_steps
+        tiles = [(self.theta, self.theta[i:i+tile], self.params, h, n_steps)
+                 for i in range(0, self.n, tile)]
+
+        if processes == 1:
+            rows = [_run_tile(args) for args in tiles]
+        else:
+            pool = mp.Pool(processes = processes)
+            rows = pool.map(_run_tile, tiles)
+            pool.close()
+            pool.join()
+
+        self.T = T
+        self.image = np.concatenate(rows)
+
+    def plot(self, cmap = "magma_r"):
+        """
+        Plots the flip times with a logarithmic colour scale, pixels which
+        never flipped are left white.
+        """
+        plt.figure(figsize=(8,7))
+        lim = (self.theta_lim[0], self.theta_lim[1],
+               self.theta_lim[0], self.theta_lim[1])
+        plt.imshow(np.log10(self.image), origin="lower", extent=lim,
+                   cmap=cmap)
+        plt.colorbar(label=r"$\log_{10}$(time to flip)")
+        plt.xlabel(r"$\theta_1$")
+        plt.ylabel(r"$\theta_2$")
+        plt.tight_layout()
+
+    def savepng(self, filename, dpi = 300):
+        """
+        Runs the plot method and saves the figure as filename.png
+        """
+        self.plot()
+        plt.savefig("%s.png" %(filename), dpi=dpi)
+        plt.close()
+
+
+def flip_times(theta_1, theta_2, p, h, n_steps):
+    """
+    Returns the flip times of the tile of initial angles theta_1 (columns)
+    and theta_2 (rows), see flip_times_paired.
+    """
+    th2, th1 = np.meshgrid(theta_2, theta_1, indexing="ij")
+    out = flip_times_paired(th1.ravel(), th2.ravel(), p, h, n_steps)
+    return out.reshape(len(theta_2), len(theta_1))
+
+
+def flip_times_paired(theta_1, theta_2, p, h, n_steps):
+    """
+    Returns the flip times of the pendulums started at rest from the pairs
+    of initial angles (theta_1[k], theta_2[k]). All of them are stepped
+    together as one ensemble with the RK4 step of integrators.py and the
+    right hand side DoublePendulum uses for solve_ensemble, and the
+    pendulums which have flipped are dropped from the state.
+    """
+    theta_1 = np.asarray(theta_1, dtype=np.float64)
+    out = np.full(theta_1.shape, np.nan)
+    index = np.arange(theta_1.size)
+    u = np.zeros((4, theta_1.size))
+    u[0], u[2] = theta_1, theta_2
+
+    fun, _ = DoublePendulum(*p)._functions(ensemble = True)
+    rhs = lambda t, u, p: np.asarray(fun(t, u), dtype=np.float64)
+
+    for k in range(n_steps):
+        if len(index) == 0:
+            break
+        u = integrators.rk4_step(rhs, p, k * h, h, u.ravel()).reshape(4, -1)
+        flipped = (np.abs(u[0]) > np.pi) | (np.abs(u[2]) > np.pi)
+        if np.any(flipped):
+            out[index[flipped]] = (k+1) * h
+            keep = ~flipped
+            index, u = index[keep], u[:, keep]
+
+    return out
+
+
+def _run_tile(args):
+    """
+    Computes the flip times of one tile, args = (theta_1, theta_2, p, h,
+    n_steps). Module level so it can be sent to the worker processes.
+    """
+    return flip_times(*args)
+
+
+if __name__ == "__main__":
+
+    FM = FlipMap(n = 400)
+    FM.compute(T = 20)
+    FM.plot()
+    plt.show()
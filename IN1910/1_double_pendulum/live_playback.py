@@ -0,0 +1,160 @@
+"""
+Live playback for AnimateDoublePendulum and AnimateChainPendulum, used by
+their live_animation method. The animation starts as soon as the first
+frames are solved, instead of after the whole solve.
+
+A background thread solves the problem in short windows with
+solve_chunks, see streaming.py, turns every state into the positions of
+the pendulums and puts them on a bounded queue, one frame at a time. When
+the queue is full the thread waits, so it never gets more than queue_size
+frames ahead of the playback.
+
+The playback follows the wall clock. Frame i is due i/fps seconds after
+the first frame was shown. Each time the animation asks for a frame, every
+frame which is due is taken from the queue, and only the latest is shown.
+If the solver falls behind, the frames it delivers late are skipped rather
+than shown late, so the playback never stalls. The positions of every
+frame taken from the queue are kept, so the traces stay complete.
+"""
+
+import queue
+import threading
+import time
+import numpy as np
+
+
+class LivePlayback():
+    """
+    Solves model in a background thread and hands out the frames to show,
+    in step with the wall clock.
+
+    After start, next_index returns the index of the frame to show, and
+    the positions of the frames taken so far are found in x and y, arrays
+    of shape (number of pendulums, n_frames), with their times in t.
+    """
+
+    def __init__(self, model, y0, T, angles = "rad", vid_speed = 1,
+                 window = None, queue_size = None):
+        """
+        model: an AnimateDoublePendulum or AnimateChainPendulum instance,
+               its fps is the frame rate of the playback
+        y0, T, angles: the initial value problem, see the solve method of
+                       the model
+        vid_speed: simulated time shown per second of playback
+        window: length of the time windows solved at a time, defaults to
+                ten frames so the first frames are ready quickly
+        queue_size: the most frames the solver may be ahead, defaults to
+                    two seconds of playback
+        """
+        self.model = model
+        self.fps = model.fps
+        self.dt = vid_speed / self.fps
+        self.n_frames = int(T/self.dt) + 1
+        self.window = 10*self.dt if window is None else window
+        self._problem = (y0, T, angles)
+
+        y0_rad = np.asarray(model._check_angles(y0, angles), dtype=np.float64)
+        n_bobs = len(model._positions(y0_rad)[0])
+        self.t = np.full(self.n_frames, np.nan)
+        self.x = np.full((n_bobs, self.n_frames), np.nan)
+        self.y = np.full((n_bobs, self.n_frames), np.nan)
+
+        self.frames = queue.Queue(maxsize = queue_size or 2*self.fps)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target = self._produce, daemon = True)
+        self._start = None
+        self._received = 0
+        self._last = -1
+        self.done = False
+        self.shown = 0
+        self.dropped = 0
+
+    def _produce(self):
+        """
+        Run by the background thread, solves window by window and puts the
+        frames (i, t, x, y) on the queue, and None when it is finished.
+        """
+        y0, T, angles = self._problem
+        i = 0
+        try:
+            for t, y in self.model.solve_chunks(y0, T, self.dt, self.window,
+                                                angles):
+                x_bobs, y_bobs = self.model._positions(y)
+                for k in range(len(t)):
+                    if not self._put((i, t[k], x_bobs[:, k], y_bobs[:, k])):
+                        return
+                    i += 1
+        finally:
+            self._put(None)
+
+    def _put(self, item):
+        """
+        Puts item on the queue, waiting while it is full. Returns False if
+        the playback was stopped while waiting.
+        """
+        while not self._stop.is_set():
+            try:
+                self.frames.put(item, timeout = 0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def start(self):
+        "Starts solving in the background thread"
+        self._thread.start()
+
+    def stop(self):
+        "Stops the background thread, and waits for it to finish"
+        self._stop.set()
+        self._thread.join()
+
+    def _take(self):
+        """
+        Takes the next frame from the queue without waiting, and records
+        it. Returns False if no frame was ready.
+        """
+        try:
+            item = self.frames.get_nowait()
+        except queue.Empty:
+            return False
+        if item is None:
+            self.done = True
+            return False
+        i, t, x, y = item
+        self.t[i], self.x[:, i], self.y[:, i] = t, x, y
+        self._received += 1
+        return True
+
+    def next_index(self, now = None):
+        """
+        Returns the index of the frame to show at the wall clock time now,
+        from time.perf_counter by default, or None if there is no new
+        frame to show yet.
+
+        The clock starts when the first frame is shown. Every frame due by
+        now is taken from the queue, and those before the latest are
+        counted as dropped.
+        """
+        now = time.perf_counter() if now is None else now
+        if self._start is None:
+            if not self._take():
+                return None
+            self._start = now
+        else:
+            due = int((now - self._start) * self.fps)
+            while self._received <= due and self._take():
+                pass
+
+        latest = self._received - 1
+        if latest == self._last:
+            return None
+        self.dropped += latest - self._last - 1
+        self.shown += 1
+        self._last = latest
+        return latest
+
+    @property
+    def finished(self):
+        "True when the last frame has been shown"
+        return self.done and self._last == self._received - 1
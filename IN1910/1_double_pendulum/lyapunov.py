@@ -0,0 +1,102 @@
+"""
+Estimates the largest Lyapunov exponent of a batch of double pendulums.
+
+Instead of solving two nearby trajectories and comparing them afterwards,
+every pendulum carries a tangent vector which is integrated with the
+tangent linear equations, d(delta)/dt = J(u) delta, alongside its state.
+The tangent vectors are renormalised to unit length at a fixed interval,
+and the exponent is the average growth rate of their lengths,
+
+    lambda = 1/T * sum(log(|delta| at each renormalisation)).
+
+The integration runs with RK4 one renormalisation interval at a time, so
+only one interval of the solution is held in memory however long T is,
+and only the exponents are returned. Used by DoublePendulum.lyapunov.
+"""
+
+import numpy as np
+import pendulum_kernels as pk
+import integrators
+
+
+def tangent_function(model):
+    """
+    Returns the right hand side of the states and tangent vectors of an
+    ensemble of model, see pendulum_kernels.double_pendulum_tangent_rhs for
+    the layout. Uses the compiled kernel when model can, otherwise the
+    __call__ and jacobian methods of model.
+    """
+    kernels = model._kernels()
+    if kernels is not None:
+        return pk.bind(pk.double_pendulum_tangent_rhs, *kernels[0].params)
+
+    def f(t, u):
+        n = len(u) // 2
+        state = u[:n].reshape(4, -1)
+        d = u[n:].reshape(4, -1)
+        J = model.jacobian(t, state)
+        return np.concatenate((np.concatenate(model(t, state)),
+                               np.einsum("ijk,jk->ik", J, d).ravel()))
+
+    return f
+
+
+def lyapunov(model, y0, T, dt, renorm = 1.0, transient = 0.0,
+             angles = "rad"):
+    """
+    Estimates the largest Lyapunov exponent of model for every row of y0.
+
+    input
+    model: a DoublePendulum instance
+    y0: array of shape (N, 4), or a single set of initial values
+    T: total time to integrate for
+    dt: timestep of the RK4 method
+    renorm: time between each renormalisation of the tangent vectors
+    transient: the growth before this time is left out of the estimate,
+               so the tangent vectors can first align with the most
+               unstable direction
+    angles: string to denote whether the inital values are given in
+            radians or degrees
+
+    output
+    array of N exponents, in units of 1/time, or a float for a single set
+    of initial values
+    """
+    y0 = np.asarray(model._check_angles(y0, angles), dtype=np.float64)
+    single = y0.ndim == 1
+    y0 = np.atleast_2d(y0)
+    if y0.ndim != 2 or y0.shape[1] != 4:
+        raise ValueError("y0 has to be an array of shape (N, 4).")
+    if transient >= T:
+        raise ValueError("transient has to be shorter than T.")
+
+    N = y0.shape[0]
+    fun = tangent_function(model)
+
+    n = int(T/dt)
+    h = T/n
+    steps = max(1, int(round(renorm/h)))
+
+    u = np.empty(8*N)
+    u[:4*N] = y0.T.ravel()
+    u[4*N:] = 0.5
+
+    log_sum = np.zeros(N)
+    time = 0.0
+    start = 0
+    while start < n:
+        m = min(steps, n - start)
+        t_vals = (start + np.arange(m + 1)) * h
+        _, y = integrators.integrate("RK4", fun, u, t_vals)
+        u = y[:, -1].copy()
+
+        d = u[4*N:].reshape(4, N)
+        norm = np.sqrt(np.sum(d**2, axis=0))
+        if start * h >= transient:
+            log_sum += np.log(norm)
+            time += m * h
+        d /= norm
+        start += m
+
+    exponents = log_sum / time
+    return exponents[0] if single else exponents
@@ -0,0 +1,144 @@
+"""
+Renders the frames of an AnimateDoublePendulum animation in parallel, used
+by save_animation when it is given more than one process.
+
+Drawing the frames with matplotlib at a high dpi takes far longer than
+solving, and FuncAnimation only uses one core. Here the frame range is
+split into segments, and each segment is drawn by a worker process with
+the headless Agg backend. Every worker rebuilds the animation from the
+full solution and saves the frames of its segment through the same
+figure.savefig call as a serial save, writing them as numbered lossless
+png files.
+When all segments are done, ffmpeg encodes the numbered frames in order,
+with the same output arguments as the serial ffmpeg writer, so the video
+holds exactly the frames a serial render would.
+"""
+
+import multiprocessing as mp
+import os
+import subprocess
+import tempfile
+import matplotlib.pyplot as plt
+from matplotlib import animation
+
+
+FRAME_NAME = "frame_%07d.png"
+
+
+def segments(n_frames, n_segments):
+    """
+    Splits range(n_frames) into at most n_segments (start, stop) pairs of
+    nearly the same length, in order.
+    """
+    n_segments = max(1, min(n_segments, n_frames))
+    bounds = [round(k * n_frames / n_segments) for k in range(n_segments + 1)]
+    return [(bounds[k], bounds[k+1]) for k in range(n_segments)]
+
+
+class _FrameWriter(animation.AbstractMovieWriter):
+    """
+    A movie writer saving each frame it is given as the png file
+    FRAME_NAME in folder, numbered from start, instead of encoding them.
+    The frames are drawn by figure.savefig at dpi, as the serial ffmpeg
+    writer draws them before piping them to ffmpeg.
+    """
+
+    def __init__(self, folder, start, fps):
+        animation.AbstractMovieWriter.__init__(self, fps = fps)
+        self.folder = folder
+        self.index = start
+
+    def setup(self, fig, outfile, dpi = None):
+        animation.AbstractMovieWriter.setup(self, fig, outfile, dpi)
+
+    def grab_frame(self, **savefig_kwargs):
+        name = os.path.join(self.folder, FRAME_NAME % self.index)
+        self.fig.savefig(name, format = "png", dpi = self.dpi,
+                         **savefig_kwargs)
+        self.index += 1
+
+    def finish(self):
+        pass
+
+
+_worker = {}
+
+
+def _init_worker(cls, parameters, settings, t, y):
+    """
+    Run once in every worker process, switches to the headless backend and
+    rebuilds the animation from the solution.
+    """
+    plt.switch_backend("Agg")
+    model = cls(**parameters, **settings)
+    model._store(t, y)
+    _worker["model"] = model
+
+
+def _render_segment(task):
+    """
+    Draws the frames start to stop into folder, in a worker process.
+    """
+    start, stop, folder, dpi, duration = task
+    model = _worker["model"]
+    model.create_animation(frames = range(start, stop), blit = False,
+                           duration = duration)
+    writer = _FrameWriter(folder, start, model.fps)
+    model.anim.save(os.path.join(folder, "segment.mp4"), writer = writer,
+                    dpi = dpi)
+    plt.close(model.fig)
+    return stop - start
+
+
+def render_frames(model, folder, dpi, processes = None, n_segments = None,
+                  duration = None):
+    """
+    Draws every frame of the animation of model as numbered png files in
+    folder, over a pool of processes. Returns the number of frames.
+
+    n_segments: number of segments the frames are split into, defaults to
+                four per process so the workers finish at about the same
+                time.
+    duration: length of the animation in seconds, see create_animation
+    """
+    model.check_run()
+    processes = processes or mp.cpu_count()
+    n_segments = n_segments or 4 * processes
+    n_frames = len(model._frame_indices(duration))
+    tasks = [(start, stop, folder, dpi, duration) for start, stop
+             in segments(n_frames, n_segments)]
+
+    pool = mp.Pool(processes = processes, initializer = _init_worker,
+                   initargs = (type(model), model._parameters(),
+                               model._settings(), model.t, model._state()))
+    try:
+        n_frames = sum(pool.map(_render_segment, tasks))
+    finally:
+        pool.close()
+        pool.join()
+    return n_frames
+
+
+def encode(folder, n_frames, outfile, fps):
+    """
+    Encodes the numbered frames in folder into outfile with ffmpeg, using
+    the same output arguments as matplotlib's ffmpeg writers.
+    """
+    writer = animation.FFMpegFileWriter(fps = fps)
+    writer.outfile = outfile
+    args = [writer.bin_path(), "-framerate", str(fps),
+            "-i", os.path.join(folder, FRAME_NAME),
+            "-frames:v", str(n_frames), "-loglevel", "error"]
+    subprocess.run(args + writer.output_args, check = True)
+
+
+def save_animation(model, filename, dpi, processes = None, n_segments = None,
+                   duration = None):
+    """
+    Renders the animation of model in parallel and saves it as
+    filename.mp4, see render_frames and encode.
+    """
+    with tempfile.TemporaryDirectory() as folder:
+        n_frames = render_frames(model, folder, dpi, processes, n_segments,
+                                 duration)
+        encode(folder, n_frames, "%s.mp4" %(filename), model.fps)
@@ -1,9 +1,13 @@
-import scipy.integrate as spi
 import numpy as np
 import matplotlib.pyplot as plt
+import pendulum_kernels as pk
+import pendulum_events as pe
+import elliptic
+import solver_stats
+from pendulum_model import PendulumModel
 
 
-class Pendulum():
+class Pendulum(PendulumModel):
     """
     A class to represent a pendulum, with a completely rigid
     rod connecting it to the origin of our coordinate system.
@@ -15,29 +19,38 @@ class Pendulum():
     The total energy may drop over time, this is because the
     integration methods used in SciPy's solve_ivp are not
     perfect. Try a different integration method for solve_ivp
-    if you experience significant total energy loss.
+    if you experience significant total energy loss, or the
+    symplectic fixed step method "GL4", which keeps the energy
+    error bounded. The method "Elliptic" uses the exact solution
+    instead, see elliptic.py.
 
     Contains a method to solve an initial value problem for
-    this pendulum.
+    this pendulum, see pendulum_model.py.
     """
 
+    EVENTS = pe.PENDULUM_EVENTS
+    _SEPARABLE = True
+
     def __init__(self, M = 1, L = 1, g = 9.81, method = "RK45"):
         """
         M: mass of the pendulum
         L: length of rod, connecting pendulum to origin
         g: gravitational constant
         method: which method SciPy's solve_ivp should utilise
-                to solve the ivp.
+                to solve the ivp, or one of the fixed step methods
+                "RK4", "Verlet" or "GL4" from integrators.py, or
+                "Elliptic" for the exact solution. Elliptic falls back
+                to RK45 for a pendulum going over the top, or with
+                dampening.
 
         self.Solver_Run is a boolean which the check_run method
         uses to check whether the class instance has run the
         solve method.
         """
+        PendulumModel.__init__(self, method)
         self.M = M
         self.L = L
         self.g = g
-        self.method = method
-        self._Solver_Run = False
 
     def __call__(self, t, u):
         """
@@ -49,51 +62,132 @@ class Pendulum():
         d_omega = -(self.g/self.L) * np.sin(u[0])
         return (d_theta, d_omega)
 
-    def solve(self, y0, T, dt, angles = "rad"):
+    def jacobian(self, t, u):
+        """
+        Closed form jacobian of the __call__ method, passed on to the
+        implicit solvers so they do not have to estimate it with finite
+        differences.
+
+        Takes in tuple u = (theta_i, omega_i)
+        Returns 2x2 array J, where J[i, j] = d(u_d[i])/d(u[j])
+        """
+        return np.array([[0, 1],
+                         [-(self.g/self.L) * np.cos(u[0]), 0]])
+
+    def _kernels(self):
+        """
+        Returns the compiled right hand side and jacobian kernels from
+        pendulum_kernels, with the parameters of this instance bound.
+
+        Returns None if Numba is not installed, or if a subclass has
+        overridden __call__, then the Python methods are used instead.
+        """
+        if (not pk.NUMBA_AVAILABLE
+            or type(self).__call__ is not Pendulum.__call__):
+            return None
+        return (pk.bind(pk.pendulum_rhs, self.g/self.L, 0),
+                pk.bind(pk.pendulum_jac, self.g/self.L, 0))
+
+    def _energy(self, u):
+        """
+        Returns the total energy of the states u = (theta, omega), used by
+        energy_monitor to check the drift while solving.
+        """
+        return (self.M * self.g * self.L * (1 - np.cos(u[0]))
+                + 0.5 * self.M * (self.L * u[1])**2)
+
+    def _state(self, i = slice(None)):
+        """
+        Returns the stored solution at the indices i as one array,
+        [theta, omega].
+        """
+        self.check_run()
+        return np.array([self._theta[i], self._omega[i]])
+
+    def _store_state(self, y):
+        "Stores theta and omega from y[0:2], see PendulumModel _store"
+        self._theta = y[0]
+        self._omega = y[1]
+
+    def _parameters(self):
+        """
+        Returns a dictionary of the parameters deciding the solution, used
+        in the keys of solution_cache.
+        """
+        return {"M": self.M, "L": self.L, "g": self.g,
+                "method": self.method}
+
+    def _integrate(self, y0, t_vals, stats = None):
+        """
+        See PendulumModel _integrate, with "Elliptic" the exact solution is
+        used where it holds, and RK45 elsewhere.
+        """
+        if self.method != "Elliptic":
+            return PendulumModel._integrate(self, y0, t_vals, stats)
+
+        if self._exact_possible(*y0):
+            if stats is not None:
+                solver_stats.add_exact(stats)
+            return self._exact(y0, t_vals)
+        fun, jac = self._functions()
+        return self._solve_ivp(fun, jac, y0, t_vals, "RK45", stats)
+
+    def _exact_possible(self, theta, omega):
+        """
+        Returns True if the exact solution holds for the initial values,
+        the pendulum is undampened and does not go over the top.
+        """
+        return (type(self).__call__ is Pendulum.__call__
+                and bool(elliptic.librating(theta, omega, self.g, self.L)))
+
+    def _exact(self, y0, t_vals):
+        """
+        Returns the exact solution at t_vals in the same form as
+        _integrate, with a dense output evaluating it at any time.
+        """
+        t0 = t_vals[0]
+        theta_0, omega_0 = float(y0[0]), float(y0[1])
+
+        def dense(t):
+            return np.array(elliptic.solution(theta_0, omega_0, t - t0,
+                                              self.g, self.L))
+
+        t = np.asarray(t_vals, dtype=np.float64)
+        return t, dense(t), dense
+
+    def exact(self, y0, t, angles = "rad"):
         """
-        Solves an initial value problem for our pendulum.
+        Evaluates the exact solution for many initial values at once,
+        without storing anything in the instance.
 
         input
-        y0: our initial values, use form: [theta_0, omega_0]
-        T: total time to solve for
-        dt: timestep to use when solving
+        y0: array of shape (N, 2) of initial values [theta_0, omega_0], or
+            a single pair. All have to swing back and forth.
+        t: array of times
         angles: string to denote whether the inital values
                 are given in radians or degrees
 
         output
-        none, the method does not output any values, but
-        stores the results as local variables of the instance.
+        theta, omega: arrays of shape (N, len(t)), or (len(t),) for a
+                      single pair
         """
-        if angles == "deg":
-            y0 = np.deg2rad(y0)
-        elif angles == "rad":
-            pass
-        else:
-            raise Exception("Angles have to be in rad or deg.")
-
-        t_vals = np.linspace(0, T, int(T/dt)+1)
-        sol = spi.solve_ivp(self.__call__, (0, T), y0, method=self.method,
-                                 t_eval=t_vals)
-
-        self._Solver_Run = True
-        self._t = sol.t
-        self._theta = sol.y[0]
-        self._omega = sol.y[1]
+        if type(self).__call__ is not Pendulum.__call__:
+            raise ValueError("The exact solution is only for the "
+                             "undampened pendulum.")
+        y0 = np.asarray(self._check_angles(y0, angles), dtype=np.float64)
+        return elliptic.solution(y0[..., 0], y0[..., 1], t, self.g, self.L)
 
-    def check_run(self):
+    def period(self, y0, angles = "rad"):
         """
-        Checks whether the solve method has been run,
-        used by the properties to make sure they raise
-        an exception if the solve method has not been run.
+        Returns the exact period for the initial values y0, an array of
+        shape (N, 2) or a single pair, nan where the pendulum goes over
+        the top. Only for the undampened pendulum.
         """
-        if self._Solver_Run == False:
-            raise AttributeError("Solver not run")
-
-    @property
-    def t(self):
-        "Time array"
-        self.check_run()
-        return self._t
+        if type(self).__call__ is not Pendulum.__call__:
+            raise ValueError("The exact period is only for the "
+                             "undampened pendulum.")
+        y0 = np.asarray(self._check_angles(y0, angles), dtype=np.float64)
+        return elliptic.period(y0[..., 0], y0[..., 1], self.g, self.L)
 
     @property
     def theta(self):
@@ -110,33 +204,34 @@ class Pendulum():
     @property
     def x(self):
         "Pendulum x-position over time"
-        return self.L * np.sin(self._theta)
+        return self._derived("x", lambda: self.L * np.sin(self._theta))
 
     @property
     def y(self):
         "Pendulum y-position over time"
-        return - self.L * np.cos(self._theta)
+        return self._derived("y", lambda: - self.L * np.cos(self._theta))
 
     @property
     def vx(self):
         "Pendulum linear velocity in x-direction"
-        return np.gradient(self.x, self._t)
+        return self._derived("vx", lambda: - self.y * self._omega)
 
     @property
     def vy(self):
         "Pendulum linear velocity in y-direction"
-        return np.gradient(self.y, self._t)
+        return self._derived("vy", lambda: self.x * self._omega)
 
     @property
     def potential(self):
         "Potential energy of the system"
-        return self.M * self.g * (self.y + self.L)
+        return self._derived("potential",
+                             lambda: self.M * self.g * (self.y + self.L))
 
     @property
     def kinetic(self):
         "Kinetic energy of the system"
-        v_sq = self.vx**2 + self.vy**2
-        return 0.5 * self.M * v_sq
+        return self._derived("kinetic",
+                             lambda: 0.5 * self.M * (self.L * self._omega)**2)
 
 
 class DampenedPendulum(Pendulum):
@@ -146,6 +241,9 @@ class DampenedPendulum(Pendulum):
     been modified to work with a dampening factor B.
     """
 
+    _CONSERVATIVE = False
+    _SEPARABLE = False
+
     def __init__(self, M = 1, L = 1, g = 9.81, B = 0.25, method = "RK45"):
         """
         See Pendulum __init__.
@@ -165,6 +263,29 @@ class DampenedPendulum(Pendulum):
         d_omega = -(self.g/self.L) * np.sin(u[0]) - (self.B/self.M*u[1])
         return (d_theta, d_omega)
 
+    def jacobian(self, t, u):
+        """
+        See Pendulum jacobian, the dampening adds -B/M to d(d_omega)/d(omega).
+        """
+        return np.array([[0, 1],
+                         [-(self.g/self.L) * np.cos(u[0]), -self.B/self.M]])
+
+    def _parameters(self):
+        "See Pendulum _parameters, includes the dampening B"
+        parameters = Pendulum._parameters(self)
+        parameters["B"] = self.B
+        return parameters
+
+    def _kernels(self):
+        """
+        See Pendulum _kernels, binds the dampening B/M as well.
+        """
+        if (not pk.NUMBA_AVAILABLE
+            or type(self).__call__ is not DampenedPendulum.__call__):
+            return None
+        return (pk.bind(pk.pendulum_rhs, self.g/self.L, self.B/self.M),
+                pk.bind(pk.pendulum_jac, self.g/self.L, self.B/self.M))
+
 
 
 if __name__ == "__main__":
@@ -0,0 +1,165 @@
+"""
+Named events for the solve methods of Pendulum, DampenedPendulum,
+DoublePendulum and ChainPendulum, found by the root finding of solve_ivp.
+
+Pendulum and DampenedPendulum
+zero_crossing: theta crosses 0
+turning_point: omega is 0, the pendulum turns around
+flip: |theta| grows past pi, the pendulum goes over the top
+
+DoublePendulum
+zero_crossing_1, zero_crossing_2: theta_1 or theta_2 crosses 0
+turning_point_1, turning_point_2: omega_1 or omega_2 is 0
+flip_1, flip_2: |theta_1| or |theta_2| grows past pi
+flip: either arm flips, the first flip is what sweep.first_flip_time
+      looks for on a grid
+
+ChainPendulum, see chain_pendulum_events
+zero_crossing_k, turning_point_k, flip_k for each link k = 1, ..., N
+flip: any link flips
+
+Any function event(t, u) can be given as well, an event is then found
+where it crosses zero, see the events argument of solve_ivp. Note that
+an event which is zero at the initial values, like turning_point for a
+pendulum released at rest, is also found at t = 0.
+
+The event times are found between the steps of the solver, so there is
+no need for a fine t_eval grid to measure periods or flip times. With
+only_events, the solution is not stored at all apart from its first and
+last state, only the events are.
+"""
+
+import time
+import numpy as np
+import scipy.integrate as spi
+import integrators
+import solver_stats
+
+
+def _zero(i):
+    "Event where u[i] crosses zero"
+    def event(t, u):
+        return u[i]
+    return event
+
+
+def _flip(*rows):
+    "Event where the largest |u[i]| of rows grows past pi"
+    def event(t, u):
+        return np.pi - max(abs(u[i]) for i in rows)
+    event.direction = -1
+    return event
+
+
+PENDULUM_EVENTS = {"zero_crossing": _zero(0),
+                   "turning_point": _zero(1),
+                   "flip": _flip(0)}
+
+DOUBLE_PENDULUM_EVENTS = {"zero_crossing_1": _zero(0),
+                          "zero_crossing_2": _zero(2),
+                          "turning_point_1": _zero(1),
+                          "turning_point_2": _zero(3),
+                          "flip_1": _flip(0),
+                          "flip_2": _flip(2),
+                          "flip": _flip(0, 2)}
+
+
+def chain_pendulum_events(N):
+    """
+    Returns the events of a ChainPendulum of N links, where the state is
+    (theta_1, ..., theta_N, omega_1, ..., omega_N).
+    """
+    events = {}
+    for k in range(N):
+        events["zero_crossing_%d" %(k+1)] = _zero(k)
+        events["turning_point_%d" %(k+1)] = _zero(N + k)
+        events["flip_%d" %(k+1)] = _flip(k)
+    events["flip"] = _flip(*range(N))
+    return events
+
+
+def _event_functions(model, events, stop):
+    """
+    Returns the names and the event functions for solve_ivp of events, a
+    name, a function or a list of them. With stop the events are terminal.
+    """
+    if isinstance(events, str) or callable(events):
+        events = [events]
+
+    names, functions = [], []
+    for event in events:
+        if isinstance(event, str):
+            if event not in model.EVENTS:
+                raise ValueError("Unknown event %s, use one of %s."
+                                 %(event, tuple(model.EVENTS)))
+            name, g = event, model.EVENTS[event]
+        else:
+            name, g = getattr(event, "__name__", "event"), event
+
+        # A new function for every solve, so terminal is never set on the
+        # shared ones above
+        def f(t, u, g = g):
+            return g(t, u)
+        f.direction = getattr(g, "direction", 0)
+        f.terminal = stop or getattr(g, "terminal", False)
+
+        names.append(name)
+        functions.append(f)
+    return names, functions
+
+
+def solve(model, y0, T, dt, events, stop = False, only_events = False):
+    """
+    Solves an initial value problem for model with solve_ivp, recording
+    the events, and stores the solution and the events in model.
+
+    input
+    model: a Pendulum, DampenedPendulum, DoublePendulum or ChainPendulum
+           instance
+    y0: initial values in radians
+    T, dt: see the solve method of the model
+    events: name of an event, a function event(t, u), or a list of them
+    stop: if True the integration stops at the first event
+    only_events: if True only the first and last state are stored, not
+                 the solution at every dt
+
+    The events are stored as model.events, a dictionary from the name of
+    each event to (t, y), its times and an array of shape (len(y0), len(t))
+    holding the states at those times, and the solver statistics as
+    model.stats.
+    """
+    start = time.perf_counter()
+    if model.method in integrators.FIXED_STEP_METHODS:
+        raise ValueError("Events can only be found with the solve_ivp "
+                         "methods, not %s." %(model.method))
+
+    names, functions = _event_functions(model, events, stop)
+    fun, jac = model._functions()
+    # The exact solution of Pendulum has no root finding, use its fallback
+    method = "RK45" if model.method == "Elliptic" else model.method
+
+    n = int(T/dt)
+    if only_events:
+        options = {"t_eval": None, "dense_output": False}
+    else:
+        options = {"t_eval": np.linspace(0, T, n+1),
+                   "dense_output": True}
+
+    sol = spi.solve_ivp(fun, (0, T), y0, method=method,
+                        events=functions, **options,
+                        **model._solver_options(jac))
+    integrated = time.perf_counter()
+
+    stats = solver_stats.new(method)
+    solver_stats.add_solution(stats, sol, method,
+                              len(sol.t) - 1 if only_events else None)
+
+    if only_events:
+        model._store(sol.t[[0, -1]], sol.y[:, [0, -1]])
+    else:
+        model._store(sol.t, sol.y, sol.sol, T/n if n > 0 else dt)
+
+    for name, t_e, y_e in zip(names, sol.t_events, sol.y_events):
+        y_e = np.asarray(y_e).reshape(-1, len(y0)).T
+        model._events[name] = (t_e, y_e)
+    solver_stats.finish(model, stats, start, integrated)
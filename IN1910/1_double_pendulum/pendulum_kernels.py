@@ -0,0 +1,356 @@
+"""
+Compiled right hand sides and jacobians for the ExponentialDecay, Pendulum,
+DampenedPendulum, DoublePendulum and ChainPendulum classes.
+
+Every kernel has the signature kernel(t, u, p), where u is the state as a
+float64 array and p is an array holding the parameters of the model. The
+classes bind their parameters once through the bind function, and solve()
+then uses the returned functions in place of __call__ and jacobian.
+
+If Numba is not installed the kernels are left as plain Python functions,
+and the classes fall back to their own __call__ and jacobian methods.
+"""
+
+import numpy as np
+
+try:
+    from numba import jit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+
+def exp_decay_rhs(t, u, p):
+    """
+    Right hand side of ExponentialDecay, p = (a,) for a single decay rate,
+    or p = (a_1, ..., a_N) for N values decaying together.
+    """
+    return -p * u
+
+
+def pendulum_rhs(t, u, p):
+    """
+    Right hand side of Pendulum and DampenedPendulum.
+
+    u = (theta, omega), p = (g/L, B/M), B = 0 for the undampened pendulum.
+    """
+    u_d = np.empty(2)
+    u_d[0] = u[1]
+    u_d[1] = -p[0] * np.sin(u[0]) - p[1] * u[1]
+    return u_d
+
+
+def pendulum_jac(t, u, p):
+    """
+    Jacobian of pendulum_rhs, p = (g/L, B/M)
+    """
+    J = np.zeros((2, 2))
+    J[0, 1] = 1.0
+    J[1, 0] = -p[0] * np.cos(u[0])
+    J[1, 1] = -p[1]
+    return J
+
+
+def double_pendulum_rhs(t, u, p):
+    """
+    Right hand side of DoublePendulum, p = (M1, M2, L1, L2, g).
+
+    u holds the state of N double pendulums, ordered as u.reshape(4, N) =
+    (theta_1, omega_1, theta_2, omega_2), N = 1 for a single system. The
+    sines and cosines are only computed once per pendulum.
+    """
+    M2, L1, L2, g = p[1], p[2], p[3], p[4]
+    com_M = p[0] + M2
+    N = u.shape[0] // 4
+    u_d = np.empty(4*N)
+
+    for k in range(N):
+        th1, w1, th2, w2 = u[k], u[N + k], u[2*N + k], u[3*N + k]
+        sin_d, cos_d = np.sin(th2 - th1), np.cos(th2 - th1)
+        sin_1, sin_2 = np.sin(th1), np.sin(th2)
+        sin_cos = sin_d * cos_d
+        den = com_M - M2 * cos_d * cos_d
+
+        num1 = (M2 * L1 * w1 * w1 * sin_cos
+                + M2 * g * sin_2 * cos_d
+                + M2 * L2 * w2 * w2 * sin_d
+                - com_M * g * sin_1)
+
+        num2 = (- M2 * L2 * w2 * w2 * sin_cos
+                + com_M * g * sin_1 * cos_d
+                - com_M * L1 * w1 * w1 * sin_d
+                - com_M * g * sin_2)
+
+        u_d[k] = w1
+        u_d[N + k] = num1 / (L1 * den)
+        u_d[2*N + k] = w2
+        u_d[3*N + k] = num2 / (L2 * den)
+
+    return u_d
+
+
+def double_pendulum_jac(t, u, p):
+    """
+    Jacobian of double_pendulum_rhs, p = (M1, M2, L1, L2, g).
+
+    Returns an array of shape (4, 4, N), where [:, :, k] is the jacobian
+    of the k'th pendulum. See DoublePendulum.jacobian for the derivation.
+    """
+    M2, L1, L2, g = p[1], p[2], p[3], p[4]
+    com_M = p[0] + M2
+    N = u.shape[0] // 4
+    J = np.zeros((4, 4, N))
+
+    for k in range(N):
+        th1, w1, th2, w2 = u[k], u[N + k], u[2*N + k], u[3*N + k]
+        sin_d, cos_d = np.sin(th2 - th1), np.cos(th2 - th1)
+        sin_1, cos_1 = np.sin(th1), np.cos(th1)
+        sin_2, cos_2 = np.sin(th2), np.cos(th2)
+        sin_cos = sin_d * cos_d
+        cos_2d = cos_d * cos_d - sin_d * sin_d
+        w1_sq, w2_sq = w1 * w1, w2 * w2
+
+        den = com_M - M2 * cos_d * cos_d
+        den1 = L1 * den
+        den2 = L2 * den
+
+        num1 = (M2 * L1 * w1_sq * sin_cos + M2 * g * sin_2 * cos_d
+                + M2 * L2 * w2_sq * sin_d - com_M * g * sin_1)
+        num2 = (- M2 * L2 * w2_sq * sin_cos + com_M * g * sin_1 * cos_d
+                - com_M * L1 * w1_sq * sin_d - com_M * g * sin_2)
+
+        d_num1 = (M2 * L1 * w1_sq * cos_2d - M2 * g * sin_2 * sin_d
+                  + M2 * L2 * w2_sq * cos_d)
+        d_num2 = (- M2 * L2 * w2_sq * cos_2d - com_M * g * sin_1 * sin_d
+                  - com_M * L1 * w1_sq * cos_d)
+        d_log_den = 2 * M2 * sin_cos / den
+
+        d_omega_1 = num1 / den1
+        d_omega_2 = num2 / den2
+
+        J[0, 1, k] = 1.0
+        J[1, 0, k] = ((- d_num1 - com_M * g * cos_1) / den1
+                      + d_omega_1 * d_log_den)
+        J[1, 1, k] = 2 * M2 * L1 * w1 * sin_cos / den1
+        J[1, 2, k] = ((d_num1 + M2 * g * cos_2 * cos_d) / den1
+                      - d_omega_1 * d_log_den)
+        J[1, 3, k] = 2 * M2 * L2 * w2 * sin_d / den1
+        J[2, 3, k] = 1.0
+        J[3, 0, k] = ((- d_num2 + com_M * g * cos_1 * cos_d) / den2
+                      + d_omega_2 * d_log_den)
+        J[3, 1, k] = - 2 * com_M * L1 * w1 * sin_d / den2
+        J[3, 2, k] = ((d_num2 - com_M * g * cos_2) / den2
+                      - d_omega_2 * d_log_den)
+        J[3, 3, k] = - 2 * M2 * L2 * w2 * sin_cos / den2
+
+    return J
+
+
+def double_pendulum_tangent_rhs(t, u, p):
+    """
+    Right hand side of the double pendulum together with its tangent linear
+    equations, d(delta)/dt = J(u) delta, p = (M1, M2, L1, L2, g).
+
+    u holds 8N values, the states of N double pendulums ordered as in
+    double_pendulum_rhs, followed by their tangent vectors in the same
+    order. Used to estimate Lyapunov exponents, see lyapunov.py.
+    """
+    N = u.shape[0] // 8
+    state = u[:4*N]
+    d = u[4*N:]
+    J = double_pendulum_jac(t, state, p)
+    u_d = np.empty(8*N)
+    u_d[:4*N] = double_pendulum_rhs(t, state, p)
+
+    for k in range(N):
+        for i in range(4):
+            s = 0.0
+            for j in range(4):
+                s += J[i, j, k] * d[j*N + k]
+            u_d[4*N + i*N + k] = s
+
+    return u_d
+
+
+def double_pendulum_canonical_rhs(t, u, p):
+    """
+    Hamilton's equations for the double pendulum, p = (M1, M2, L1, L2, g).
+
+    Takes in u = (theta_1, p_1, theta_2, p_2), where p_1 and p_2 are the
+    canonical momenta, see to_canonical. Used by the symplectic integrator,
+    which only preserves the energy in these coordinates.
+    """
+    M1, M2, L1, L2, g = p[0], p[1], p[2], p[3], p[4]
+    com_M = M1 + M2
+    th1, p1, th2, p2 = u[0], u[1], u[2], u[3]
+    sin_d, cos_d = np.sin(th1 - th2), np.cos(th1 - th2)
+    den = M1 + M2 * sin_d * sin_d
+
+    d_th1 = (L2 * p1 - L1 * p2 * cos_d) / (L1 * L1 * L2 * den)
+    d_th2 = ((com_M * L1 * p2 - M2 * L2 * p1 * cos_d)
+             / (M2 * L1 * L2 * L2 * den))
+    C1 = p1 * p2 * sin_d / (L1 * L2 * den)
+    C2 = ((M2 * L2 * L2 * p1 * p1 + com_M * L1 * L1 * p2 * p2
+           - 2 * M2 * L1 * L2 * p1 * p2 * cos_d) * 2 * sin_d * cos_d
+          / (2 * L1 * L1 * L2 * L2 * den * den))
+
+    u_d = np.empty(4)
+    u_d[0] = d_th1
+    u_d[1] = - com_M * g * L1 * np.sin(th1) - C1 + C2
+    u_d[2] = d_th2
+    u_d[3] = - M2 * g * L2 * np.sin(th2) + C1 - C2
+    return u_d
+
+
+def to_canonical(y, p):
+    """
+    Converts double pendulum states from (theta_1, omega_1, theta_2,
+    omega_2) to (theta_1, p_1, theta_2, p_2), p = (M1, M2, L1, L2, g).
+
+    y can be a single state or an array of shape (4, n).
+    """
+    M1, M2, L1, L2 = p[0], p[1], p[2], p[3]
+    cos_d = np.cos(y[0] - y[2])
+    p1 = (M1 + M2) * L1 * L1 * y[1] + M2 * L1 * L2 * y[3] * cos_d
+    p2 = M2 * L2 * L2 * y[3] + M2 * L1 * L2 * y[1] * cos_d
+    return np.array([y[0], p1, y[2], p2])
+
+
+def from_canonical(y, p):
+    """
+    Inverse of to_canonical, converts (theta_1, p_1, theta_2, p_2) back to
+    (theta_1, omega_1, theta_2, omega_2).
+    """
+    M1, M2, L1, L2 = p[0], p[1], p[2], p[3]
+    sin_d, cos_d = np.sin(y[0] - y[2]), np.cos(y[0] - y[2])
+    den = M1 + M2 * sin_d**2
+    w1 = (L2 * y[1] - L1 * y[3] * cos_d) / (L1**2 * L2 * den)
+    w2 = (((M1 + M2) * L1 * y[3] - M2 * L2 * y[1] * cos_d)
+          / (M2 * L1 * L2**2 * den))
+    return np.array([y[0], w1, y[2], w2])
+
+
+def chain_pendulum_rhs(t, u, p):
+    """
+    Right hand side of ChainPendulum, p = (g, mu_1, ..., mu_N, L_1, ..., L_N),
+    where mu_k is the sum of the masses from link k to the end of the chain.
+
+    u = (theta_1, ..., theta_N, omega_1, ..., omega_N). The angular
+    accelerations solve A domega = b, with the mass matrix
+    A_ij = mu_max(i,j) L_i L_j cos(theta_i - theta_j), and
+    b_i = - sum_j mu_max(i,j) L_i L_j sin(theta_i - theta_j) omega_j**2
+          - g mu_i L_i sin(theta_i).
+    """
+    N = (p.shape[0] - 1) // 2
+    g, mu, L = p[0], p[1:N+1], p[N+1:]
+    A = np.empty((N, N))
+    b = np.empty(N)
+
+    for i in range(N):
+        b_i = -g * mu[i] * L[i] * np.sin(u[i])
+        for j in range(N):
+            c = mu[max(i, j)] * L[i] * L[j]
+            A[i, j] = c * np.cos(u[i] - u[j])
+            b_i -= c * np.sin(u[i] - u[j]) * u[N + j] * u[N + j]
+        b[i] = b_i
+
+    u_d = np.empty(2*N)
+    u_d[:N] = u[N:]
+    u_d[N:] = np.linalg.solve(A, b)
+    return u_d
+
+
+def chain_mass_matrix(theta, p):
+    """
+    Returns the mass matrix A of chain_pendulum_rhs at the angles theta.
+    """
+    N = theta.shape[0]
+    mu, L = p[1:N+1], p[N+1:]
+    A = np.empty((N, N))
+    for i in range(N):
+        for j in range(N):
+            A[i, j] = mu[max(i, j)] * L[i] * L[j] * np.cos(theta[i] - theta[j])
+    return A
+
+
+def chain_pendulum_canonical_rhs(t, y, p):
+    """
+    Hamilton's equations of ChainPendulum, with the same p as
+    chain_pendulum_rhs.
+
+    y = (theta_1, ..., theta_N, p_1, ..., p_N), where the canonical momenta
+    are p = A omega. Then dtheta = A^-1 p, and
+    dp_k = - omega_k sum_j mu_max(k,j) L_k L_j sin(theta_k - theta_j) omega_j
+           - g mu_k L_k sin(theta_k).
+    """
+    N = (p.shape[0] - 1) // 2
+    g, mu, L = p[0], p[1:N+1], p[N+1:]
+    omega = np.linalg.solve(chain_mass_matrix(y[:N], p), y[N:])
+
+    y_d = np.empty(2*N)
+    y_d[:N] = omega
+    for k in range(N):
+        s = 0.0
+        for j in range(N):
+            s += mu[max(k, j)] * L[k] * L[j] * np.sin(y[k] - y[j]) * omega[j]
+        y_d[N + k] = -omega[k] * s - g * mu[k] * L[k] * np.sin(y[k])
+    return y_d
+
+
+def chain_to_canonical(y, p):
+    """
+    Swaps the angular velocities of a ChainPendulum state for the canonical
+    momenta p = A omega, for a single state of length 2N.
+    """
+    N = y.shape[0] // 2
+    out = y.copy()
+    out[N:] = chain_mass_matrix(y[:N], p) @ y[N:]
+    return out
+
+
+def chain_from_canonical(y, p):
+    """
+    Swaps the canonical momenta of ChainPendulum states back for the angular
+    velocities, for an array of shape (2N, n) holding n states.
+    """
+    N = y.shape[0] // 2
+    out = y.copy()
+    for k in range(y.shape[1]):
+        out[N:, k] = np.linalg.solve(chain_mass_matrix(y[:N, k], p), y[N:, k])
+    return out
+
+
+if NUMBA_AVAILABLE:
+    double_pendulum_canonical_rhs = jit(cache=True, nopython=True)(
+                                        double_pendulum_canonical_rhs)
+    exp_decay_rhs = jit(cache=True, nopython=True)(exp_decay_rhs)
+    pendulum_rhs = jit(cache=True, nopython=True)(pendulum_rhs)
+    pendulum_jac = jit(cache=True, nopython=True)(pendulum_jac)
+    double_pendulum_rhs = jit(cache=True, nopython=True)(double_pendulum_rhs)
+    double_pendulum_jac = jit(cache=True, nopython=True)(double_pendulum_jac)
+    double_pendulum_tangent_rhs = jit(cache=True, nopython=True)(
+                                      double_pendulum_tangent_rhs)
+    chain_mass_matrix = jit(cache=True, nopython=True)(chain_mass_matrix)
+    chain_pendulum_rhs = jit(cache=True, nopython=True)(chain_pendulum_rhs)
+    chain_pendulum_canonical_rhs = jit(cache=True, nopython=True)(
+                                       chain_pendulum_canonical_rhs)
+    chain_from_canonical = jit(cache=True, nopython=True)(chain_from_canonical)
+
+
+def bind(kernel, *params):
+    """
+    Binds the parameters of a model to a kernel.
+
+    Returns a function f(t, u) which can be passed directly to solve_ivp,
+    the parameters are only converted to an array once.
+    """
+    p = np.array(params, dtype=np.float64)
+
+    def f(t, u):
+        return kernel(t, u, p)
+
+    # Kept so the fixed step integrators can call the kernel directly from
+    # their own compiled loops.
+    f.kernel = kernel
+    f.params = p
+    return f
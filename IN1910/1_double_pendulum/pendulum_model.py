@@ -0,0 +1,414 @@
+"""
+The solving and storage shared by Pendulum, DampenedPendulum,
+DoublePendulum and ChainPendulum.
+
+PendulumModel holds everything which does not depend on the equations of
+motion: solve with its cache, events, energy and statistics wiring, the
+windowed and file backed solves, sampling the stored solution, and the
+properties every model has. A model only adds its own kinematics and
+kernels, by defining
+
+__call__(t, u): right hand side of the equations of motion
+_kernels(): the compiled kernels from pendulum_kernels, or None
+_energy(u): total energy of the states u
+_parameters(): dictionary of the parameters, for the solution_cache keys
+_state(i): the stored solution at the indices i as one array
+_store_state(y): stores the state array y in the variables the
+                 properties read
+
+and optionally jacobian(t, u), and _canonical() for the symplectic GL4
+method.
+"""
+
+import time
+import scipy.integrate as spi
+import scipy.interpolate as spi_interp
+import numpy as np
+import integrators
+import streaming
+import pendulum_events as pe
+import energy_monitor
+import solver_stats
+
+
+class PendulumModel():
+    """
+    Base class of the pendulum models, see the module docstring.
+
+    _CONSERVATIVE: False for models which do not keep their energy, solve
+                   then refuses energy_tol
+    _SEPARABLE: True for models whose kinetic energy only depends on the
+                angular velocities, the only ones Verlet can be used for
+    """
+
+    _CONSERVATIVE = True
+    _SEPARABLE = False
+
+    def __init__(self, method):
+        """
+        method: which method SciPy's solve_ivp should utilise to solve the
+                ivp, or one of the fixed step methods from integrators.py
+        """
+        self.method = method
+        self._Solver_Run = False
+        self._problem = None
+        self._cache = {}
+
+    def _functions(self):
+        """
+        Returns the right hand side and jacobian solve_ivp should use,
+        the compiled kernels if they are available.
+        """
+        kernels = self._kernels()
+        if kernels is None:
+            return self.__call__, self.jacobian
+        return kernels
+
+    def _solver_options(self, jac):
+        """
+        Returns the extra keyword arguments for solve_ivp, the implicit
+        methods are given the analytic jacobian if there is one.
+        """
+        if jac is not None and self.method in ("Radau", "BDF", "LSODA"):
+            return {"jac": jac}
+        return {}
+
+    def _canonical(self):
+        """
+        Returns (fun, to_canonical, from_canonical) for models which GL4
+        has to integrate in canonical coordinates, see _integrate, or None
+        to integrate the state as it is.
+        """
+        return None
+
+    def solve(self, y0, T, dt, angles = "rad", cache = None, events = None,
+              stop = False, only_events = False, energy_tol = None,
+              on_drift = "raise"):
+        """
+        Solves an initial value problem for our system of pendulums.
+
+        input
+        y0: our initial values, in the order of the state of the model,
+            [theta_0, omega_0] for Pendulum,
+            [theta_1, omega_1, theta_2, omega_2] for DoublePendulum and
+            [theta_1, ..., theta_N, omega_1, ..., omega_N] for ChainPendulum
+        T: total time to solve for
+        dt: timestep to use when solving
+        angles: string to denote whether the inital values
+                are given in radians or degrees
+        cache: optional SolutionCache from solution_cache.py, if the same
+               problem has been solved before the solution is loaded from
+               it, otherwise the new solution is added to it.
+        events: optional name of an event from EVENTS, a function
+                event(t, u), or a list of them. The times and states where
+                they happen are stored in the events property, see
+                pendulum_events.py. Only for the solve_ivp methods, and can
+                not be combined with cache.
+        stop: if True, stop solving at the first event
+        only_events: if True, only store the events and the first and last
+                     state, instead of the solution at every dt
+        energy_tol: optional largest change in total energy allowed. The
+                    drift is checked while solving, and the integration
+                    stops as soon as it grows past energy_tol, see
+                    energy_monitor.py. Not for the dampened pendulum, and
+                    can not be combined with events. A solution loaded
+                    from the cache is checked as a whole, and escalated
+                    solutions are not added to the cache.
+        on_drift: what to do when the drift grows past energy_tol, "raise"
+                  raises an EnergyDriftError telling where and by how much,
+                  "escalate" solves again with tighter methods and
+                  tolerances, recording the failed attempts in the
+                  escalations property.
+
+        output
+        none, the method does not output any values, but
+        stores the results as local variables of the instance. The
+        solver statistics and timings are stored in the stats property,
+        see solver_stats.py.
+        """
+        start = time.perf_counter()
+        y0 = self._check_angles(y0, angles)
+
+        if energy_tol is not None:
+            if not self._CONSERVATIVE:
+                raise ValueError("%s does not keep its energy, energy_tol "
+                                 "can not be used." %(type(self).__name__))
+            if events is not None:
+                raise ValueError("Events can not be used with energy_tol.")
+
+        if events is not None:
+            if cache is not None:
+                raise ValueError("Events can not be used with a cache.")
+            pe.solve(self, y0, T, dt, events, stop, only_events)
+            return
+
+        n = int(T/dt)
+        step = T/n if n > 0 else dt
+        stats = solver_stats.new(self.method)
+        escalations = []
+        if cache is not None:
+            key = cache.key(self, y0, T, dt)
+            solution = cache.get(key)
+            if solution is not None and energy_tol is not None:
+                t, y = solution
+                try:
+                    energy_monitor.check(self, t, y, self._energy(y[:, 0]),
+                                         energy_tol, self.method)
+                except energy_monitor.EnergyDriftError as error:
+                    if on_drift != "escalate":
+                        raise
+                    escalations.append(error)
+                    solution = None
+            if solution is not None:
+                integrated = time.perf_counter()
+                self._store(*solution, dt = step)
+                self._problem = (tuple(np.ravel(y0)), T)
+                stats.update(nfev = None, steps = None, cached = True,
+                             message = "Loaded from the cache.")
+                solver_stats.finish(self, stats, start, integrated)
+                return
+
+        t_vals = np.linspace(0, T, n+1)
+        if energy_tol is None:
+            t, y, dense = self._integrate(y0, t_vals, stats)
+        else:
+            (t, y, dense), escalations = energy_monitor.solve(
+                self, y0, t_vals, energy_tol, on_drift, stats, escalations)
+        integrated = time.perf_counter()
+
+        # The key names the method of the instance, so an escalated
+        # solution, made by another method, is not stored under it
+        if cache is not None and not escalations:
+            cache.put(key, t, y)
+
+        self._store(t, y, dense, step)
+        self._escalations = escalations
+        self._problem = (tuple(np.ravel(y0)), T)
+        solver_stats.finish(self, stats, start, integrated)
+
+    def _integrate(self, y0, t_vals, stats = None):
+        """
+        Integrates from the initial values y0 (in radians) at time t_vals[0]
+        to t_vals[-1], with the method of this instance.
+
+        stats: optional dictionary of solve statistics the counts of the
+               solver are added to, see solver_stats.py
+
+        Returns the time array, an array of shape (len(y0), len(t)) holding
+        the state at the times in t_vals, and the dense output of
+        solve_ivp, or None for the fixed step methods.
+        """
+        fun, jac = self._functions()
+
+        if self.method in integrators.FIXED_STEP_METHODS:
+            if self.method == "Verlet" and not self._SEPARABLE:
+                raise ValueError("Verlet is only available for the "
+                                 "undampened Pendulum.")
+            canonical = self._canonical() if self.method == "GL4" else None
+            if canonical is None:
+                t, y = integrators.integrate(self.method, fun, y0, t_vals,
+                                             stats = stats, jac = jac)
+                return t, y, None
+
+            # The symplectic method only keeps the energy bounded when it
+            # integrates Hamilton's equations, so the angular velocities
+            # are swapped for the canonical momenta while solving.
+            fun, to_canonical, from_canonical = canonical
+            y0 = to_canonical(np.asarray(y0, dtype=np.float64))
+            t, y = integrators.integrate(self.method, fun, y0, t_vals,
+                                         stats = stats)
+            return t, from_canonical(y), None
+
+        return self._solve_ivp(fun, jac, y0, t_vals, self.method, stats)
+
+    def _solve_ivp(self, fun, jac, y0, t_vals, method, stats = None):
+        """
+        Integrates with the solve_ivp method method, see _integrate.
+
+        A failed solve_ivp ends before t_vals[-1], as a failed GL4 solve
+        in integrators.integrate, this is recorded in stats, or raised as
+        a ValueError with the message of solve_ivp if stats is None.
+        """
+        if len(t_vals) == 1:
+            # T < dt leaves only the initial values, and solve_ivp can not
+            # integrate over an empty span
+            return t_vals, np.asarray(y0, dtype=np.float64)[:, None], None
+        sol = spi.solve_ivp(fun, (t_vals[0], t_vals[-1]), y0,
+                            method=method, t_eval=t_vals,
+                            dense_output=True, **self._solver_options(jac))
+        if stats is None and not sol.success:
+            raise ValueError(sol.message)
+        if stats is not None:
+            solver_stats.add_solution(stats, sol, method)
+        return sol.t, sol.y, sol.sol
+
+    def solve_chunks(self, y0, T, dt, window = 100, angles = "rad"):
+        """
+        Solves an initial value problem in time windows of length window,
+        without storing anything in the instance. See streaming.py.
+
+        Returns a generator yielding (t, y) for each window, y holding the
+        state of the model.
+        """
+        return streaming.solve_chunks(self, y0, T, dt, window, angles)
+
+    def solve_to_file(self, filename, y0, T, dt, window = 100,
+                      angles = "rad"):
+        """
+        Solves an initial value problem in time windows of length window,
+        writing each window to the memory-mapped file filename.npy. The
+        properties then read the solution from the file. See streaming.py.
+
+        Returns the name of the file.
+        """
+        return streaming.solve_to_file(self, filename, y0, T, dt, window,
+                                       angles)
+
+    def extend(self, T_more):
+        """
+        Continues the stored solution from its last state for another T_more
+        units of time, with the same timestep, and appends the new values
+        to t and the angles and angular velocities. See streaming.extend.
+        """
+        streaming.extend(self, T_more)
+
+    def load(self, filename):
+        """
+        Loads a solution written by solve_to_file, the properties then read
+        from the file as they need it.
+        """
+        streaming.load(self, filename)
+
+    def sample(self, t):
+        """
+        Evaluates the stored solution at the times t, anywhere between the
+        first and last time solved for, without solving again.
+
+        The dense output of solve_ivp is kept by solve for this, so its
+        memory use grows with the number of solver steps, not with the
+        number of time values. For the fixed step methods, and solutions
+        loaded from a file or a cache, a cubic Hermite spline through the
+        stored values and their derivatives is used instead.
+
+        Returns an array of shape (len(y0), len(t)) holding the state.
+        """
+        self.check_run()
+        if self._dense is None:
+            y = self._state()
+            y_d = np.array(self.__call__(0, y))
+            self._dense = spi_interp.CubicHermiteSpline(self._t, y, y_d,
+                                                        axis=-1)
+        return self._dense(np.asarray(t, dtype=np.float64))
+
+    def resample(self, t):
+        """
+        Replaces the stored solution with its values at the times t, found
+        by sample. The properties then follow the new time array, while
+        the interpolant is kept so the solution can be resampled again.
+        """
+        y = self.sample(t)
+        problem = self._problem
+        self._store(np.asarray(t, dtype=np.float64), y, self._dense)
+        self._problem = problem
+
+    def _store(self, t, y, dense = None, dt = None):
+        """
+        Stores a new solution in the instance, and clears the derived values
+        cached from the previous one.
+
+        t: time array
+        y: array holding the state at the times t, see _store_state
+        dense: callable returning the solution at any time, see sample
+        dt: the spacing of t, used by extend, None if t is not a whole
+            evenly spaced time array, like the first and last time of
+            only_events or the times given to resample
+        """
+        self._Solver_Run = True
+        self._t = t
+        self._dt = dt
+        self._store_state(y)
+        self._dense = dense
+        self._events = {}
+        self._escalations = []
+        self._stats = None
+        self._problem = None
+        self._cache = {}
+
+    def _derived(self, name, compute):
+        """
+        Returns the derived value called name, computed by calling compute()
+        the first time it is asked for after a solve and cached after that.
+
+        The cached arrays are made read-only, so they can not be modified
+        by accident through the properties.
+        """
+        if name not in self._cache:
+            self.check_run()
+            value = np.asarray(compute())
+            value.flags.writeable = False
+            self._cache[name] = value
+        return self._cache[name]
+
+    def solved_for(self, y0, T, angles = "rad"):
+        """
+        Returns True if the stored solution was found by solve with the
+        initial values y0 over time T, also after it has been resampled.
+        """
+        y0 = self._check_angles(y0, angles)
+        return self._problem == (tuple(np.ravel(y0)), T)
+
+    def _check_angles(self, y0, angles):
+        """
+        Returns the initial values y0 in radians, converting them if
+        angles is "deg".
+        """
+        if angles == "deg":
+            y0 = np.deg2rad(y0)
+        elif angles == "rad":
+            pass
+        else:
+            raise Exception("Angles have to be in rad or deg.")
+        return y0
+
+    def check_run(self):
+        """
+        Checks whether the solve method has been run,
+        used by the properties to make sure they raise
+        an exception if the solve method has not been run.
+        """
+        if self._Solver_Run == False:
+            raise AttributeError("Solver not run")
+
+    @property
+    def t(self):
+        "Time array"
+        self.check_run()
+        return self._t
+
+    @property
+    def events(self):
+        """
+        Dictionary from the name of each event given to solve to (t, y),
+        the times of the event and the states at those times
+        """
+        self.check_run()
+        return self._events
+
+    @property
+    def escalations(self):
+        """
+        List of the EnergyDriftError of every attempt solve gave up on
+        before the stored solution, when on_drift is "escalate"
+        """
+        self.check_run()
+        return self._escalations
+
+    @property
+    def stats(self):
+        """
+        Dictionary of the solver statistics and timings of the last solve,
+        see solver_stats.py. None if the stored solution was not made by
+        one of the solve methods.
+        """
+        self.check_run()
+        return self._stats
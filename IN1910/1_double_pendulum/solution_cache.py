@@ -0,0 +1,148 @@
+"""
+An on-disk cache of solved trajectories, which Pendulum, DampenedPendulum
+and DoublePendulum can use by passing a SolutionCache to solve.
+
+Every solution is saved as a .npy file named after a hash of everything
+that decides the result: the class, its parameters and method, the initial
+values, T and dt, the source code of the solver modules, and the versions
+of NumPy and SciPy. Editing the solvers, or upgrading solve_ivp, therefore
+never returns stale results. Solutions are loaded back
+memory-mapped, so a repeated solve only takes milliseconds.
+
+The cache is bounded in size, when it grows too large the least recently
+used solutions are removed.
+"""
+
+import hashlib
+import inspect
+import json
+import os
+import sys
+import numpy as np
+import scipy
+
+import pendulum_kernels
+import integrators
+import elliptic
+import pendulum_model
+import energy_monitor
+
+
+SOLVER_MODULES = (pendulum_model, energy_monitor, pendulum_kernels,
+                  integrators, elliptic)
+
+_source_hashes = {}
+
+
+def source_hash(model):
+    """
+    Returns a hash of the source code of the module defining the __call__
+    method of model, together with SOLVER_MODULES: the shared solve code,
+    the energy checks, kernels, integrators and exact solutions it may
+    use.
+    Works as the version of the solver in the cache keys.
+    """
+    module = sys.modules[type(model).__call__.__module__]
+    if module.__name__ not in _source_hashes:
+        sha = hashlib.sha256()
+        for mod in (module,) + SOLVER_MODULES:
+            sha.update(inspect.getsource(mod).encode())
+        _source_hashes[module.__name__] = sha.hexdigest()
+    return _source_hashes[module.__name__]
+
+
+class SolutionCache():
+    """
+    A folder of solved trajectories, with least recently used eviction.
+    """
+
+    def __init__(self, folder = ".pendulum_cache", max_bytes = 500e6):
+        """
+        folder: the folder the solutions are stored in, it is made if it
+                does not exist
+        max_bytes: the largest total size of the stored solutions, in bytes
+        """
+        self.folder = folder
+        self.max_bytes = max_bytes
+        os.makedirs(folder, exist_ok=True)
+
+    def key(self, model, y0, T, dt):
+        """
+        Returns the key of the solution of model from initial values y0
+        (in radians) over time T, with timestep dt.
+        """
+        content = {"model": type(model).__call__.__qualname__,
+                   "parameters": model._parameters(),
+                   "y0": np.asarray(y0, dtype=np.float64).tolist(),
+                   "T": float(T),
+                   "dt": float(dt),
+                   "source": source_hash(model),
+                   "versions": [np.__version__, scipy.__version__]}
+        text = json.dumps(content, sort_keys=True, default=str)
+        return hashlib.sha256(text.encode()).hexdigest()
+
+    def _path(self, key):
+        "Path of the file holding the solution stored under key"
+        return os.path.join(self.folder, "%s.npy" %(key))
+
+    def get(self, key):
+        """
+        Returns the stored solution (t, y) for key, memory-mapped and
+        read-only, or None if it is not in the cache.
+        """
+        path = self._path(key)
+        try:
+            store = np.load(path, mmap_mode="r")
+        except (FileNotFoundError, ValueError):
+            return None
+        # The modification time marks when a solution was last used
+        os.utime(path)
+        return store[0], store[1:]
+
+    def put(self, key, t, y):
+        """
+        Stores the solution (t, y) under key, then removes the least
+        recently used solutions until the cache fits within max_bytes.
+        """
+        path = self._path(key)
+        temp = "%s.%d.tmp" %(path, os.getpid())
+        with open(temp, "wb") as outfile:
+            np.save(outfile, np.vstack((t, y)))
+        os.replace(temp, path)
+        self._evict(keep = path)
+
+    def _evict(self, keep = None):
+        """
+        Removes the least recently used solutions until the total size is at
+        most max_bytes. The file keep is never removed.
+        """
+        files = []
+        for name in os.listdir(self.folder):
+            if name.endswith(".npy"):
+                path = os.path.join(self.folder, name)
+                stat = os.stat(path)
+                files.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            if path != keep:
+                os.remove(path)
+                total -= size
+
+    def size(self):
+        """
+        Returns the total size of the stored solutions, in bytes.
+        """
+        return sum(os.path.getsize(os.path.join(self.folder, name))
+                   for name in os.listdir(self.folder)
+                   if name.endswith(".npy"))
+
+    def clear(self):
+        """
+        Removes every stored solution.
+        """
+        for name in os.listdir(self.folder):
+            if name.endswith(".npy"):
+                os.remove(os.path.join(self.folder, name))
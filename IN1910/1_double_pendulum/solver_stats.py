@@ -0,0 +1,118 @@
+"""
+Statistics recorded by the solve methods of Pendulum, DampenedPendulum
+and DoublePendulum, found in their stats property after a solve.
+
+The statistics of a solve are a dictionary holding
+
+method: the method which gave the stored solution
+nfev: number of right hand side evaluations
+njev: number of jacobian evaluations, None for the fixed step methods
+nlu: number of LU decompositions, None for the fixed step methods
+steps: number of accepted steps, None where solve_ivp does not tell
+success: False if the solver failed before reaching T
+message: the reason the solver stopped
+cached: True if the solution was loaded from a cache
+integration_time: wall time spent integrating, in seconds
+post_processing_time: wall time spent on the rest of the solve, storing
+                      the solution and adding it to the cache. The
+                      derived properties are computed later, when they
+                      are first used, and are not counted.
+
+When a solve integrates more than once, in windows or by escalating, see
+energy_monitor.py, the counts and times are summed over every attempt.
+
+Every function added with add_hook is called as hook(model, stats) at the
+end of each solve, to pass the statistics on to a metrics pipeline.
+"""
+
+import time
+
+
+_hooks = []
+
+
+def add_hook(hook):
+    """
+    Adds hook, a function hook(model, stats), to be called after every
+    solve.
+    """
+    _hooks.append(hook)
+
+
+def remove_hook(hook):
+    """
+    Removes a hook added with add_hook.
+    """
+    _hooks.remove(hook)
+
+
+def new(method):
+    """
+    Returns the statistics of a solve with method which has not
+    integrated anything yet.
+    """
+    return {"method": method, "nfev": 0, "njev": None, "nlu": None,
+            "steps": 0, "success": True, "message": None, "cached": False,
+            "integration_time": 0.0, "post_processing_time": 0.0}
+
+
+def _add(stats, name, value):
+    "Adds value to stats[name], where None means not known"
+    if value is None or stats[name] is None:
+        stats[name] = None
+    else:
+        stats[name] += int(value)
+
+
+def add_solution(stats, sol, method, steps = None):
+    """
+    Adds the counts of the solve_ivp result sol to stats.
+
+    steps: number of accepted steps, found from the dense output of sol if
+           it is None
+    """
+    if steps is None and sol.sol is not None:
+        steps = len(sol.sol.ts) - 1
+    stats["method"] = method
+    _add(stats, "nfev", sol.nfev)
+    stats["njev"] = (stats["njev"] or 0) + int(sol.njev)
+    stats["nlu"] = (stats["nlu"] or 0) + int(sol.nlu)
+    _add(stats, "steps", steps)
+    stats["success"] = bool(sol.success)
+    stats["message"] = sol.message
+
+
+def add_fixed_step(stats, method, steps, nfev):
+    """
+    Adds the counts of a fixed step integration to stats.
+    """
+    stats["method"] = method
+    _add(stats, "nfev", nfev)
+    _add(stats, "steps", steps)
+    stats["message"] = "%s reached the end of the integration interval." %(
+        method)
+
+
+def add_exact(stats):
+    """
+    Records in stats that the exact solution was used, without any
+    evaluations.
+    """
+    stats["method"] = "Elliptic"
+    stats["steps"] = None
+    stats["message"] = "The exact solution was evaluated."
+
+
+def finish(model, stats, start, integrated):
+    """
+    Adds the times to stats, from the start of the solve to the end of the
+    integration and from there to now, stores stats in model and calls
+    the hooks.
+
+    start, integrated: times from time.perf_counter
+    """
+    stats["integration_time"] += integrated - start
+    stats["post_processing_time"] += time.perf_counter() - integrated
+    model._stats = stats
+    for hook in _hooks:
+        hook(model, stats)
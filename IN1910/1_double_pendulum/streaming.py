@@ -0,0 +1,165 @@
+"""
+Functions to solve very long simulations in time windows, so the whole
+solution never has to be held in memory at once, and to extend a stored
+solution further in time without solving from t = 0 again.
+
+Used by the solve_chunks, solve_to_file and extend methods of
+PendulumModel, see pendulum_model.py. A model only needs the _integrate,
+_check_angles, _state and _store methods the pendulum models share.
+"""
+
+import os
+import numpy as np
+
+
+def solve_chunks(model, y0, T, dt, window = 100, angles = "rad"):
+    """
+    Solves an initial value problem for model in windows of length window,
+    each window continuing from the last state of the previous one.
+
+    The time values are the same as those solve would use,
+    np.linspace(0, T, int(T/dt)+1), but they are only made one window
+    at a time.
+
+    input
+    model: a Pendulum, DampenedPendulum, DoublePendulum or ChainPendulum
+           instance
+    y0, T, dt, angles: see the solve method of the model
+    window: length of each window, in the same unit of time as T
+
+    output
+    a generator yielding (t, y) for each window, where y has the shape
+    (len(y0), len(t)). Every value is yielded exactly once, so after the
+    first window the starting point of a window is left out. If the solver
+    fails within a window, a ValueError is raised with its message.
+    """
+    y0 = np.asarray(model._check_angles(y0, angles), dtype=np.float64)
+
+    n = int(T/dt)
+    h = T/n if n > 0 else 0.0
+    steps = max(1, int(round(window/h))) if h > 0 else 1
+
+    start = 0
+    while True:
+        stop = min(start + steps, n)
+        t_vals = np.arange(start, stop + 1) * h
+        t, y, _ = model._integrate(y0, t_vals)
+        y0 = y[:, -1]
+
+        if start == 0:
+            yield t, y
+        else:
+            yield t[1:], y[:, 1:]
+
+        start = stop
+        if start >= n:
+            break
+
+
+def solve_to_file(model, filename, y0, T, dt, window = 100, angles = "rad"):
+    """
+    Solves an initial value problem window by window with solve_chunks, and
+    writes the windows into a memory-mapped .npy file as they are done.
+
+    The file holds an array of shape (1 + len(y0), int(T/dt)+1), the first
+    row being the time values and the rest the solution. When the solve is
+    finished the file is opened again read-only and stored in the model, so
+    the properties read from the disk, only loading the parts they use.
+    If a window fails, the file is removed and a ValueError raised.
+
+    filename: name of the file, ".npy" is added if it is missing
+    See solve_chunks for the other arguments.
+
+    Returns the name of the file.
+    """
+    if not filename.endswith(".npy"):
+        filename = "%s.npy" %(filename)
+
+    n = int(T/dt)
+    store = None
+    i = 0
+    try:
+        for t, y in solve_chunks(model, y0, T, dt, window, angles):
+            if store is None:
+                store = np.lib.format.open_memmap(filename, mode="w+",
+                                                  dtype=np.float64,
+                                                  shape=(1 + len(y), n + 1))
+            store[0, i:i+len(t)] = t
+            store[1:, i:i+len(t)] = y
+            i += len(t)
+        if i != n + 1:
+            raise ValueError("Only %d of the %d values were solved for."
+                             %(i, n + 1))
+    except ValueError:
+        # A failed window would leave a file that looks like a whole
+        # solution, with the unsolved values left as zeros
+        store = None
+        if os.path.exists(filename):
+            os.remove(filename)
+        raise
+
+    store.flush()
+    del store
+
+    load(model, filename)
+    return filename
+
+
+def load(model, filename):
+    """
+    Opens a file written by solve_to_file read-only, and stores it as the
+    solution of model.
+    """
+    store = np.load(filename, mmap_mode="r")
+    # solve_to_file only keeps files holding every value of the solve
+    n = store.shape[1]
+    dt = (store[0, -1] - store[0, 0]) / (n - 1) if n > 1 else None
+    model._store(store[0], store[1:], dt = dt)
+
+
+def extend(model, T_more):
+    """
+    Continues the stored solution of model from its last state for another
+    T_more units of time, with the same timestep, and appends the result.
+
+    The solution is kept in a buffer with room to spare, which is doubled
+    when it runs full, so repeated extensions only copy the old values
+    now and then and the total work stays linear in the final length.
+
+    Only solutions stored at every timestep by solve, solve_to_file or an
+    earlier extend can be extended, as the timestep is kept from them.
+    """
+    model.check_run()
+    y_end = model._state(-1)
+    if np.ndim(y_end) != 1:
+        raise ValueError("Ensemble solutions can not be extended.")
+
+    h = model._dt
+    if h is None:
+        raise ValueError("Only solutions stored at every timestep can be "
+                         "extended, not only_events or resampled ones.")
+    t = model._t
+    n = len(t)
+    m = int(round(T_more/h))
+    if m < 1:
+        return
+
+    t_vals = t[-1] + np.arange(m + 1) * h
+    t_new, y_new, _ = model._integrate(y_end, t_vals)
+    if len(t_new) != m + 1:
+        raise ValueError("Only %d of the %d new values were solved for."
+                         %(len(t_new) - 1, m))
+
+    buffer = getattr(model, "_buffer", None)
+    if buffer is None or t.base is not buffer or n + m > buffer.shape[1]:
+        capacity = max(2*n, n + m)
+        new_buffer = np.empty((1 + len(y_end), capacity))
+        new_buffer[0, :n] = t
+        new_buffer[1:, :n] = model._state()
+        buffer = new_buffer
+
+    buffer[0, n:n+m] = t_new[1:]
+    buffer[1:, n:n+m] = y_new[:, 1:]
+
+    model._store(buffer[0, :n+m], buffer[1:, :n+m], dt = h)
+    model._buffer = buffer
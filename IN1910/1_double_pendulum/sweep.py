@@ -0,0 +1,183 @@
+"""
+Runs parameter sweeps of the DoublePendulum class over a process pool.
+
+Every run is reduced to a few summary values as soon as it is solved, so
+the full trajectories are never kept or sent between processes. The
+workers write their summaries straight into a shared memory array, which
+is returned as a table of columns, one numpy array per parameter and per
+summary value.
+"""
+
+import itertools
+import multiprocessing as mp
+from multiprocessing import shared_memory
+import numpy as np
+from double_pendulum import DoublePendulum
+import energy_monitor
+
+
+PARAMETERS = ("M1", "M2", "L1", "L2", "g",
+              "theta_1", "omega_1", "theta_2", "omega_2")
+SUMMARIES = ("energy_drift", "flip_time", "max_theta_2")
+
+DEFAULTS = {"M1": 1, "M2": 1, "L1": 1, "L2": 1, "g": 9.81,
+            "theta_1": 0, "omega_1": 0, "theta_2": 0, "omega_2": 0}
+
+
+def parameter_grid(**values):
+    """
+    Returns the table of every combination of the given values.
+
+    Takes keyword arguments from PARAMETERS, each a list of values, e.g.
+    parameter_grid(M2 = [0.5, 1, 2], theta_1 = np.linspace(0, np.pi, 10)).
+    Parameters which are not given keep the value in DEFAULTS.
+    """
+    for name in values:
+        if name not in PARAMETERS:
+            raise ValueError("Unknown parameter %s." %(name))
+
+    names = list(values)
+    combinations = list(itertools.product(*[values[name] for name in names]))
+    table = {}
+    for name in PARAMETERS:
+        if name in values:
+            i = names.index(name)
+            table[name] = np.array([c[i] for c in combinations], dtype=float)
+        else:
+            table[name] = np.full(len(combinations), DEFAULTS[name],
+                                  dtype=float)
+    return table
+
+
+def first_flip_time(t, theta_1, theta_2):
+    """
+    Returns the first time either pendulum flips over the top, that is
+    when |theta_1| or |theta_2| first exceeds pi. Returns nan if neither
+    pendulum flips.
+    """
+    flipped = (np.abs(theta_1) > np.pi) | (np.abs(theta_2) > np.pi)
+    if not np.any(flipped):
+        return np.nan
+    return t[np.argmax(flipped)]
+
+
+def summarise(P_dub):
+    """
+    Returns the summary values of a solved DoublePendulum, in the order of
+    SUMMARIES.
+
+    energy_drift: the largest change in total energy from the start
+    flip_time: see first_flip_time
+    max_theta_2: the largest |theta_2| reached
+    """
+    E = P_dub.Kinetic + P_dub.Potential
+    return (np.max(np.abs(E - E[0])),
+            first_flip_time(P_dub.t, P_dub.theta_1, P_dub.theta_2),
+            np.max(np.abs(P_dub.theta_2)))
+
+
+def run_one(row, T, dt, method, energy_tol = None):
+    """
+    Solves the run described by row, a dictionary holding every name in
+    PARAMETERS, and returns its summary values.
+
+    energy_tol: optional largest energy drift allowed, a run drifting
+                further is stopped as soon as it does and gets nan for
+                every summary value. See energy_monitor.py.
+    """
+    P_dub = DoublePendulum(row["M1"], row["M2"], row["L1"], row["L2"],
+                           row["g"], method)
+    try:
+        P_dub.solve((row["theta_1"], row["omega_1"],
+                     row["theta_2"], row["omega_2"]), T, dt,
+                    energy_tol = energy_tol)
+    except energy_monitor.EnergyDriftError:
+        return (np.nan,) * len(SUMMARIES)
+    return summarise(P_dub)
+
+
+_worker = {}
+
+
+def _init_worker(name, shape, table, T, dt, method, energy_tol):
+    """
+    Run once in every worker process, attaches the shared memory block the
+    summaries are written to.
+    """
+    shm = shared_memory.SharedMemory(name=name)
+    _worker["shm"] = shm
+    _worker["out"] = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+    _worker["args"] = (table, T, dt, method, energy_tol)
+
+
+def _run_index(i):
+    """
+    Solves run number i in a worker process, and writes its summaries into
+    the shared memory.
+    """
+    table, T, dt, method, energy_tol = _worker["args"]
+    row = {name: table[name][i] for name in PARAMETERS}
+    _worker["out"][i] = run_one(row, T, dt, method, energy_tol)
+
+
+def run_sweep(table, T, dt, method = "RK4", processes = None,
+              energy_tol = None):
+    """
+    Solves every run in table over a pool of processes.
+
+    input
+    table: dictionary of parameter columns, see parameter_grid
+    T: total time to solve each run for
+    dt: timestep to use when solving
+    method: the method each DoublePendulum uses
+    processes: number of worker processes, defaults to the number of cores
+    energy_tol: optional largest energy drift allowed, runs drifting
+                further are abandoned early and get nan summaries, see
+                run_one
+
+    output
+    the table, with a column added for each name in SUMMARIES
+    """
+    n = len(table[PARAMETERS[0]])
+    shape = (n, len(SUMMARIES))
+    table = {name: np.asarray(table[name], dtype=float) for name in PARAMETERS}
+
+    shm = shared_memory.SharedMemory(create=True,
+                                     size=max(1, n*len(SUMMARIES)*8))
+    try:
+        out = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+        out[:] = np.nan
+
+        pool = mp.Pool(processes = processes, initializer = _init_worker,
+                       initargs = (shm.name, shape, table, T, dt, method,
+                                   energy_tol))
+        chunksize = max(1, n // (4 * (processes or mp.cpu_count())))
+        for _ in pool.imap_unordered(_run_index, range(n), chunksize):
+            pass
+        pool.close()
+        pool.join()
+
+        result = dict(table)
+        for j, name in enumerate(SUMMARIES):
+            result[name] = out[:, j].copy()
+        del out
+    finally:
+        shm.close()
+        shm.unlink()
+
+    return result
+
+
+if __name__ == "__main__":
+
+    table = parameter_grid(M2 = [0.5, 1, 2],
+                           theta_1 = np.linspace(0, np.pi, 20),
+                           theta_2 = np.linspace(0, np.pi, 20))
+    result = run_sweep(table, T = 20, dt = 0.01)
+
+    print("%8s %8s %8s %12s %10s" %("M2", "theta_1", "theta_2",
+                                    "E drift", "flip time"))
+    for i in range(0, len(result["M2"]), 40):
+        print("%8.2f %8.3f %8.3f %12.3e %10.2f" %(result["M2"][i],
+              result["theta_1"][i], result["theta_2"][i],
+              result["energy_drift"][i], result["flip_time"][i]))
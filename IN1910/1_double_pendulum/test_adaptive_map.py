@@ -0,0 +1,121 @@
+import numpy as np
+import time
+from adaptive_map import AdaptiveMap, FlipTimeOutcome, SweepOutcome
+from flip_map import FlipMap
+import pytest
+
+
+def step(x, y):
+    "Outcome with a sharp boundary along a circle"
+    return np.where(x**2 + y**2 < 1, 1.0, np.nan)
+
+
+def smooth(x, y):
+    "Outcome without any structure"
+    return x + 2*y
+
+
+class TestAdaptiveMap():
+    """
+    Utilised to test the quadtree sampler, see adaptive_map.py
+    """
+
+    def test_boundary(self):
+        """
+        Checks that only the cells along a boundary are refined, and that
+        the raster still matches the outcome almost everywhere.
+        """
+        AM = AdaptiveMap(step, (-2, 2), (-2, 2), start = 8, depth = 4)
+        AM.compute(processes = 1)
+
+        X, Y = np.meshgrid(AM.x, AM.y)
+        exact = step(X, Y)
+
+        msg = "Raster does not match the outcome"
+        assert AM.image.shape == ((AM.N + 1), (AM.N + 1)), msg
+        wrong = np.isnan(AM.image) != np.isnan(exact)
+        assert np.mean(wrong) < 0.01, msg
+
+        msg = "Too many points solved for"
+        assert AM.n_solves < 0.3 * (AM.N + 1)**2, msg
+
+    def test_smooth(self):
+        """
+        Checks that a smooth outcome is never refined, and that the
+        bilinear raster then reproduces it exactly.
+        """
+        AM = AdaptiveMap(smooth, start = 4, depth = 3, tol = 100)
+        AM.compute(processes = 1)
+
+        X, Y = np.meshgrid(AM.x, AM.y)
+        msg = "Smooth outcome should not be refined"
+        assert AM.n_solves == 25, msg
+        assert np.max(np.abs(AM.image - smooth(X, Y))) < 1e-12, msg
+
+    def test_flip_time(self):
+        """
+        Checks the flip times solved over a pool of processes against the
+        uniform flip map on the same lattice.
+        """
+        AM = AdaptiveMap(FlipTimeOutcome(T = 5), (1, 3), (1, 3),
+                         start = 2, depth = 2)
+        AM.compute(batch = 4, processes = 2)
+
+        FM = FlipMap(n = AM.N + 1, theta_lim = (1, 3))
+        FM.compute(T = 5, processes = 1)
+
+        msg = "Flip times differ from the flip map"
+        for (i, j), v in AM.values.items():
+            if np.isnan(v):
+                assert np.isnan(FM.image[j, i]), msg
+            else:
+                assert abs(v - FM.image[j, i]) < 1e-10, msg
+
+    def test_faster_than_uniform(self):
+        """
+        Checks that the adaptive flip map solves fewer points, and takes
+        less time, than the uniform flip map at the same resolution, and
+        that the points it solves agree with it.
+        """
+        AM = AdaptiveMap(FlipTimeOutcome(T = 5), (-3, 3), (-3, 3),
+                         start = 4, depth = 5)
+        start = time.perf_counter()
+        AM.compute(processes = 1)
+        t_adaptive = time.perf_counter() - start
+
+        FM = FlipMap(n = AM.N + 1, theta_lim = (-3, 3))
+        start = time.perf_counter()
+        FM.compute(T = 5, processes = 1)
+        t_uniform = time.perf_counter() - start
+
+        msg = "Adaptive map not cheaper than the uniform map"
+        assert AM.n_solves < 0.5 * (AM.N + 1)**2, msg
+        assert t_adaptive < t_uniform, msg
+
+        msg = "Flip times differ from the flip map"
+        i, j = np.array(list(AM.values)).T
+        v = np.array(list(AM.values.values()))
+        assert np.array_equal(np.isnan(v), np.isnan(FM.image[j, i])), msg
+        assert np.nanmax(np.abs(v - FM.image[j, i])) < 1e-10, msg
+
+    def test_sweep_outcome(self):
+        """
+        Checks the summaries of sweep.py as an outcome.
+        """
+        outcome = SweepOutcome("max_theta_2", T = 1, dt = 0.01)
+        msg = "Pendulum at rest should stay at rest"
+        assert outcome(np.zeros(2), np.zeros(2))[0] == 0, msg
+
+        with pytest.raises(ValueError):
+            SweepOutcome("colour")
+        with pytest.raises(ValueError):
+            SweepOutcome(axes = ("theta_1", "phi"))
+
+
+if __name__ == "__main__":
+    P_test = TestAdaptiveMap()
+    P_test.test_boundary()
+    P_test.test_smooth()
+    P_test.test_flip_time()
+    P_test.test_faster_than_uniform()
+    P_test.test_sweep_outcome()
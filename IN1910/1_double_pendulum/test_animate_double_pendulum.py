@@ -1,11 +1,41 @@
 import scipy.integrate as spi
 import numpy as np
 import matplotlib.pyplot as plt
-from double_pendulum import DoublePendulum
-from animate_double_pendulum import AnimateDoublePendulum
+from matplotlib import animation
+from animate_double_pendulum import AnimateDoublePendulum, AnimateChainPendulum
+from animate_double_pendulum import AnimateEnsemble
+import os
+import tempfile
+import time
+import parallel_render
+import traces
 import pytest
 
 
+class SavedFrames(animation.AbstractMovieWriter):
+    """
+    Writer keeping every frame of a serial save as a numbered png file,
+    drawn by figure.savefig as the ffmpeg writer draws the frames it pipes.
+    """
+
+    def __init__(self, folder, fps):
+        animation.AbstractMovieWriter.__init__(self, fps = fps)
+        self.folder = folder
+        self.n_frames = 0
+
+    def setup(self, fig, outfile, dpi = None):
+        animation.AbstractMovieWriter.setup(self, fig, outfile, dpi)
+
+    def grab_frame(self, **savefig_kwargs):
+        name = parallel_render.FRAME_NAME % self.n_frames
+        self.fig.savefig(os.path.join(self.folder, name), format = "png",
+                         dpi = self.dpi, **savefig_kwargs)
+        self.n_frames += 1
+
+    def finish(self):
+        pass
+
+
 class TestAnimateDoublePendulum():
     """
     Utilised to test the AnimateDoublePendulum class, basically a carbon copy
@@ -80,9 +110,297 @@ class TestAnimateDoublePendulum():
             P_dub.Potential
             P_dub.Kinetic
 
+    def test_real_time_resample(self):
+        """
+        Checks that real_time_animation reuses the stored solution when only
+        the frame rate changes, and solves again for new initial values.
+        """
+        P_dub = AnimateDoublePendulum(fps = 30)
+        y0 = (np.pi / 4, 0, 0, 0)
+        T = 5
+
+        P_dub.real_time_animation(y0, T)
+        dense = P_dub._dense
+        msg = "Frame times not correct"
+        assert len(P_dub.t) == 30*T + 1, msg
+
+        P_dub.fps = 60
+        P_dub.real_time_animation(y0, T)
+        assert len(P_dub.t) == 60*T + 1, msg
+        assert P_dub._dense is dense, "Solver was run again"
+
+        P_dub.real_time_animation((np.pi / 2, 0, 0, 0), T)
+        assert P_dub._dense is not dense, "Solver was not run again"
+
+    def test_parallel_frames(self):
+        """
+        Checks that drawing the frames in several segments over a pool of
+        processes gives the same images as a serial save of the whole
+        animation, the way save_animation does it with one process.
+        """
+        msg = "Segments do not cover the frames in order"
+        assert parallel_render.segments(10, 3) == [(0, 3), (3, 7), (7, 10)], msg
+        assert parallel_render.segments(2, 4) == [(0, 1), (1, 2)], msg
+
+        P_dub = AnimateDoublePendulum(fps = 40, inc_trace = True,
+                                      method = "RK4")
+        P_dub.real_time_animation((np.pi / 2, 0, np.pi, 0), 2)
+
+        with tempfile.TemporaryDirectory() as folder:
+            serial = os.path.join(folder, "serial")
+            parallel = os.path.join(folder, "parallel")
+            os.mkdir(serial)
+            os.mkdir(parallel)
+            writer = SavedFrames(serial, P_dub.fps)
+            P_dub.create_animation()
+            P_dub.anim.save(os.path.join(serial, "serial.mp4"),
+                            writer = writer, dpi = 30)
+            plt.close(P_dub.fig)
+            n = writer.n_frames
+            m = parallel_render.render_frames(P_dub, parallel, 30, 2, 4)
+
+            msg = "Wrong number of frames drawn"
+            assert n == m == len(P_dub.t), msg
+
+            msg = "Frames drawn in segments differ from a serial render"
+            for i in range(n):
+                name = parallel_render.FRAME_NAME % i
+                image_1 = plt.imread(os.path.join(serial, name))
+                image_2 = plt.imread(os.path.join(parallel, name))
+                assert np.array_equal(image_1, image_2), msg
+
+    def test_trace_buffer(self):
+        """
+        Checks that the ring buffer keeps the last points in order, both
+        when following frames are appended and after a jump.
+        """
+        x = np.arange(20.0)
+        y = -x
+        buffer = traces.TraceBuffer(5)
+
+        msg = "Ring buffer does not hold the last points in order"
+        for i in range(12):
+            buffer.update(x, y, i)
+            x_tail, y_tail = buffer.ordered()
+            assert np.array_equal(x_tail, x[max(0, i-4):i+1]), msg
+            assert np.array_equal(y_tail, y[max(0, i-4):i+1]), msg
+
+        buffer.update(x, y, 2)
+        assert np.array_equal(buffer.ordered()[0], x[0:3]), msg
+        buffer.update(x, y, 5)
+        assert np.array_equal(buffer.ordered()[0], x[1:6]), msg
+        buffer.update(x, y, 17)
+        assert np.array_equal(buffer.ordered()[0], x[13:18]), msg
+
+        segments, alphas = traces.fading_segments(x[:4], y[:4])
+        msg = "Fading segments not correct"
+        assert segments.shape == (3, 2, 2), msg
+        assert np.allclose(alphas, [1/3, 2/3, 1]), msg
+
+    def test_trace_modes(self):
+        """
+        Checks that every trace mode draws, that the whole trace is baked
+        in chunks, and that the baked trace looks like a plain line.
+        """
+        y0 = (np.pi / 2, 0, np.pi, 0)
+        for settings in ({}, {"trace_length": 20},
+                         {"trace_length": 20, "trace_fade": True}):
+            P_dub = AnimateDoublePendulum(fps = 30, inc_trace = True,
+                                          method = "RK4", **settings)
+            P_dub.real_time_animation(y0, 5)
+            P_dub.create_animation(blit = False)
+            for i in (0, 1, 2, 140, 141):
+                P_dub._next_frame_trace(i)
+                P_dub.fig.canvas.draw()
+            image = np.asarray(P_dub.fig.canvas.buffer_rgba()).astype(int)
+
+            msg = "Old artist names not kept"
+            assert P_dub.pendulum_1 is P_dub.bobs, msg
+            assert P_dub.line_2 is P_dub.arms, msg
+            assert P_dub.trace_2 is P_dub.traces[1], msg
+
+            if not settings:
+                msg = "Trace not baked in chunks"
+                assert P_dub.traces[0]._baked == 100, msg
+
+                ax = P_dub.fig.axes[0]
+                ax.set_autoscale_on(False)
+                for trace in P_dub.traces:
+                    x, y = trace.get_data()
+                    trace.remove()
+                    ax.plot(x, y, c = "b", ls = "--", lw = 0.5)
+                P_dub.fig.canvas.draw()
+                plain = np.asarray(P_dub.fig.canvas.buffer_rgba()).astype(int)
+
+                msg = "Baked trace does not look like a plain line"
+                assert np.mean(np.abs(image - plain)) < 0.5, msg
+
+            plt.close(P_dub.fig)
+
+    def test_duration(self):
+        """
+        Checks that an animation with a duration gets duration*fps frames
+        evenly spread over a finely solved solution, independent of dt,
+        and that every value is a frame without a duration.
+        """
+        P_dub = AnimateDoublePendulum(fps = 30, method = "RK4")
+        P_dub.solve((np.pi / 2, 0, np.pi, 0), 10, 0.001)
+
+        P_dub.create_animation(blit = False, duration = 10)
+        plt.close(P_dub.fig)
+        indices = P_dub.frame_indices
+        msg = "Frames not picked by fps and duration"
+        assert len(indices) == 301, msg
+        assert np.max(np.abs(P_dub.t[indices] - np.linspace(0, 10, 301))) <= 0.0005, msg
+        assert P_dub.anim._interval == 1000/30, msg
+
+        P_dub.create_animation(blit = False, duration = 5)
+        plt.close(P_dub.fig)
+        msg = "Shorter video should show the same time span"
+        assert len(P_dub.frame_indices) == 151, msg
+        assert P_dub.frame_indices[-1] == len(P_dub.t) - 1, msg
+
+        P_dub.create_animation(blit = False)
+        plt.close(P_dub.fig)
+        msg = "Every stored value should be a frame without a duration"
+        assert len(P_dub.frame_indices) == len(P_dub.t), msg
+
+        P_dub.solve((np.pi / 2, 0, np.pi, 0), 10, 0.1)
+        P_dub.create_animation(blit = False, duration = 10)
+        plt.close(P_dub.fig)
+        msg = "Frames repeated for a coarse solution"
+        assert len(P_dub.frame_indices) == len(P_dub.t), msg
+
+    def test_chain_animation(self):
+        """
+        Checks that a chain pendulum is animated with one line for the arms
+        and one for the pendulums, and only its last pendulum traced.
+        """
+        N = 6
+        P_chain = AnimateChainPendulum(N = N, L = 0.3, fps = 30,
+                                       inc_trace = True)
+        P_chain.real_time_animation(np.concatenate((np.full(N, np.pi/2),
+                                                    np.zeros(N))), 2)
+        P_chain.create_animation(blit = False)
+        artists = P_chain._next_frame_trace(40)
+        plt.close(P_chain.fig)
+
+        msg = "Chain not drawn at the stored positions"
+        x, y = P_chain.arms.get_data()
+        assert len(x) == N + 1 and x[0] == 0 and y[0] == 0, msg
+        assert np.array_equal(x[1:], P_chain.x[:, 40]), msg
+        assert np.array_equal(P_chain.bobs.get_data()[1], P_chain.y[:, 40]), msg
+
+        msg = "Only the end of the chain should be traced"
+        assert len(P_chain.traces) == 1, msg
+        assert np.array_equal(P_chain.traces[0].get_data()[0],
+                              P_chain.x[-1, :41]), msg
+        assert len(artists) == 4, msg
+
+    def test_live_animation(self):
+        """
+        Checks that the live playback keeps the solver at most queue_size
+        frames ahead, shows the frames in step with the wall clock,
+        dropping those it is late for, and draws the solved positions.
+        """
+        y0 = (np.pi/2, 0, np.pi, 0)
+        P_dub = AnimateDoublePendulum(method = "RK4", fps = 20,
+                                      inc_trace = True)
+        P_dub.create_live_animation(y0, 2, queue_size = 5)
+        playback = P_dub.playback
+        waited = 0
+        while not playback.frames.full() and waited < 10:
+            time.sleep(0.01)
+            waited += 0.01
+        time.sleep(0.2)
+        msg = "Solver not held back by the bounded queue"
+        assert playback.frames.qsize() == 5, msg
+        assert np.all(np.isnan(playback.t)), msg
+        playback.stop()
+        plt.close(P_dub.fig)
+
+        P_dub.create_live_animation(y0, 2, queue_size = 50)
+        playback = P_dub.playback
+        playback._thread.join()
+        msg = "Frames not shown in step with the clock"
+        assert playback.next_index(now = 5) == 0, msg
+        assert playback.next_index(now = 5.01) is None, msg
+        assert playback.next_index(now = 5.5) == 10, msg
+        assert playback.dropped == 9 and playback.shown == 2, msg
+        assert not playback.finished, msg
+
+        P_dub._live_func(10)
+        assert playback.next_index(now = 100) == 40, msg
+        assert playback.finished, msg
+        P_dub._next_live_frame(None)
+        plt.close(P_dub.fig)
+
+        msg = "Live playback not drawn at the solved positions"
+        P_solved = AnimateDoublePendulum(method = "RK4")
+        P_solved.solve(y0, 2, 0.05)
+        assert np.max(np.abs(playback.x[1] - P_solved.x_2)) < 1e-12, msg
+        x, y = P_dub.arms.get_data()
+        assert np.allclose(x[1:], (P_solved.x_1[10], P_solved.x_2[10])), msg
+        trace_x = P_dub.traces[1].get_data()[0]
+        assert np.array_equal(trace_x, playback.x[1, :11]), msg
+
+        msg = "Live playback stored a solution"
+        with pytest.raises(AttributeError):
+            P_dub.t
+
+    def test_ensemble_animation(self):
+        """
+        Checks that an ensemble is drawn by one collection whose paths
+        share the vertex buffer filled each frame, coloured by index.
+        """
+        N = 50
+        y0 = np.zeros((N, 4))
+        y0[:, 0] = np.linspace(1, 1.1, N)
+        y0[:, 2] = np.pi
+        P_ens = AnimateEnsemble(fps = 20)
+        P_ens.solve_ensemble(y0, 1, 0.05)
+        P_ens.create_animation(blit = True)
+        artists = P_ens._next_frame(10)
+        plt.close(P_ens.fig)
+
+        msg = "Ensemble not drawn by one collection sharing the buffer"
+        assert artists == (P_ens.arms, P_ens.txt), msg
+        paths = P_ens.arms.get_paths()
+        assert len(paths) == N, msg
+        assert all(np.shares_memory(path.vertices, P_ens._segments)
+                   for path in paths), msg
+
+        msg = "Ensemble not drawn at the solved positions"
+        assert np.array_equal(paths[7].vertices[0], (0, 0)), msg
+        assert np.allclose(P_ens._segments[:, 1, 0], P_ens.x_1[:, 10]), msg
+        assert np.allclose(P_ens._segments[:, 2, 1], P_ens.y_2[:, 10]), msg
+
+        msg = "Arms not coloured by index"
+        colors = P_ens.arms.get_colors()
+        assert len(colors) == N and not np.allclose(colors[0], colors[-1]), msg
+
+        P_one = AnimateEnsemble(color_by_index = False, color = "r")
+        P_one.solve(y0[0], 1, 0.05)
+        P_one.create_animation(blit = False)
+        P_one._next_frame(3)
+        plt.close(P_one.fig)
+        msg = "A single solution not drawn as an ensemble of one"
+        assert len(P_one.arms.get_paths()) == 1, msg
+        assert np.allclose(P_one._segments[0, 2], (P_one.x_2[3], P_one.y_2[3])), msg
+        assert np.allclose(P_one.arms.get_colors(), (1, 0, 0, 1)), msg
+
+
 if __name__ == "__main__":
 
     P_test = TestAnimateDoublePendulum()
     P_test.test_at_rest()
     P_test.test_range()
     P_test.test_property_assertion()
+    P_test.test_real_time_resample()
+    P_test.test_parallel_frames()
+    P_test.test_trace_buffer()
+    P_test.test_trace_modes()
+    P_test.test_duration()
+    P_test.test_chain_animation()
+    P_test.test_live_animation()
+    P_test.test_ensemble_animation()
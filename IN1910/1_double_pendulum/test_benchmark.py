@@ -0,0 +1,70 @@
+import json
+import os
+import tempfile
+import benchmark
+
+
+class TestBenchmark():
+    """
+    Utilised to test the solver benchmark, see benchmark.py
+    """
+
+    def test_run_benchmark(self):
+        """
+        Checks that every supported method is run on the cases asked for,
+        that the values are sensible, and that the results survive being
+        written as JSON and compared.
+        """
+        result = benchmark.run_benchmark(T = 2, dt = 0.01,
+                                         cases = ["pendulum_regular",
+                                                  "double_regular"],
+                                         repeat = 1)
+
+        runs = {(r["case"], r["method"]): r for r in result["results"]}
+        msg = "Methods not run on the supported cases only"
+        assert len(runs) == len(benchmark.METHODS) + 7, msg
+        assert ("double_regular", "Verlet") not in runs, msg
+        assert ("pendulum_regular", "Elliptic") in runs, msg
+
+        msg = "Benchmark values not sensible"
+        for r in result["results"]:
+            assert r["wall_time"] > 0 and r["peak_memory"] > 0, msg
+            assert r["max_error"] < 0.1, msg
+            assert r["energy_drift"] < 0.1, msg
+        assert runs[("double_regular", "Radau")]["njev"] > 0, msg
+        rk4 = runs[("double_regular", "RK4")]
+        assert rk4["njev"] is None and rk4["nfev"] == 4*rk4["steps"], msg
+        assert runs[("pendulum_regular", "Elliptic")]["max_error"] < 1e-8, msg
+
+        with tempfile.TemporaryDirectory() as folder:
+            filename = os.path.join(folder, "benchmark.json")
+            benchmark.write(result, filename)
+            with open(filename) as f:
+                loaded = json.load(f)
+            msg = "Results changed by writing them as JSON"
+            assert loaded["results"] == result["results"], msg
+
+            ratios = benchmark.compare(filename, result)
+        msg = "Comparing a benchmark to itself should give ratios of one"
+        for ratio in ratios.values():
+            assert ratio["wall_time"] == 1 and ratio["peak_memory"] == 1, msg
+
+    def test_supported(self):
+        """
+        Checks which methods are run on which models.
+        """
+        msg = "Supported methods not correct"
+        assert benchmark.supported(benchmark.Pendulum, "Verlet"), msg
+        assert not benchmark.supported(benchmark.DampenedPendulum,
+                                       "Verlet"), msg
+        assert not benchmark.supported(benchmark.DampenedPendulum,
+                                       "Elliptic"), msg
+        assert not benchmark.supported(benchmark.DoublePendulum,
+                                       "Elliptic"), msg
+        assert benchmark.supported(benchmark.DoublePendulum, "LSODA"), msg
+
+
+if __name__ == "__main__":
+    P_test = TestBenchmark()
+    P_test.test_run_benchmark()
+    P_test.test_supported()
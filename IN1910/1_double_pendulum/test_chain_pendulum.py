@@ -0,0 +1,135 @@
+import numpy as np
+import pendulum_kernels as pk
+from chain_pendulum import ChainPendulum
+from double_pendulum import DoublePendulum
+import pytest
+
+
+class TestChainPendulum():
+    """
+    Utilised to test the ChainPendulum class
+    """
+
+    def test_at_rest(self):
+        """
+        Checks that a chain hanging straight down remains at rest, and that
+        the time array is correct.
+        """
+        P_chain = ChainPendulum(N = 5)
+        T = 10
+        dt = 0.01
+        tol = 1e-12
+
+        P_chain.solve(np.zeros(10), T, dt)
+
+        msg = "Chain did not remain at rest"
+        assert np.max(np.abs(P_chain.theta)) < tol, msg
+        assert np.max(np.abs(P_chain.omega)) < tol, msg
+
+        msg = "Time array not correct"
+        assert np.max(np.abs(P_chain.t - dt*np.arange(len(P_chain.t)))) < tol, msg
+
+    def test_double_pendulum(self):
+        """
+        Checks that a chain of two gives the same right hand side and
+        solution as DoublePendulum, whose state is ordered differently.
+        """
+        params = {"M": [1.3, 0.7], "L": [0.9, 1.4]}
+        P_chain = ChainPendulum(N = 2, method = "RK45", **params)
+        P_dub = DoublePendulum(M1 = 1.3, M2 = 0.7, L1 = 0.9, L2 = 1.4,
+                               method = "RK45")
+        order = [0, 2, 1, 3]
+        tol = 1e-12
+
+        msg = "Right hand side differs from DoublePendulum"
+        for _ in range(10):
+            u = np.random.uniform(-np.pi, np.pi, 4)
+            u_d = np.array(P_dub(0, u[order]))[order]
+            assert np.max(np.abs(P_chain(0, u) - u_d)) < tol, msg
+
+        y0 = np.array([np.pi/2, np.pi, 0, 0])
+        P_chain.solve(y0, 5, 0.01)
+        P_dub.solve(y0[order], 5, 0.01)
+        msg = "Solution differs from DoublePendulum"
+        assert np.max(np.abs(P_chain.theta[1] - P_dub.theta_2)) < 1e-6, msg
+        assert np.max(np.abs(P_chain.Kinetic - P_dub.Kinetic)) < 1e-6, msg
+        assert np.max(np.abs(P_chain.Potential - P_dub.Potential)) < 1e-6, msg
+
+    def test_kernel(self):
+        """
+        Checks that the compiled kernel, the vectorised __call__ for one and
+        for many states, and the canonical transforms agree.
+        """
+        P_chain = ChainPendulum(N = 6, M = np.linspace(1, 2, 6),
+                                L = np.linspace(0.5, 1, 6))
+        p = P_chain._params()
+        rhs = pk.bind(pk.chain_pendulum_rhs, *p)
+        U = np.random.uniform(-np.pi, np.pi, (12, 8))
+        tol = 1e-10
+
+        msg = "Kernel differs from __call__"
+        batch = P_chain(0, U)
+        for k in range(U.shape[1]):
+            assert np.max(np.abs(rhs(0, U[:, k]) - P_chain(0, U[:, k]))) < tol, msg
+            assert np.max(np.abs(batch[:, k] - P_chain(0, U[:, k]))) < tol, msg
+
+        msg = "Canonical transforms are not each others inverse"
+        Y = np.array([pk.chain_to_canonical(U[:, k], p)
+                      for k in range(U.shape[1])]).T
+        assert np.max(np.abs(pk.chain_from_canonical(Y, p) - U)) < tol, msg
+
+    def test_range_and_energy(self):
+        """
+        Checks that every rod keeps its length, and that the energy error
+        of the symplectic GL4 stays small for a ten link chain.
+        """
+        N = 10
+        P_chain = ChainPendulum(N = N, L = 0.2, method = "GL4")
+        y0 = np.concatenate((np.linspace(0.2, 1, N), np.zeros(N)))
+        P_chain.solve(y0, 5, 0.002)
+
+        msg = "Rod length not correct"
+        x = np.concatenate((np.zeros((1, len(P_chain.t))), P_chain.x))
+        y = np.concatenate((np.zeros((1, len(P_chain.t))), P_chain.y))
+        lengths = np.sqrt(np.diff(x, axis=0)**2 + np.diff(y, axis=0)**2)
+        assert np.max(np.abs(lengths - 0.2)) < 1e-12, msg
+
+        msg = "Energy not kept"
+        E = P_chain.Kinetic + P_chain.Potential
+        assert np.max(np.abs(E - E[0])) < 1e-4, msg
+        assert np.max(np.abs(P_chain._energy(P_chain._state()) - E)) < 1e-12, msg
+
+    def test_interface(self):
+        """
+        Checks the properties before and after solving, the events, and
+        that wrongly sized initial values raise ValueError.
+        """
+        P_chain = ChainPendulum(N = 4)
+        with pytest.raises(AttributeError):
+            P_chain.t
+        with pytest.raises(ValueError):
+            P_chain.solve((0.1, 0, 0.1, 0), 1, 0.01)
+
+        y0 = np.concatenate((np.full(4, np.pi/2), np.full(4, 3.0)))
+        P_chain.solve(y0, 10, 0.01, events = "flip", stop = True)
+        msg = "Flip of the chain not found"
+        t_flip, y_flip = P_chain.events["flip"]
+        assert len(t_flip) == 1, msg
+        assert t_flip[0] - 0.01 < P_chain.t[-1] <= t_flip[0], msg
+        assert np.isclose(np.max(np.abs(y_flip[:4, 0])), np.pi), msg
+
+        P_chain.solve(y0, 2, 0.01)
+        msg = "Properties have the wrong shape"
+        for name in ("theta", "omega", "x", "y", "vx", "vy",
+                     "potential", "kinetic"):
+            assert getattr(P_chain, name).shape == (4, 201), msg
+        assert P_chain.Kinetic.shape == (201,), msg
+
+
+if __name__ == "__main__":
+    P_test = TestChainPendulum()
+    P_test.test_at_rest()
+    P_test.test_double_pendulum()
+    P_test.test_kernel()
+    P_test.test_range_and_energy()
+    P_test.test_interface()
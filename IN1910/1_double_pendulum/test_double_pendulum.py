@@ -77,9 +77,150 @@ class TestDoublePendulum():
             P_dub.Potential
             P_dub.Kinetic
 
+    def test_derived_values(self):
+        """
+        Checks that the exact velocities agree with finite differences of
+        the positions, that the total energy is conserved, and that the
+        cached values are replaced when the solver is run again.
+        """
+        P_dub = DoublePendulum(method = "RK4")
+        T = 5
+        dt = 1e-3
+        P_dub.solve([np.pi / 4, 0, np.pi / 2, 0], T, dt)
+
+        msg_v = "Velocity does not match the change in position"
+        vx_2 = np.gradient(P_dub.x_2, P_dub.t)
+        vy_1 = np.gradient(P_dub.y_1, P_dub.t)
+        assert np.max(np.abs(P_dub.vx_2 - vx_2)[1:-1]) < 1e-3, msg_v
+        assert np.max(np.abs(P_dub.vy_1 - vy_1)[1:-1]) < 1e-3, msg_v
+
+        E = P_dub.Kinetic + P_dub.Potential
+        msg_E = "Total energy not conserved"
+        assert np.max(np.abs(E - E[0])) < 1e-2, msg_E
+
+        msg_c = "Derived values not cached"
+        assert P_dub.x_2 is P_dub.x_2, msg_c
+
+        x_2 = P_dub.x_2
+        P_dub.solve([0, 0, 0, 0], T, dt)
+        msg_i = "Derived values not updated after a new solve"
+        assert np.max(np.abs(P_dub.x_2)) < 1e-12, msg_i
+        assert np.max(np.abs(x_2)) > 0.5, msg_i
+
+    def test_sample(self):
+        """
+        Checks that sampling the dense output between the stored time values
+        agrees with solving directly on a finer time array, both for
+        solve_ivp methods and for the fixed step methods.
+        """
+        y0 = [np.pi / 4, 0, np.pi / 6, 0]
+        T = 5
+        t_fine = np.linspace(0, T, 1001)
+
+        for method, tol in (("DOP853", 1e-3), ("RK4", 1e-3)):
+            P_dub = DoublePendulum(method = method)
+            P_dub.solve(y0, T, 0.05)
+            P_fine = DoublePendulum(method = method)
+            P_fine.solve(y0, T, T/1000)
+
+            y = P_dub.sample(t_fine)
+            msg = "Sampled solution of %s not correct" %(method)
+            assert y.shape == (4, len(t_fine)), msg
+            assert np.max(np.abs(y[2] - P_fine.theta_2)) < tol, msg
+
+            P_dub.resample(t_fine)
+            msg = "Properties do not follow the resampled solution"
+            assert len(P_dub.t) == len(t_fine), msg
+            assert np.max(np.abs(P_dub.x_2 - P_fine.x_2)) < 10*tol, msg
+            assert P_dub.solved_for(y0, T), msg
+
+    def test_jacobian(self):
+        """
+        Checks that the analytic jacobian matches a central finite difference
+        approximation of the __call__ method.
+        """
+        P_dub = DoublePendulum(M1 = 1.3, M2 = 0.7, L1 = 0.9, L2 = 1.4)
+        u = np.array([0.3, 1.2, -2.1, 0.7])
+        h = 1e-6
+        tol = 1e-6
+
+        J = P_dub.jacobian(0, u)
+        J_num = np.zeros((4, 4))
+        for j in range(4):
+            e = np.zeros(4)
+            e[j] = h
+            J_num[:, j] = (np.array(P_dub(0, u + e))
+                           - np.array(P_dub(0, u - e))) / (2*h)
+
+        msg = "Jacobian does not match finite differences"
+        assert np.max(np.abs(J - J_num)) < tol, msg
+
+    def test_ensemble(self):
+        """
+        Checks that solve_ensemble gives the same trajectories as solving
+        each initial value problem on its own, and that the results are
+        stored with the shape (N, len(t)) and the requested datatype.
+        """
+        y0 = [[np.pi / 4, 0, 0, 0],
+              [0, 0, np.pi / 6, 0],
+              [np.pi / 8, 0.5, -np.pi / 8, 0]]
+        T = 5
+        dt = 0.01
+        tol = 1e-2
+
+        P_ens = DoublePendulum()
+        P_ens.solve_ensemble(y0, T, dt)
+
+        msg_shape = "Ensemble trajectories have the wrong shape"
+        assert P_ens.theta_1.shape == (len(y0), len(P_ens.t)), msg_shape
+        assert P_ens.Kinetic.shape == (len(y0), len(P_ens.t)), msg_shape
+
+        msg = "Ensemble solution differs from the single solution"
+        for i in range(len(y0)):
+            P_dub = DoublePendulum()
+            P_dub.solve(y0[i], T, dt)
+            assert np.max(np.abs(P_ens.theta_1[i] - P_dub.theta_1)) < tol, msg
+            assert np.max(np.abs(P_ens.theta_2[i] - P_dub.theta_2)) < tol, msg
+
+        P_ens.solve_ensemble(y0, T, dt, dtype = np.float32)
+        assert P_ens.omega_2.dtype == np.float32, "Wrong storage datatype"
+
+        with pytest.raises(ValueError):
+            P_ens.solve_ensemble([0, 0, 0, 0], T, dt)
+
+    def test_flip_event(self):
+        """
+        Checks that the flip event stops the solve where an arm first passes
+        pi, close to the first flip found on a fine grid.
+        """
+        y0 = (np.pi/2, 0, np.pi, 0)
+        T = 10
+
+        P_grid = DoublePendulum(method = "DOP853")
+        P_grid.solve(y0, T, 0.001)
+        flipped = (np.abs(P_grid.theta_1) > np.pi) | (np.abs(P_grid.theta_2) > np.pi)
+        t_flip = P_grid.t[np.argmax(flipped)]
+
+        P_dub = DoublePendulum(method = "DOP853")
+        P_dub.solve(y0, T, 0.01, events = "flip", stop = True,
+                    only_events = True)
+        t_e, y_e = P_dub.events["flip"]
+
+        msg = "Flip event not found at the first flip"
+        assert len(t_e) == 1, msg
+        assert np.abs(t_e[0] - t_flip) < 2e-3, msg
+        assert np.abs(max(np.abs(y_e[0, 0]), np.abs(y_e[2, 0])) - np.pi) < 1e-8, msg
+        assert P_dub.t[-1] == t_e[0], msg
+
+
 if __name__ == "__main__":
 
     P_test = TestDoublePendulum()
     P_test.test_at_rest()
     P_test.test_range()
     P_test.test_property_assertion()
+    P_test.test_derived_values()
+    P_test.test_sample()
+    P_test.test_jacobian()
+    P_test.test_ensemble()
+    P_test.test_flip_event()
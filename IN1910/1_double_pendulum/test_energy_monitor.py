@@ -0,0 +1,143 @@
+import numpy as np
+import os
+import tempfile
+from solution_cache import SolutionCache
+from pendulum import Pendulum, DampenedPendulum
+from double_pendulum import DoublePendulum
+import energy_monitor
+import pytest
+
+
+class TestEnergyMonitor():
+    """
+    Utilised to test the energy drift checks of solve, see energy_monitor.py
+    """
+
+    def test_energy(self):
+        """
+        Checks that the total energy used while solving matches the energy
+        properties of the stored solution.
+        """
+        tol = 1e-12
+        msg = "Energy of the states differs from the properties"
+
+        P = Pendulum(M = 1.5, L = 2.7)
+        P.solve((np.pi/3, 1), 5, 0.01)
+        assert np.max(np.abs(P._energy(P._state())
+                             - (P.kinetic + P.potential))) < tol, msg
+
+        P_dub = DoublePendulum(M1 = 1.3, M2 = 0.7, L1 = 0.9, L2 = 1.4)
+        P_dub.solve((np.pi/2, 1, np.pi, -1), 5, 0.01)
+        assert np.max(np.abs(P_dub._energy(P_dub._state())
+                             - (P_dub.Kinetic + P_dub.Potential))) < tol, msg
+
+    def test_abort(self):
+        """
+        Checks that a run drifting past the tolerance stops at the time it
+        happens, for a solve_ivp method and a fixed step method, and that
+        a run keeping within it gives the same solution as without a check.
+        """
+        P_dub = DoublePendulum(method = "RK45")
+        y0 = (np.pi/2, 0, np.pi, 0)
+
+        with pytest.raises(energy_monitor.EnergyDriftError) as error:
+            P_dub.solve(y0, 100, 0.01, energy_tol = 1e-2)
+        msg = "Drift not stopped where it passes the tolerance"
+        assert error.value.t < 1, msg
+        assert abs(error.value.drift - 1e-2) < 1e-6, msg
+        assert not P_dub._Solver_Run, msg
+
+        P_dub.method = "RK4"
+        with pytest.raises(energy_monitor.EnergyDriftError) as error:
+            P_dub.solve(y0, 100, 0.05, energy_tol = 1e-3)
+        assert error.value.drift > 1e-3, msg
+        assert error.value.t < 2, msg
+
+        msg = "Checked solution differs from the unchecked one"
+        P_dub.solve(y0, 25, 0.001, energy_tol = 1e-3)
+        checked = P_dub._state()
+        P_dub.solve(y0, 25, 0.001)
+        assert np.array_equal(checked, P_dub._state()), msg
+        assert P_dub.escalations == [], msg
+
+    def test_escalate(self):
+        """
+        Checks that escalating solves again until the drift is within the
+        tolerance, and records the attempts given up on.
+        """
+        P_dub = DoublePendulum(method = "RK45")
+        P_dub.solve((np.pi/2, 0, np.pi, 0), 20, 0.01, energy_tol = 1e-2,
+                    on_drift = "escalate")
+
+        msg = "Escalated solution drifts past the tolerance"
+        E = P_dub.Kinetic + P_dub.Potential
+        assert np.max(np.abs(E - E[0])) < 1e-2, msg
+        assert len(P_dub.t) == 2001, msg
+
+        msg = "Failed attempt not recorded"
+        assert len(P_dub.escalations) == 1, msg
+        assert P_dub.escalations[0].method == "RK45", msg
+
+        P = Pendulum(method = "Elliptic")
+        P.solve((3, 0), 20, 0.01, energy_tol = 1e-12, on_drift = "escalate")
+        msg = "The exact solution should never be escalated"
+        assert P.escalations == [], msg
+
+    def test_cache(self):
+        """
+        Checks that a solution loaded from the cache is checked against
+        energy_tol, and that escalated solutions are never cached.
+        """
+        y0 = (np.pi/2, 0, np.pi, 0)
+
+        with tempfile.TemporaryDirectory() as folder:
+            cache = SolutionCache(folder)
+            P_dub = DoublePendulum(method = "RK45")
+            P_dub.solve(y0, 20, 0.01, cache = cache)
+
+            msg = "Drifting solution from the cache not checked"
+            with pytest.raises(energy_monitor.EnergyDriftError):
+                P_dub.solve(y0, 20, 0.01, cache = cache, energy_tol = 1e-2)
+
+            P_dub.solve(y0, 20, 0.01, cache = cache, energy_tol = 1e-2,
+                        on_drift = "escalate")
+            E = P_dub.Kinetic + P_dub.Potential
+            assert np.max(np.abs(E - E[0])) < 1e-2, msg
+            assert not P_dub.stats["cached"], msg
+            assert P_dub.escalations[0].method == "RK45", msg
+
+            msg = "Escalated solution added to the cache"
+            assert len(os.listdir(folder)) == 1, msg
+            P_dub.solve((np.pi/2, 0, np.pi, 0.1), 20, 0.01, cache = cache,
+                        energy_tol = 1e-2, on_drift = "escalate")
+            assert len(P_dub.escalations) > 0, msg
+            assert len(os.listdir(folder)) == 1, msg
+
+            msg = "Solution within the tolerance not loaded from the cache"
+            P = Pendulum(method = "DOP853")
+            P.solve((1, 0), 10, 0.01, cache = cache)
+            P.solve((1, 0), 10, 0.01, cache = cache, energy_tol = 0.1)
+            assert P.stats["cached"], msg
+            del P_dub, P
+
+    def test_errors(self):
+        """
+        Checks that invalid combinations raise ValueError.
+        """
+        with pytest.raises(ValueError):
+            DampenedPendulum().solve((1, 0), 1, 0.01, energy_tol = 1e-3)
+        with pytest.raises(ValueError):
+            Pendulum().solve((1, 0), 1, 0.01, energy_tol = 1e-3,
+                             events = "flip")
+        with pytest.raises(ValueError):
+            DoublePendulum().solve((1, 0, 1, 0), 1, 0.01, energy_tol = 1e-3,
+                                   on_drift = "ignore")
+
+
+if __name__ == "__main__":
+    P_test = TestEnergyMonitor()
+    P_test.test_energy()
+    P_test.test_abort()
+    P_test.test_escalate()
+    P_test.test_cache()
+    P_test.test_errors()
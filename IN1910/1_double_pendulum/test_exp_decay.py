@@ -1,4 +1,6 @@
+import numpy as np
 from exp_decay import ExponentialDecay
+import pytest
 
 
 def test_exp_decay():
@@ -19,6 +21,49 @@ def test_exp_decay():
     assert (u_d_exp - u_d_t) < tol, msg
 
 
+def test_exp_decay_vectorised():
+    """
+    Checks that many decay factors and start values are solved together,
+    numerically and analytically, and that a single factor still returns
+    a single array of values.
+    """
+    a = np.array([0.1, 0.5, 0.9, 2.0])
+    u0 = np.array([1.0, 3.0, 100.0, 7.0])
+    T = 5
+    dt = 0.01
+
+    ED = ExponentialDecay(a)
+    t, u_num = ED.solve(u0, T, dt)
+    t, u_exact = ED.solve(u0, T, dt, mode = "analytic")
+
+    msg = "Vectorised solution has the wrong shape"
+    assert u_num.shape == (len(a), len(t)), msg
+    assert u_exact.shape == (len(a), len(t)), msg
+
+    msg = "Vectorised solution not correct"
+    assert np.max(np.abs(u_exact - u0[:, None]*np.exp(-a[:, None]*t))) < 1e-12, msg
+    assert np.max(np.abs(u_num - u_exact) / u0[:, None]) < 1e-3, msg
+
+    t, u_one = ExponentialDecay(0.5).solve([3.0], T, dt)
+    msg = "Single factor solution not correct"
+    assert u_one.shape == (len(t),), msg
+    assert np.max(np.abs(u_one - u_num[1])) < 1e-3, msg
+
+    t, u = ExponentialDecay(0.5).solve(u0, T, dt, mode = "analytic")
+    assert u.shape == (len(u0), len(t)), msg
+
+    with pytest.raises(ValueError):
+        ED.solve(u0, T, dt, mode = "exact")
+
+    class SlowDecay(ExponentialDecay):
+        def __call__(self, t, u):
+            return ExponentialDecay.__call__(self, t, u)
+
+    t, u_list = SlowDecay([0.5, 1.0]).solve([3.0, 3.0], T, dt)
+    msg = "Factors given as a list not solved without the compiled kernel"
+    assert np.max(np.abs(u_list[0] - u_one)) < 1e-3, msg
+
 
 if __name__ == "__main__":
     test_exp_decay()
+    test_exp_decay_vectorised()
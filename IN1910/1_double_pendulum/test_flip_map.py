@@ -0,0 +1,59 @@
+import numpy as np
+from double_pendulum import DoublePendulum
+from sweep import first_flip_time
+import flip_map
+from flip_map import FlipMap
+
+
+class TestFlipMap():
+    """
+    Utilised to test the time to flip map, see flip_map.py
+    """
+
+    def test_flip_times(self):
+        """
+        Checks the flip times of a small map against single solves with the
+        RK4 method of DoublePendulum, with the same timestep.
+        """
+        T = 10
+        dt = 0.01
+
+        FM = FlipMap(n = 5, theta_lim = (-3, 3))
+        FM.compute(T, dt, tile = 2, processes = 1)
+
+        msg = "Flip map has the wrong shape"
+        assert FM.image.shape == (5, 5), msg
+
+        msg = "Flip time differs from a single solve"
+        for i, j in [(0, 0), (0, 4), (4, 1), (2, 2), (3, 0)]:
+            P_dub = DoublePendulum(method = "RK4")
+            P_dub.solve((FM.theta[j], 0, FM.theta[i], 0), T, dt)
+            t_flip = first_flip_time(P_dub.t, P_dub.theta_1, P_dub.theta_2)
+            if np.isnan(t_flip):
+                assert np.isnan(FM.image[i, j]), msg
+            else:
+                assert abs(FM.image[i, j] - t_flip) < 1e-10, msg
+
+        msg = "Pendulum at rest should never flip"
+        assert np.isnan(FM.image[2, 2]), msg
+
+    def test_processes(self):
+        """
+        Checks that running the tiles over several processes gives the same
+        map as computing the whole grid as one tile.
+        """
+        FM = FlipMap(n = 8, theta_lim = (1, 3))
+        FM.compute(5, 0.01, tile = 3, processes = 2)
+
+        args = (FM.theta, FM.theta, FM.params, 0.01, 500)
+        image = flip_map.flip_times(*args)
+
+        msg = "Flip times differ between the tiles and the whole grid"
+        assert np.array_equal(np.isnan(image), np.isnan(FM.image)), msg
+        assert np.nanmax(np.abs(image - FM.image)) < 1e-10, msg
+
+
+if __name__ == "__main__":
+    P_test = TestFlipMap()
+    P_test.test_flip_times()
+    P_test.test_processes()
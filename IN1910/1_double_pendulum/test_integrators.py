@@ -0,0 +1,159 @@
+import numpy as np
+import integrators
+from pendulum import Pendulum, DampenedPendulum
+from double_pendulum import DoublePendulum
+import pytest
+
+
+def pendulum_energy(P):
+    """
+    Total energy of a solved Pendulum, computed from theta and omega.
+    """
+    return 0.5*P.M*(P.L*P.omega)**2 - P.M*P.g*P.L*np.cos(P.theta)
+
+
+def double_pendulum_energy(P):
+    """
+    Total energy of a solved DoublePendulum, computed from the angles and
+    angular velocities.
+    """
+    kinetic = (0.5*(P.M1 + P.M2)*(P.L1*P.omega_1)**2
+               + 0.5*P.M2*(P.L2*P.omega_2)**2
+               + P.M2*P.L1*P.L2*P.omega_1*P.omega_2
+                 *np.cos(P.theta_1 - P.theta_2))
+    potential = (- (P.M1 + P.M2)*P.g*P.L1*np.cos(P.theta_1)
+                 - P.M2*P.g*P.L2*np.cos(P.theta_2))
+    return kinetic + potential
+
+
+class TestIntegrators():
+    """
+    Utilised to test the fixed step integrators in integrators.py
+    """
+
+    def test_time_array(self):
+        """
+        Checks that the fixed step methods return the same time array as
+        the solve_ivp methods.
+        """
+        P_ref = Pendulum()
+        P_ref.solve((np.pi/4, 0), 10, 0.03)
+        tol = 1e-12
+
+        for method in integrators.FIXED_STEP_METHODS:
+            P1 = Pendulum(method = method)
+            P1.solve((np.pi/4, 0), 10, 0.03)
+            msg = "Time array of %s not correct" %(method)
+            assert len(P1.t) == len(P_ref.t), msg
+            assert np.max(np.abs(P1.t - P_ref.t)) < tol, msg
+
+    def test_accuracy(self):
+        """
+        Checks that every fixed step method agrees with a tight tolerance
+        solve_ivp reference solution.
+        """
+        y0 = (np.pi/3, 0, np.pi/4, 0)
+        T = 5
+        dt = 1e-3
+        tol = 1e-5
+
+        P_ref = DoublePendulum(method = "DOP853")
+        P_ref._solver_options = lambda jac: {"rtol": 1e-12, "atol": 1e-12}
+        P_ref.solve(y0, T, dt)
+
+        for method in ("RK4", "GL4"):
+            P_dub = DoublePendulum(method = method)
+            P_dub.solve(y0, T, dt)
+            msg = "%s differs from the reference solution" %(method)
+            assert np.max(np.abs(P_dub.theta_2 - P_ref.theta_2)) < tol, msg
+
+        P_ref = Pendulum(method = "DOP853")
+        P_ref._solver_options = lambda jac: {"rtol": 1e-12, "atol": 1e-12}
+        P_ref.solve(y0[:2], T, dt)
+
+        for method in integrators.FIXED_STEP_METHODS:
+            P1 = Pendulum(method = method)
+            P1.solve(y0[:2], T, dt)
+            msg = "%s differs from the reference solution" %(method)
+            assert np.max(np.abs(P1.theta - P_ref.theta)) < tol, msg
+
+    def test_energy_bounded(self):
+        """
+        Checks that the symplectic methods keep the energy error bounded
+        over a long, chaotic simulation.
+        """
+        P_dub = DoublePendulum(method = "GL4")
+        P_dub.solve((np.pi/2, 0, np.pi/2, 0), 100, 0.01)
+        E = double_pendulum_energy(P_dub)
+        msg = "GL4 did not conserve the energy of the double pendulum"
+        assert np.max(np.abs(E - E[0])) < 1e-3, msg
+
+        for method in ("Verlet", "GL4"):
+            P1 = Pendulum(method = method)
+            P1.solve((np.pi/2, 0), 1000, 0.01)
+            E = pendulum_energy(P1)
+            msg = "%s did not conserve the energy of the pendulum" %(method)
+            assert np.max(np.abs(E - E[0])) < 1e-2, msg
+
+    def test_python_fallback(self):
+        """
+        Checks that integrate also works with a plain Python function as
+        the right hand side.
+        """
+        P1 = Pendulum(method = "RK4")
+        P1.solve((np.pi/4, 0), 2, 0.01)
+
+        for method in integrators.FIXED_STEP_METHODS:
+            t, y = integrators.integrate(method, P1, (np.pi/4, 0), P1.t)
+            msg = "Python version of %s gave unexpected result" %(method)
+            assert np.max(np.abs(y[0] - P1.theta)) < 1e-3, msg
+
+    def test_gl4_convergence(self):
+        """
+        Checks that the GL4 stages are found with and without an analytic
+        jacobian, and that a step whose stages do not converge ends the
+        solution and is reported, instead of filling it with NaN.
+        """
+        P1 = Pendulum(method = "GL4")
+        t_vals = np.linspace(0, 10, 201)
+        fun, jac = P1._functions()
+        t, y_jac = integrators.integrate("GL4", fun, (3, 0), t_vals, jac = jac)
+        t, y_diff = integrators.integrate("GL4", fun, (3, 0), t_vals)
+        t, y_py = integrators.integrate("GL4", P1, (3, 0), t_vals,
+                                        jac = P1.jacobian)
+        msg = "GL4 stages differ between the jacobians"
+        assert np.max(np.abs(y_jac - y_diff)) < 1e-10, msg
+        assert np.max(np.abs(y_jac - y_py)) < 1e-10, msg
+
+        P_dub = DoublePendulum(method = "GL4")
+        P_dub.solve((np.pi/2, 0, np.pi, 0), 10, 0.1)
+        msg = "Failed GL4 step not reported"
+        assert not P_dub.stats["success"], msg
+        assert "did not converge" in P_dub.stats["message"], msg
+        assert P_dub.t[-1] < 10 and len(P_dub.theta_1) == len(P_dub.t), msg
+        assert np.all(np.isfinite(P_dub.theta_2)), msg
+
+        with pytest.raises(ValueError):
+            P_dub.solve_chunks((np.pi/2, 0, np.pi, 0), 10, 0.1).__next__()
+
+    def test_invalid_method(self):
+        """
+        Checks that Verlet is refused where it does not apply.
+        """
+        with pytest.raises(ValueError):
+            DampenedPendulum(method = "Verlet").solve((0.1, 0), 1, 0.1)
+        with pytest.raises(ValueError):
+            DoublePendulum(method = "Verlet").solve((0.1, 0, 0, 0), 1, 0.1)
+        with pytest.raises(ValueError):
+            integrators.integrate("Euler", Pendulum(), (0.1, 0),
+                                  np.linspace(0, 1, 11))
+
+
+if __name__ == "__main__":
+    P_test = TestIntegrators()
+    P_test.test_time_array()
+    P_test.test_accuracy()
+    P_test.test_energy_bounded()
+    P_test.test_python_fallback()
+    P_test.test_gl4_convergence()
+    P_test.test_invalid_method()
@@ -0,0 +1,81 @@
+import numpy as np
+import pendulum_kernels as pk
+from double_pendulum import DoublePendulum
+import lyapunov
+import pytest
+
+
+class TestLyapunov():
+    """
+    Utilised to test the Lyapunov exponent estimator, see lyapunov.py
+    """
+
+    def test_tangent_function(self):
+        """
+        Checks the tangent part of the right hand side against a finite
+        difference of the double pendulum right hand side, for the compiled
+        kernel and for the fallback.
+        """
+        P_dub = DoublePendulum(M1 = 1.3, M2 = 0.7, L1 = 0.9, L2 = 1.4)
+        state = np.random.uniform(-np.pi, np.pi, (4, 3)).ravel()
+        d = np.random.uniform(-1, 1, (4, 3)).ravel()
+        eps = 1e-6
+
+        rhs = P_dub._ensemble_call
+        fd = (rhs(0, state + eps*d) - rhs(0, state - eps*d)) / (2*eps)
+
+        msg = "Tangent linear equations not correct"
+        fun = lyapunov.tangent_function(P_dub)
+        u_d = fun(0, np.concatenate((state, d)))
+        assert np.max(np.abs(u_d[:12] - rhs(0, state))) < 1e-12, msg
+        assert np.max(np.abs(u_d[12:] - fd)) < 1e-6, msg
+
+        pk.NUMBA_AVAILABLE, available = False, pk.NUMBA_AVAILABLE
+        try:
+            fun = lyapunov.tangent_function(P_dub)
+        finally:
+            pk.NUMBA_AVAILABLE = available
+        u_d = fun(0, np.concatenate((state, d)))
+        assert np.max(np.abs(u_d[12:] - fd)) < 1e-6, msg
+
+    def test_exponents(self):
+        """
+        Checks that a small oscillation has an exponent close to zero and
+        a pendulum released from high up a clearly positive one, and that
+        a batch gives the same exponents as one pendulum at a time.
+        """
+        P_dub = DoublePendulum()
+        y0 = np.array([[0.1, 0, 0.1, 0],
+                       [np.pi/2, 0, np.pi, 0]])
+
+        exponents = P_dub.lyapunov(y0, 50, 0.01, transient = 5)
+
+        msg = "Regular motion should have exponent close to zero"
+        assert abs(exponents[0]) < 0.05, msg
+        msg = "Chaotic motion should have a positive exponent"
+        assert exponents[1] > 0.5, msg
+
+        msg = "Batched exponents differ from single ones"
+        for k in range(2):
+            single = P_dub.lyapunov(y0[k], 50, 0.01, transient = 5)
+            assert np.abs(single - exponents[k]) < 1e-10, msg
+
+        msg = "Solution stored by the estimator"
+        assert not P_dub._Solver_Run, msg
+
+    def test_errors(self):
+        """
+        Checks that invalid arguments raise ValueError.
+        """
+        P_dub = DoublePendulum()
+        with pytest.raises(ValueError):
+            P_dub.lyapunov(np.zeros((3, 2)), 1, 0.01)
+        with pytest.raises(ValueError):
+            P_dub.lyapunov((0.1, 0, 0.1, 0), 1, 0.01, transient = 2)
+
+
+if __name__ == "__main__":
+    P_test = TestLyapunov()
+    P_test.test_tangent_function()
+    P_test.test_exponents()
+    P_test.test_errors()
@@ -1,7 +1,7 @@
 import scipy.integrate as spi
 import numpy as np
 import matplotlib.pyplot as plt
-from pendulum import Pendulum
+from pendulum import Pendulum, DampenedPendulum
 import pytest
 
 
@@ -107,6 +107,178 @@ class TestPendulum():
         for radius in r_check:
             assert radius < tol, msg
 
+    def test_pendulum_energy(self):
+        """
+        Checks that the exact velocities agree with finite differences of
+        the positions, and that the total energy stays constant, also at
+        the end points where np.gradient used to add noise.
+        """
+        P1 = Pendulum(L = 2.7, method = "RK4")
+        P1.solve((np.pi / 4, 0), 10, 1e-3)
+
+        msg_v = "Velocity does not match the change in position"
+        vx = np.gradient(P1.x, P1.t)
+        assert np.max(np.abs(P1.vx - vx)[1:-1]) < 1e-4, msg_v
+
+        E = P1.kinetic + P1.potential
+        msg_E = "Total energy not conserved"
+        assert np.abs(E[-1] - E[0]) < 1e-2, msg_E
+
+    def test_pendulum_jacobian(self):
+        """
+        Checks that the analytic jacobians of Pendulum and DampenedPendulum
+        match a central finite difference approximation of __call__.
+        """
+        u = np.array([np.pi/3, -0.4])
+        h = 1e-6
+        tol = 1e-6
+        msg = "Jacobian does not match finite differences"
+
+        for pend in (Pendulum(L = 2.7), DampenedPendulum(L = 2.7, B = 0.4)):
+            J = pend.jacobian(0, u)
+            for j in range(2):
+                e = np.zeros(2)
+                e[j] = h
+                J_num = (np.array(pend(0, u + e))
+                         - np.array(pend(0, u - e))) / (2*h)
+                assert np.max(np.abs(J[:, j] - J_num)) < tol, msg
+
+    def test_pendulum_events(self):
+        """
+        Checks that the zero crossings of a small oscillation are half a
+        period of the linearised pendulum apart, also when only the events
+        are stored, and that stop ends the solve at the first event.
+        """
+        P1 = Pendulum(L = 2, method = "Radau")
+        period = 2*np.pi*np.sqrt(P1.L/P1.g)
+
+        P1.solve((0.01, 0), 20, 0.01, events = ["zero_crossing",
+                                                 "turning_point"])
+        t_zero, y_zero = P1.events["zero_crossing"]
+        msg = "Zero crossings not half a period apart"
+        assert np.max(np.abs(np.diff(t_zero) - period/2)) < 1e-3, msg
+        assert np.max(np.abs(y_zero[0])) < 1e-10, msg
+        assert y_zero.shape == (2, len(t_zero)), msg
+        assert len(P1.t) == 2001, msg
+
+        P1.solve((0.01, 0), 20, 0.01, events = "zero_crossing",
+                 only_events = True)
+        msg = "Only the events should be stored"
+        assert len(P1.t) == 2 and P1.t[-1] == 20, msg
+        assert np.max(np.abs(P1.events["zero_crossing"][0] - t_zero)) < 1e-3
+
+        P1.solve((0, 0.01), 20, 0.01, events = "turning_point", stop = True)
+        msg = "Solve did not stop at the first turning point"
+        assert np.abs(P1.events["turning_point"][0][0] - period/4) < 1e-3, msg
+        assert P1.t[-1] <= period/4, msg
+
+        P1.solve((0.01, 0), 1, 0.01)
+        assert P1.events == {}, "Events kept from an earlier solve"
+
+        with pytest.raises(ValueError):
+            P1.solve((0.01, 0), 1, 0.01, events = "flip_2")
+        with pytest.raises(ValueError):
+            Pendulum(method = "RK4").solve((0.01, 0), 1, 0.01,
+                                           events = "flip")
+
+    def test_pendulum_exact(self):
+        """
+        Checks the exact solution against GL4 with a small timestep, for
+        initial values both at rest and moving, and that the exact period
+        matches the small angle period and the exact solution itself.
+        """
+        T = 10
+        dt = 0.001
+        tol = 1e-6
+
+        for y0 in [(1.2, 0), (-0.3, 2.1), (0, -1)]:
+            P_ref = Pendulum(L = 2.2, method = "GL4")
+            P_ref.solve(y0, T, dt)
+            P1 = Pendulum(L = 2.2, method = "Elliptic")
+            P1.solve(y0, T, dt)
+
+            msg = "Exact solution differs from GL4"
+            assert np.max(np.abs(P1.theta - P_ref.theta)) < tol, msg
+            assert np.max(np.abs(P1.omega - P_ref.omega)) < tol, msg
+            msg = "Exact solution not used for its dense output"
+            assert np.abs(P1.sample(3.2105)[0] - np.interp(3.2105, P_ref.t,
+                          P_ref.theta)) < tol, msg
+
+        P1 = Pendulum(L = 2.2, method = "Elliptic")
+        y0 = np.array([[1e-4, 0], [1.2, 0], [0, 0]])
+        theta, omega = P1.exact(y0, P_ref.t)
+        msg = "Exact solution of many amplitudes not correct"
+        assert theta.shape == (3, len(P_ref.t)), msg
+        assert np.max(np.abs(theta[1] - Pendulum(L = 2.2, method = "GL4")
+                             .exact((1.2, 0), P_ref.t)[0])) < 1e-12, msg
+        assert np.all(theta[2] == 0) and np.all(omega[2] == 0), msg
+
+        periods = P1.period(y0)
+        msg = "Exact period not correct"
+        assert np.abs(periods[0] - 2*np.pi*np.sqrt(2.2/9.81)) < 1e-6, msg
+        theta, omega = P1.exact((1.2, 0), periods[1] * np.array([0.25, 1]))
+        assert np.abs(theta[0]) < 1e-12 and np.abs(theta[1] - 1.2) < 1e-12, msg
+        assert np.isnan(P1.period((np.pi, 1))), msg
+
+    def test_pendulum_exact_wrapped(self):
+        """
+        Checks the exact solution against DOP853 with tight tolerances for
+        initial angles beyond pi and -pi, which are wrapped before solving.
+        """
+        tol = 1e-7
+        msg = "Exact solution differs from DOP853 for |theta_0| > pi"
+
+        for y0 in [(np.deg2rad(200), 0), (2*np.pi + 0.3, 0), (-4.0, 1.0)]:
+            P1 = Pendulum(method = "Elliptic")
+            P1.solve(y0, 10, 0.01)
+            sol = spi.solve_ivp(P1, (0, 10), y0, method = "DOP853",
+                                t_eval = P1.t, rtol = 1e-11, atol = 1e-11)
+            assert P1.stats["method"] == "Elliptic", msg
+            assert abs(P1.theta[0] - y0[0]) < 1e-12, msg
+            assert np.max(np.abs(P1.theta - sol.y[0])) < tol, msg
+            assert np.max(np.abs(P1.omega - sol.y[1])) < tol, msg
+
+    def test_pendulum_exact_fallback(self):
+        """
+        Checks that the Elliptic method falls back to RK45 for a pendulum
+        going over the top, and for the dampened pendulum.
+        """
+        y0 = (np.pi - 0.1, 3)
+        P_ref = Pendulum(method = "RK45")
+        P_ref.solve(y0, 5, 0.01)
+        P1 = Pendulum(method = "Elliptic")
+        P1.solve(y0, 5, 0.01)
+
+        msg = "Elliptic method did not fall back to RK45"
+        assert np.all(P1.theta == P_ref.theta), msg
+        assert np.max(P1.theta) > np.pi, msg
+
+        P_ref = DampenedPendulum(method = "RK45")
+        P_ref.solve((1, 0), 5, 0.01)
+        P2 = DampenedPendulum(method = "Elliptic")
+        P2.solve((1, 0), 5, 0.01)
+        assert np.all(P2.theta == P_ref.theta), msg
+
+        with pytest.raises(ValueError):
+            P2.exact((1, 0), P_ref.t)
+        with pytest.raises(ValueError):
+            P1.exact((np.pi, 1), P_ref.t)
+
+    def test_pendulum_short_solve(self):
+        """
+        Checks that a solve over less than one timestep stores only the
+        initial values, for a solve_ivp method, with and without energy_tol,
+        and for a fixed step method.
+        """
+        msg = "Solve shorter than dt did not store the initial values"
+        for method, energy_tol in [("RK45", None), ("RK45", 1e-3),
+                                   ("RK4", None)]:
+            P1 = Pendulum(method = method)
+            P1.solve([1, 0], 0.05, 0.1, energy_tol = energy_tol)
+            assert np.array_equal(P1.t, [0.]), msg
+            assert np.array_equal(P1.theta, [1.]), msg
+            assert np.array_equal(P1.omega, [0.]), msg
+
 
 if __name__ == "__main__":
     P_test = TestPendulum()
@@ -115,3 +287,10 @@ if __name__ == "__main__":
     P_test.test_pendulum_at_rest()
     P_test.test_pendulum_solve()
     P_test.test_pendulum_range()
+    P_test.test_pendulum_energy()
+    P_test.test_pendulum_jacobian()
+    P_test.test_pendulum_events()
+    P_test.test_pendulum_exact()
+    P_test.test_pendulum_exact_wrapped()
+    P_test.test_pendulum_exact_fallback()
+    P_test.test_pendulum_short_solve()
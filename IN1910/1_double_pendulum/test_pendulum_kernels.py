@@ -0,0 +1,102 @@
+import numpy as np
+import pendulum_kernels as pk
+from exp_decay import ExponentialDecay
+from pendulum import Pendulum, DampenedPendulum
+from double_pendulum import DoublePendulum
+
+
+class TestPendulumKernels():
+    """
+    Utilised to test the kernels in pendulum_kernels against the __call__
+    and jacobian methods of the classes they replace.
+    """
+
+    def test_exp_decay_kernel(self):
+        """
+        Checks that the exponential decay kernel returns the same value
+        as ExponentialDecay.__call__.
+        """
+        ED = ExponentialDecay(0.4)
+        rhs = pk.bind(pk.exp_decay_rhs, ED.a)
+        u = np.array([3.2])
+        tol = 1e-12
+
+        msg = "Exponential decay kernel returned unexpected value"
+        assert np.abs(rhs(0, u)[0] - ED(0, u)[0]) < tol, msg
+
+    def test_pendulum_kernels(self):
+        """
+        Checks that the bound kernels of Pendulum and DampenedPendulum
+        return the same values as their __call__ and jacobian methods.
+        """
+        u = np.array([np.pi/3, -0.4])
+        tol = 1e-12
+        msg = "Pendulum kernel returned unexpected value"
+
+        for pend in (Pendulum(L = 2.7), DampenedPendulum(L = 2.7, B = 0.4)):
+            rhs, jac = pend._functions()
+            assert np.max(np.abs(rhs(0, u) - np.array(pend(0, u)))) < tol, msg
+            assert np.max(np.abs(jac(0, u) - pend.jacobian(0, u))) < tol, msg
+
+    def test_double_pendulum_kernels(self):
+        """
+        Checks that the bound kernels of DoublePendulum return the same
+        values as __call__ and jacobian, both for a single system and for
+        the flattened state of an ensemble.
+        """
+        P_dub = DoublePendulum(M1 = 1.3, M2 = 0.7, L1 = 0.9, L2 = 1.4)
+        u = np.array([0.3, 1.2, -2.1, 0.7])
+        tol = 1e-12
+        msg = "Double pendulum kernel returned unexpected value"
+
+        rhs, jac = P_dub._functions()
+        assert np.max(np.abs(rhs(0, u) - np.array(P_dub(0, u)))) < tol, msg
+        assert np.max(np.abs(jac(0, u) - P_dub.jacobian(0, u))) < tol, msg
+
+        u_ens = np.random.uniform(-np.pi, np.pi, (4, 5))
+        rhs, jac = P_dub._functions(ensemble = True)
+        diff = rhs(0, u_ens.ravel()) - np.concatenate(P_dub(0, u_ens))
+        assert np.max(np.abs(diff)) < tol, msg
+        diff = jac(0, u_ens.ravel()).toarray()[:5, :5] - np.diag(
+               P_dub.jacobian(0, u_ens)[0, 0])
+        assert np.max(np.abs(diff)) < tol, msg
+
+    def test_fallback(self):
+        """
+        Checks that solve gives the same results with and without the
+        compiled kernels, and that a subclass overriding __call__ does not
+        pick up the kernels.
+        """
+        y0 = (np.pi/4, 0, np.pi/2, 0)
+        T = 5
+        dt = 0.01
+        tol = 1e-8
+
+        P_fast = DoublePendulum()
+        P_fast.solve(y0, T, dt)
+
+        P_slow = DoublePendulum()
+        pk.NUMBA_AVAILABLE, available = False, pk.NUMBA_AVAILABLE
+        try:
+            assert P_slow._kernels() is None, "Kernels used without Numba"
+            P_slow.solve(y0, T, dt)
+        finally:
+            pk.NUMBA_AVAILABLE = available
+
+        msg = "Compiled and Python solutions differ"
+        assert np.max(np.abs(P_fast.theta_2 - P_slow.theta_2)) < tol, msg
+
+        class Modified(DoublePendulum):
+            def __call__(self, t, u):
+                return DoublePendulum.__call__(self, t, u)
+
+        msg = "Subclass with its own __call__ used the compiled kernels"
+        assert Modified()._kernels() is None, msg
+
+
+if __name__ == "__main__":
+    P_test = TestPendulumKernels()
+    P_test.test_exp_decay_kernel()
+    P_test.test_pendulum_kernels()
+    P_test.test_double_pendulum_kernels()
+    P_test.test_fallback()
@@ -0,0 +1,135 @@
+import numpy as np
+import os
+import tempfile
+import time
+import scipy
+import solution_cache
+import pendulum_model
+from solution_cache import SolutionCache
+from pendulum import Pendulum, DampenedPendulum
+from double_pendulum import DoublePendulum
+
+
+class TestSolutionCache():
+    """
+    Utilised to test the SolutionCache class
+    """
+
+    def test_repeated_solve(self):
+        """
+        Checks that a repeated solve is loaded from the cache, and gives the
+        same solution as the first solve.
+        """
+        y0 = (np.pi/4, 0, np.pi/2, 0)
+        tol = 1e-14
+
+        with tempfile.TemporaryDirectory() as folder:
+            cache = SolutionCache(folder)
+            P_dub = DoublePendulum()
+            P_dub.solve(y0, 5, 0.01, cache = cache)
+            msg = "Solution not added to the cache"
+            assert len(os.listdir(folder)) == 1, msg
+
+            P_cached = DoublePendulum()
+            P_cached.solve(y0, 5, 0.01, cache = cache)
+            msg = "Repeated solve not loaded from the cache"
+            assert isinstance(P_cached.theta_1, np.memmap), msg
+            assert len(os.listdir(folder)) == 1, msg
+
+            msg = "Cached solution differs from the solved one"
+            assert np.max(np.abs(P_cached.theta_2 - P_dub.theta_2)) < tol, msg
+            assert np.max(np.abs(P_cached.t - P_dub.t)) < tol, msg
+            del P_cached
+
+    def test_keys(self):
+        """
+        Checks that changing any parameter, the method, the initial values
+        or the time settings gives a new key.
+        """
+        with tempfile.TemporaryDirectory() as folder:
+            cache = SolutionCache(folder)
+            y0 = (np.pi/4, 0)
+            key = cache.key(Pendulum(), y0, 10, 0.01)
+
+            msg = "Different problems share a cache key"
+            assert key == cache.key(Pendulum(), y0, 10, 0.01), msg
+            assert key != cache.key(Pendulum(L = 2), y0, 10, 0.01), msg
+            assert key != cache.key(Pendulum(method = "RK4"),
+                                    y0, 10, 0.01), msg
+            assert key != cache.key(DampenedPendulum(), y0, 10, 0.01), msg
+            assert key != cache.key(Pendulum(), (np.pi/3, 0), 10, 0.01), msg
+            assert key != cache.key(Pendulum(), y0, 20, 0.01), msg
+            assert key != cache.key(Pendulum(), y0, 10, 0.02), msg
+            assert (cache.key(DampenedPendulum(B = 0.1), y0, 10, 0.01)
+                    != cache.key(DampenedPendulum(B = 0.2), y0, 10, 0.01)), msg
+
+    def test_source_keys(self):
+        """
+        Checks that an edit to the shared solver code in pendulum_model, or
+        another version of SciPy, gives a new key.
+        """
+        with tempfile.TemporaryDirectory() as folder:
+            cache = SolutionCache(folder)
+            y0 = (np.pi/4, 0)
+            key = cache.key(Pendulum(), y0, 10, 0.01)
+
+            getsource = solution_cache.inspect.getsource
+            def edited(module):
+                source = getsource(module)
+                if module is pendulum_model:
+                    source += "\n# edited\n"
+                return source
+
+            msg = "Edited solver module gives the same cache key"
+            solution_cache._source_hashes.clear()
+            solution_cache.inspect.getsource = edited
+            try:
+                assert key != cache.key(Pendulum(), y0, 10, 0.01), msg
+            finally:
+                solution_cache.inspect.getsource = getsource
+                solution_cache._source_hashes.clear()
+            assert key == cache.key(Pendulum(), y0, 10, 0.01), msg
+
+            msg = "Another SciPy version gives the same cache key"
+            version = scipy.__version__
+            scipy.__version__ = version + ".dev0"
+            try:
+                assert key != cache.key(Pendulum(), y0, 10, 0.01), msg
+            finally:
+                scipy.__version__ = version
+
+    def test_eviction(self):
+        """
+        Checks that the least recently used solutions are removed when the
+        cache grows larger than max_bytes.
+        """
+        with tempfile.TemporaryDirectory() as folder:
+            t = np.linspace(0, 1, 1001)
+            y = np.zeros((2, 1001))
+            size = (3*1001)*8 + 128
+            cache = SolutionCache(folder, max_bytes = 2.5*size)
+
+            cache.put("a", t, y)
+            cache.put("b", t, y)
+            past = time.time() - 100
+            os.utime(os.path.join(folder, "a.npy"), (past, past))
+            os.utime(os.path.join(folder, "b.npy"), (past + 1, past + 1))
+            cache.get("a")
+            cache.put("c", t, y)
+
+            msg = "Least recently used solution not removed"
+            assert cache.get("b") is None, msg
+            assert cache.get("a") is not None, msg
+            assert cache.get("c") is not None, msg
+            assert cache.size() <= cache.max_bytes, msg
+
+            cache.clear()
+            assert cache.size() == 0, "Cache not cleared"
+
+
+if __name__ == "__main__":
+    P_test = TestSolutionCache()
+    P_test.test_repeated_solve()
+    P_test.test_keys()
+    P_test.test_source_keys()
+    P_test.test_eviction()
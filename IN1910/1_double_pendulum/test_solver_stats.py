@@ -0,0 +1,117 @@
+import tempfile
+import numpy as np
+from pendulum import Pendulum
+from double_pendulum import DoublePendulum
+from solution_cache import SolutionCache
+import solver_stats
+
+
+class TestSolverStats():
+    """
+    Utilised to test the solver statistics recorded by solve, see
+    solver_stats.py
+    """
+
+    def test_solve_ivp_stats(self):
+        """
+        Checks that the counts of solve_ivp are recorded, with the number
+        of steps taken from the dense output.
+        """
+        P_dub = DoublePendulum(method = "Radau")
+        P_dub.solve((np.pi/2, 0, np.pi, 0), 5, 0.01)
+        stats = P_dub.stats
+
+        msg = "solve_ivp statistics not recorded"
+        assert stats["method"] == "Radau" and stats["success"], msg
+        assert stats["nfev"] > 0 and stats["njev"] > 0, msg
+        assert stats["nlu"] > 0, msg
+        assert stats["steps"] == len(P_dub._dense.ts) - 1, msg
+        assert not stats["cached"], msg
+        assert stats["integration_time"] > 0, msg
+        assert stats["post_processing_time"] >= 0, msg
+
+        P_dub.solve((np.pi/2, 0, np.pi, 0), 5, 0.01, events = "flip",
+                    only_events = True)
+        msg = "Statistics of a solve with events not recorded"
+        assert P_dub.stats["steps"] > 0, msg
+        assert P_dub.stats["nfev"] > 0, msg
+
+    def test_fixed_step_stats(self):
+        """
+        Checks the evaluation counts of the fixed step methods.
+        """
+        msg = "Fixed step statistics not correct"
+        P = Pendulum(method = "RK4")
+        P.solve((1, 0), 1, 0.01)
+        assert P.stats["steps"] == 100 and P.stats["nfev"] == 400, msg
+        assert P.stats["njev"] is None, msg
+
+        P.method = "Verlet"
+        P.solve((1, 0), 1, 0.01)
+        assert P.stats["nfev"] == 101, msg
+
+        P.method = "GL4"
+        P.solve((1, 0), 1, 0.01)
+        assert P.stats["nfev"] > 2*100, msg
+
+        P.method = "Elliptic"
+        P.solve((1, 0), 1, 0.01)
+        assert P.stats["nfev"] == 0 and P.stats["method"] == "Elliptic", msg
+
+        P_dub = DoublePendulum(method = "RK4")
+        P_dub.solve_ensemble(np.zeros((3, 4)), 1, 0.01)
+        assert P_dub.stats["nfev"] == 400, msg
+
+        msg = "Windows of an energy checked solve not summed"
+        P_dub.solve((0.1, 0, 0.1, 0), 25, 0.01, energy_tol = 1)
+        assert P_dub.stats["steps"] == 2500, msg
+        assert P_dub.stats["nfev"] == 10000, msg
+
+    def test_cached_and_reset(self):
+        """
+        Checks that a solution loaded from the cache is marked as cached,
+        and that the statistics are cleared when the solution is replaced
+        by something else than solve.
+        """
+        with tempfile.TemporaryDirectory() as folder:
+            cache = SolutionCache(folder)
+            P = Pendulum()
+            P.solve((1, 0), 1, 0.01, cache = cache)
+            assert not P.stats["cached"]
+            P.solve((1, 0), 1, 0.01, cache = cache)
+            msg = "Cached solution not marked"
+            assert P.stats["cached"] and P.stats["nfev"] is None, msg
+
+        P.extend(1)
+        msg = "Statistics kept for a solution not made by solve"
+        assert P.stats is None, msg
+
+    def test_hook(self):
+        """
+        Checks that the hooks are called with the model and its statistics
+        after every solve, until they are removed.
+        """
+        calls = []
+        hook = lambda model, stats: calls.append((model, stats))
+        solver_stats.add_hook(hook)
+        try:
+            P = Pendulum()
+            P.solve((1, 0), 1, 0.01)
+            P_dub = DoublePendulum()
+            P_dub.solve((1, 0, 1, 0), 1, 0.01)
+        finally:
+            solver_stats.remove_hook(hook)
+        P.solve((1, 0), 1, 0.01)
+
+        msg = "Hook not called with the statistics of each solve"
+        assert len(calls) == 2, msg
+        assert calls[0][0] is P and calls[1][0] is P_dub, msg
+        assert calls[1][1] is P_dub.stats, msg
+
+
+if __name__ == "__main__":
+    P_test = TestSolverStats()
+    P_test.test_solve_ivp_stats()
+    P_test.test_fixed_step_stats()
+    P_test.test_cached_and_reset()
+    P_test.test_hook()
@@ -0,0 +1,180 @@
+import numpy as np
+import os
+import tempfile
+from pendulum import Pendulum, DampenedPendulum
+from double_pendulum import DoublePendulum
+import pytest
+
+
+class BrokenPendulum(Pendulum):
+    "Pendulum whose right hand side turns to nan after t = 0.5"
+
+    def __call__(self, t, u):
+        if t > 0.5:
+            return (np.nan, np.nan)
+        return Pendulum.__call__(self, t, u)
+
+
+class TestStreaming():
+    """
+    Utilised to test solving in time windows, see streaming.py
+    """
+
+    def test_chunks(self):
+        """
+        Checks that the windows of solve_chunks fit together into the same
+        time array and solution as a single call to solve.
+        """
+        y0 = (np.pi/4, 0, np.pi/2, 0)
+        T = 10
+        dt = 0.01
+        tol = 1e-10
+
+        P_dub = DoublePendulum(method = "RK4")
+        P_dub.solve(y0, T, dt)
+
+        chunks = list(P_dub.solve_chunks(y0, T, dt, window = 3))
+        t = np.concatenate([chunk[0] for chunk in chunks])
+        y = np.concatenate([chunk[1] for chunk in chunks], axis = 1)
+
+        msg = "Windows do not add up to the full solution"
+        assert len(chunks) == 4, msg
+        assert len(t) == len(P_dub.t), msg
+        assert np.max(np.abs(t - P_dub.t)) < tol, msg
+        assert np.max(np.abs(y[2] - P_dub.theta_2)) < tol, msg
+
+    def test_adaptive_chunks(self):
+        """
+        Checks that restarting the adaptive solver at the start of every
+        window stays close to the uninterrupted solution.
+        """
+        P1 = DampenedPendulum(method = "RK45")
+        y0 = (np.pi/4, 0)
+        P1.solve(y0, 10, 0.01)
+
+        y = np.concatenate([chunk[1] for chunk
+                            in P1.solve_chunks(y0, 10, 0.01, window = 2.5)],
+                           axis = 1)
+        msg = "Windowed solution differs from the full solution"
+        assert np.max(np.abs(y[0] - P1.theta)) < 1e-2, msg
+
+    def test_solve_to_file(self):
+        """
+        Checks that solve_to_file writes the whole solution to disk, and
+        that the properties work on the memory-mapped solution, also after
+        loading the file into a new instance.
+        """
+        y0 = (np.pi/4, 0)
+        T = 10
+        dt = 0.01
+        tol = 1e-10
+
+        P_ref = Pendulum(method = "RK4")
+        P_ref.solve(y0, T, dt)
+
+        with tempfile.TemporaryDirectory() as folder:
+            P1 = Pendulum(method = "RK4")
+            filename = P1.solve_to_file(os.path.join(folder, "run"),
+                                        y0, T, dt, window = 3)
+
+            msg = "Solution not stored on disk"
+            assert filename.endswith("run.npy"), msg
+            assert isinstance(P1.theta, np.memmap), msg
+
+            msg = "Solution read from disk not correct"
+            assert np.max(np.abs(P1.t - P_ref.t)) < tol, msg
+            assert np.max(np.abs(P1.kinetic - P_ref.kinetic)) < tol, msg
+
+            P2 = Pendulum()
+            P2.load(filename)
+            assert np.max(np.abs(P2.x - P_ref.x)) < tol, msg
+            del P1, P2
+
+    def test_failed_window(self):
+        """
+        Checks that a window solve_ivp fails on is raised by solve_chunks
+        and solve_to_file instead of being passed on shortened, and that
+        solve reports it in the stats.
+        """
+        y0 = (np.pi/4, 0)
+        P1 = BrokenPendulum(method = "RK45")
+
+        with pytest.raises(ValueError):
+            list(P1.solve_chunks(y0, 2, 0.01, window = 1))
+
+        with tempfile.TemporaryDirectory() as folder:
+            filename = os.path.join(folder, "run")
+            with pytest.raises(ValueError):
+                P1.solve_to_file(filename, y0, 2, 0.01, window = 1)
+            msg = "Partial solution left on disk"
+            assert not os.path.exists(filename + ".npy"), msg
+
+        P1.solve(y0, 2, 0.01)
+        msg = "Failed solve not reported"
+        assert not P1.stats["success"], msg
+        assert P1.t[-1] < 2 and len(P1.theta) == len(P1.t), msg
+
+    def test_extend(self):
+        """
+        Checks that extending a solution gives the same result as solving
+        the whole interval at once, that the buffer grows in doubling steps
+        rather than at every extension, and that the timestep of solve is
+        kept. Solutions without every timestep can not be extended.
+        """
+        y0 = (np.pi/4, 0, np.pi/2, 0)
+        dt = 0.01
+        tol = 1e-10
+
+        P_ref = DoublePendulum(method = "RK4")
+        P_ref.solve(y0, 10, dt)
+
+        P_dub = DoublePendulum(method = "RK4")
+        P_dub.solve(y0, 1, dt)
+        buffers = set()
+        for i in range(9):
+            P_dub.extend(1)
+            buffers.add(id(P_dub._buffer))
+
+        msg = "Extended solution differs from the full solution"
+        assert len(P_dub.t) == len(P_ref.t), msg
+        assert np.max(np.abs(P_dub.t - P_ref.t)) < tol, msg
+        assert np.max(np.abs(P_dub.theta_2 - P_ref.theta_2)) < tol, msg
+        assert np.max(np.abs(P_dub.Kinetic - P_ref.Kinetic)) < tol, msg
+
+        msg = "Buffer reallocated too often"
+        assert len(buffers) <= 4, msg
+
+        P1 = Pendulum()
+        P1.solve((np.pi/4, 0), 5, dt)
+        P1.extend(5)
+        msg = "Extended pendulum time array not correct"
+        assert np.abs(P1.t[-1] - 10) < tol and len(P1.t) == 1001, msg
+
+        P1.solve((np.pi/4, 0), 1, 0.3)
+        P1.extend(1)
+        msg = "Extension does not keep the timestep of solve"
+        assert len(P1.t) == 7, msg
+        assert np.max(np.abs(np.diff(P1.t) - 1/3)) < tol, msg
+
+        P_ens = DoublePendulum()
+        P_ens.solve_ensemble([y0, y0], 1, dt)
+        with pytest.raises(ValueError):
+            P_ens.extend(1)
+
+        P_events = DoublePendulum()
+        P_events.solve(y0, 10, dt, events = "flip_1", only_events = True)
+        with pytest.raises(ValueError):
+            P_events.extend(1)
+
+        P_dub.resample(np.linspace(0, 10, 11)**2 / 10)
+        with pytest.raises(ValueError):
+            P_dub.extend(1)
+
+
+if __name__ == "__main__":
+    P_test = TestStreaming()
+    P_test.test_chunks()
+    P_test.test_adaptive_chunks()
+    P_test.test_solve_to_file()
+    P_test.test_failed_window()
+    P_test.test_extend()
@@ -0,0 +1,87 @@
+import numpy as np
+import sweep
+import pytest
+
+
+class TestSweep():
+    """
+    Utilised to test the parameter sweep runner in sweep.py
+    """
+
+    def test_parameter_grid(self):
+        """
+        Checks that parameter_grid makes every combination of the given
+        values, and fills in the defaults for the others.
+        """
+        table = sweep.parameter_grid(M2 = [0.5, 1, 2], theta_1 = [0, 1])
+
+        msg = "Parameter grid not correct"
+        assert len(table["M2"]) == 6, msg
+        assert set(zip(table["M2"], table["theta_1"])) == {
+               (0.5, 0), (0.5, 1), (1, 0), (1, 1), (2, 0), (2, 1)}, msg
+        assert np.all(table["g"] == 9.81), msg
+
+        with pytest.raises(ValueError):
+            sweep.parameter_grid(mass = [1, 2])
+
+    def test_first_flip_time(self):
+        """
+        Checks that the flip time is the first time either angle passes pi.
+        """
+        t = np.linspace(0, 1, 11)
+        theta_1 = np.zeros(11)
+        theta_2 = np.linspace(0, 5, 11)
+
+        msg = "Flip time not correct"
+        assert sweep.first_flip_time(t, theta_1, theta_2) == t[7], msg
+        assert np.isnan(sweep.first_flip_time(t, theta_1, theta_1)), msg
+
+    def test_run_sweep(self):
+        """
+        Checks that the summaries written by the worker processes match
+        solving each run serially.
+        """
+        table = sweep.parameter_grid(M2 = [0.5, 2],
+                                     theta_1 = [np.pi/6, np.pi/2],
+                                     theta_2 = [0, np.pi])
+        T = 5
+        dt = 0.01
+        tol = 1e-12
+
+        result = sweep.run_sweep(table, T, dt, processes = 2)
+
+        msg = "Sweep summary differs from the serial run"
+        for i in range(len(result["M2"])):
+            row = {name: table[name][i] for name in sweep.PARAMETERS}
+            expected = sweep.run_one(row, T, dt, "RK4")
+            for j, name in enumerate(sweep.SUMMARIES):
+                if np.isnan(expected[j]):
+                    assert np.isnan(result[name][i]), msg
+                else:
+                    assert np.abs(result[name][i] - expected[j]) < tol, msg
+
+    def test_energy_tol(self):
+        """
+        Checks that runs drifting past energy_tol get nan summaries, while
+        the others are the same as without it.
+        """
+        table = sweep.parameter_grid(theta_1 = [np.pi/6, np.pi/2],
+                                     theta_2 = [0, np.pi])
+        result = sweep.run_sweep(table, 5, 0.02, processes = 2,
+                                 energy_tol = 1e-3)
+        plain = sweep.run_sweep(table, 5, 0.02, processes = 2)
+
+        msg = "Drifting runs not given nan summaries"
+        drifted = plain["energy_drift"] > 1e-3
+        assert np.any(drifted) and not np.all(drifted), msg
+        assert np.all(np.isnan(result["energy_drift"][drifted])), msg
+        assert np.array_equal(result["energy_drift"][~drifted],
+                              plain["energy_drift"][~drifted]), msg
+
+
+if __name__ == "__main__":
+    P_test = TestSweep()
+    P_test.test_parameter_grid()
+    P_test.test_first_flip_time()
+    P_test.test_run_sweep()
+    P_test.test_energy_tol()
@@ -0,0 +1,148 @@
+"""
+Trace lines for AnimateDoublePendulum whose cost per frame does not grow
+with the number of frames drawn so far.
+
+Setting the whole trace x[0:i] on a line every frame makes frame i draw
+i points, so an animation with n frames does O(n**2) work. Instead:
+
+TraceBuffer: a ring buffer holding only the last length points, for a
+             trace with a fixed length tail.
+BakedTrace: a line for the full trace, which draws its points in chunks
+            onto a cached offscreen image once, and then only copies the
+            image and draws the few points since the last chunk.
+"""
+
+import numpy as np
+from matplotlib.lines import Line2D
+from matplotlib.backends.backend_agg import RendererAgg
+
+
+class TraceBuffer():
+    """
+    A ring buffer of the last length points of a trace.
+    """
+
+    def __init__(self, length):
+        self.length = length
+        self.x = np.empty(length)
+        self.y = np.empty(length)
+        self.clear()
+
+    def clear(self):
+        "Removes every point"
+        self.start = 0
+        self.count = 0
+        self.last = None
+
+    def append(self, x, y):
+        "Adds a point, overwriting the oldest one when the buffer is full"
+        k = (self.start + self.count) % self.length
+        self.x[k], self.y[k] = x, y
+        if self.count < self.length:
+            self.count += 1
+        else:
+            self.start = (self.start + 1) % self.length
+
+    def update(self, x, y, i):
+        """
+        Updates the buffer to hold the points up to and including x[i],
+        y[i]. Moving forward only appends the new points, any other frame
+        (the first, a jump back or one longer than the buffer) fills the
+        buffer from the arrays.
+        """
+        if self.last is not None and self.last < i <= self.last + self.length:
+            for k in range(self.last + 1, i + 1):
+                self.append(x[k], y[k])
+        else:
+            self.clear()
+            for k in range(max(0, i + 1 - self.length), i + 1):
+                self.append(x[k], y[k])
+        self.last = i
+
+    def ordered(self):
+        "Returns the points from the oldest to the newest"
+        stop = self.start + self.count
+        if stop <= self.length:
+            return self.x[self.start:stop], self.y[self.start:stop]
+        stop -= self.length
+        return (np.concatenate((self.x[self.start:], self.x[:stop])),
+                np.concatenate((self.y[self.start:], self.y[:stop])))
+
+
+def fading_segments(x, y):
+    """
+    Returns the line segments of the trace (x, y) and an alpha for each,
+    rising linearly from the oldest to the newest, for a LineCollection.
+    """
+    points = np.column_stack((x, y))
+    segments = np.stack((points[:-1], points[1:]), axis=1)
+    alphas = np.linspace(0, 1, len(segments) + 1)[1:]
+    return segments, alphas
+
+
+class BakedTrace(Line2D):
+    """
+    A line for a trace which only grows at the end, like x[0:i+1].
+
+    The points are drawn in chunks of chunk points onto an offscreen
+    image with the size and dpi of the figure being drawn. Every frame
+    only copies this image and draws the points after the last whole
+    chunk, so the cost of a frame is bounded however long the trace is.
+    The image is drawn again from the start if the figure size, dpi or
+    axis limits change, or if the trace gets shorter.
+    """
+
+    def __init__(self, *args, chunk = 50, **kwargs):
+        Line2D.__init__(self, *args, **kwargs)
+        self.chunk = chunk
+        self._part = Line2D([], [])
+        self._reset(None)
+
+    def _reset(self, key):
+        "Forgets the cached image"
+        self._key = key
+        self._image = None
+        self._baked = 0
+
+    def _draw_part(self, renderer, x, y):
+        "Draws the points x, y with the style and clipping of this line"
+        part = self._part
+        part.update_from(self)
+        part.axes = self.axes
+        part.set_figure(self.figure)
+        part.set_transform(self.get_transform())
+        part.set_clip_box(self.clipbox)
+        part.set_clip_path(self.get_clip_path())
+        part.set_data(x, y)
+        part.draw(renderer)
+
+    def draw(self, renderer):
+        if not self.get_visible():
+            return
+        x, y = self.get_data()
+        n = len(x)
+
+        key = (renderer.width, renderer.height, renderer.dpi,
+               tuple(self.axes.viewLim.bounds))
+        if key != self._key or n < self._baked + 1:
+            self._reset(key)
+
+        while n - self._baked > self.chunk:
+            if self._image is None:
+                self._image = RendererAgg(int(renderer.width),
+                                          int(renderer.height),
+                                          renderer.dpi)
+            stop = self._baked + self.chunk + 1
+            self._draw_part(self._image, x[self._baked:stop],
+                            y[self._baked:stop])
+            self._baked += self.chunk
+
+        if self._image is not None:
+            gc = renderer.new_gc()
+            gc.set_clip_rectangle(self.axes.bbox)
+            renderer.draw_image(gc, 0, 0,
+                                np.asarray(self._image.buffer_rgba())[::-1])
+            gc.restore()
+
+        self._draw_part(renderer, x[self._baked:], y[self._baked:])
+        self.stale = False